@@ -22,6 +22,14 @@ def create_app():
             except:
                 pass
 
+    # Version bộ keyword được đăng ký lúc khởi động (run.py, cv_worker.py). Nếu lúc đó DB chưa sẵn sàng:
+    # thử lại ở đầu request, trước khi request có thao tác ghi (không phải chờ lock SQLite của request)
+    @flask_app.before_request
+    def retry_keyword_model_registration():
+        if 'keyword_model_registered' not in flask_app.extensions and request.endpoint != 'static':
+            from app.utils.ml_classifier import register_keyword_model
+            register_keyword_model(flask_app)
+
     # Khởi tạo các extension
     db.init_app(flask_app)
     migrate.init_app(flask_app, db)
@@ -1,7 +1,9 @@
 from .user import User
 from .cv import CV
+from .cvtext import CVText
 from .classification_log import ClassificationLog
 from .cvprocessingqueue import CVProcessingQueue
+from .uploadsession import UploadSession
 from .jobcategory import JobCategory
 from .categorystatistic import CategoryStatistic
 from .mlmodel import MLModel
@@ -10,9 +10,29 @@ class CV(db.Model):
     file_size = db.Column(db.Integer)
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
     predicted_category_id = db.Column(db.Integer, db.ForeignKey("job_categories.id"))
-    file_content = db.Column(db.Text)
+    text_encoding = db.Column(db.String(32))  # Encoding phát hiện được với CV dạng TXT
+    content_hash = db.Column(db.String(64), index=True)  # SHA-256 của file, dùng cho dedupe và tên blob
+    storage_path = db.Column(db.String(255), index=True)  # Đường dẫn tương đối trong thư mục uploads (cvs/ab/cd/<hash>.pdf)
 
     logs = db.relationship("ClassificationLog", backref="cv", lazy=True)
     queue = db.relationship("CVProcessingQueue", backref="cv", lazy=True)
+    # Text đã extract nằm ở bảng cv_texts (nén), chỉ load khi đọc file_content
+    text_store = db.relationship("CVText", uselist=False, lazy="select", cascade="all, delete-orphan")
+
+    @property
+    def file_content(self):
+        """Extracted text of the CV (loaded and decompressed on first access)."""
+        return self.text_store.text if self.text_store is not None else None
+
+    @file_content.setter
+    def file_content(self, value):
+        if not value:
+            self.text_store = None
+            return
+        from app.models.cvtext import CVText
+        if self.text_store is None:
+            self.text_store = CVText()
+        self.text_store.text = value
+
     def __repr__(self):
         return f"<CV {self.file_name}>"
@@ -8,5 +8,14 @@ class CVProcessingQueue(db.Model):
     cv_id = db.Column(db.Integer, db.ForeignKey("cvs.id"), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # Trạng thái xử lý: pending, processing, done, failed
+    status = db.Column(db.String(20), default="pending", nullable=False, index=True)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    available_at = db.Column(db.DateTime, default=datetime.utcnow)  # Thời điểm được phép claim (backoff khi retry)
+    lease_expires_at = db.Column(db.DateTime)  # Worker phải xử lý xong trước thời điểm này
+    worker_id = db.Column(db.String(100))
+    last_error = db.Column(db.Text)
+    finished_at = db.Column(db.DateTime)
+
     def __repr__(self):
-        return f"<CVProcessingQueue CV={self.cv_id}>"
\ No newline at end of file
+        return f"<CVProcessingQueue CV={self.cv_id}, status={self.status}>"
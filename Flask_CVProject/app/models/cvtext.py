@@ -0,0 +1,74 @@
+"""
+Model lưu text đã extract của CV, tách khỏi bảng cvs
+Text được nén (zlib, hoặc zstd khi đặt CV_TEXT_CODEC=zstd) và chỉ load khi truy cập CV.file_content,
+nên các query danh sách CV chỉ đọc các cột metadata.
+"""
+
+import os
+import zlib
+from datetime import datetime
+
+from app.extensions import db
+
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+CODEC_NONE = 'none'
+CODEC_ZLIB = 'zlib'
+CODEC_ZSTD = 'zstd'
+
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 10
+# Text ngắn hơn ngưỡng này lưu không nén (header của codec không đáng)
+MIN_COMPRESS_BYTES = 256
+
+# zstd chỉ khi được chọn rõ ràng: mọi node đọc CV phải cài zstandard, nếu không sẽ không giải nén được
+DEFAULT_CODEC = (os.environ.get('CV_TEXT_CODEC') or CODEC_ZLIB).lower()
+
+
+def compress_text(text: str, codec: str = DEFAULT_CODEC) -> tuple:
+    """Encode text as UTF-8 and compress it; returns (codec, data)."""
+    data = text.encode('utf-8')
+    if len(data) < MIN_COMPRESS_BYTES:
+        return CODEC_NONE, data
+    if codec == CODEC_ZSTD and HAS_ZSTD:
+        return CODEC_ZSTD, zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    if codec == CODEC_NONE:
+        return CODEC_NONE, data
+    return CODEC_ZLIB, zlib.compress(data, ZLIB_LEVEL)
+
+
+def decompress_text(codec: str, data: bytes) -> str:
+    """Inverse of compress_text."""
+    if codec == CODEC_ZSTD:
+        if not HAS_ZSTD:
+            raise RuntimeError("CV text is zstd-compressed but the zstandard package is not installed")
+        data = zstandard.ZstdDecompressor().decompress(data)
+    elif codec == CODEC_ZLIB:
+        data = zlib.decompress(data)
+    return data.decode('utf-8')
+
+
+class CVText(db.Model):
+    __tablename__ = "cv_texts"
+
+    cv_id = db.Column(db.Integer, db.ForeignKey("cvs.id"), primary_key=True)
+    codec = db.Column(db.String(10), nullable=False, default=CODEC_NONE)
+    content = db.Column(db.LargeBinary, nullable=False)
+    text_length = db.Column(db.Integer)  # Số ký tự trước khi nén
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @property
+    def text(self) -> str:
+        return decompress_text(self.codec, self.content)
+
+    @text.setter
+    def text(self, value: str) -> None:
+        self.codec, self.content = compress_text(value)
+        self.text_length = len(value)
+
+    def __repr__(self):
+        return f"<CVText CV={self.cv_id}, codec={self.codec}, length={self.text_length}>"
@@ -0,0 +1,21 @@
+from app.extensions import db
+from datetime import datetime
+class UploadSession(db.Model):
+    __tablename__ = "upload_sessions"
+
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex, dùng trong URL upload
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    file_name = db.Column(db.String(255), nullable=False)
+    file_type = db.Column(db.String(50), nullable=False)
+    total_size = db.Column(db.Integer, nullable=False)
+    received_bytes = db.Column(db.Integer, default=0, nullable=False)  # Số byte liên tục đã nhận từ đầu file
+
+    # Trạng thái: open, completing (đang finalize), completed, aborted
+    status = db.Column(db.String(20), default="open", nullable=False, index=True)
+    cv_id = db.Column(db.Integer, db.ForeignKey("cvs.id"), nullable=True)  # CV được tạo khi finalize
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<UploadSession {self.id} {self.received_bytes}/{self.total_size} {self.status}>"
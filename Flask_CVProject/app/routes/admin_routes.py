@@ -5,15 +5,15 @@ Routes cho admin
 - Quản lý bài đăng tuyển dụng (tất cả bài đăng của tất cả nhà tuyển dụng)
 """
 
-import os
 import logging
 from flask import Blueprint, render_template, request, jsonify
-from werkzeug.utils import secure_filename
 from app.extensions import db
 from app.models import User, JobPosting, CV, JobApplication, CVData, JobCategory, ClassificationLog
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timedelta, time, timezone
 from sqlalchemy import func, desc, and_, or_
+from app.utils.image_derivatives import save_image_derivatives, derivative_url, delete_image_set
+from app.utils.blob_storage import get_blob_storage
 
 logger = logging.getLogger(__name__)
 
@@ -306,7 +306,7 @@ def get_statistics():
 
 # ============= Helper Functions =============
 
-LOGO_UPLOAD_FOLDER = os.path.join('Flask_CVProject', 'app', 'static', 'uploads', 'company_logos')
+LOGO_KEY_PREFIX = 'company_logos'
 ALLOWED_LOGO_EXTENSIONS = {'jpg', 'jpeg', 'png', 'gif', 'webp', 'svg'}
 
 def allowed_logo_file(filename):
@@ -319,17 +319,8 @@ def save_company_logo(file, job_id):
     if not allowed_logo_file(file.filename):
         raise ValueError('Định dạng file không được hỗ trợ. Chỉ chấp nhận: JPG, JPEG, PNG, GIF, WEBP, SVG')
 
-    file_ext = file.filename.rsplit('.', 1)[1].lower()
-    filename = f'logo_{job_id}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{file_ext}'
-    filename = secure_filename(filename)
-        
-      
-    os.makedirs(LOGO_UPLOAD_FOLDER, exist_ok=True)
-    
-    file_path = os.path.join(LOGO_UPLOAD_FOLDER, filename)
-    file.save(file_path)
-    
-    return f'/static/uploads/company_logos/{filename}'
+    return save_image_derivatives(file, get_blob_storage(), LOGO_KEY_PREFIX,
+                                  f'logo_{job_id}', 'logo')
 
 def safe_decode_text(text):
     if text is None:
@@ -436,6 +427,7 @@ def admin_get_jobs():
                     'created_at': job.created_at.isoformat() if job.created_at else None,
                     'deadline': job.deadline.isoformat() if job.deadline else None,
                     'company_logo': getattr(job, 'company_logo', None) if hasattr(job, 'company_logo') else None,
+                    'company_logo_thumb': derivative_url(getattr(job, 'company_logo', None), 'thumb'),
                     'recruiter_id': job.recruiter_id,
                     'recruiter_name': recruiter.full_name if recruiter else None,
                     'recruiter_email': recruiter.email if recruiter else None
@@ -602,23 +594,6 @@ def admin_create_job():
         db.session.add(new_job)
         
         try:
-            db.session.flush()
-            job_id = new_job.id
-            
-            if new_job.company_logo and 'logo_0_' in new_job.company_logo:
-                try:
-                    old_path = new_job.company_logo
-                    file_ext = old_path.rsplit('.', 1)[1]
-                    new_filename = f'logo_{job_id}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{file_ext}'
-                    new_path = f'/static/uploads/company_logos/{new_filename}'
-                    old_full_path = os.path.join('Flask_CVProject', 'app', old_path.lstrip('/'))
-                    new_full_path = os.path.join('Flask_CVProject', 'app', new_path.lstrip('/'))
-                    if os.path.exists(old_full_path):
-                        os.rename(old_full_path, new_full_path)
-                        new_job.company_logo = new_path
-                except Exception as e:
-                    logger.error(f"Error renaming logo file: {str(e)}")
-            
             db.session.commit()
             
             return jsonify({
@@ -807,12 +782,7 @@ def admin_update_job(job_id):
             if logo_file and logo_file.filename != '':
                 try:
                     if job.company_logo:
-                        old_logo_path = os.path.join('Flask_CVProject', 'app', job.company_logo.lstrip('/'))
-                        if os.path.exists(old_logo_path):
-                            try:
-                                os.remove(old_logo_path)
-                            except:
-                                pass
+                        delete_image_set(get_blob_storage(), job.company_logo)
                     
                     logo_path = save_company_logo(logo_file, job_id)
                     job.company_logo = logo_path
@@ -846,9 +816,7 @@ def admin_delete_job(job_id):
         
         if job.company_logo:
             try:
-                logo_path = os.path.join('Flask_CVProject', 'app', job.company_logo.lstrip('/'))
-                if os.path.exists(logo_path):
-                    os.remove(logo_path)
+                delete_image_set(get_blob_storage(), job.company_logo)
             except:
                 pass
         
@@ -6,22 +6,24 @@ import json
 import logging
 import os
 from flask import Blueprint, request, jsonify, render_template
-from werkzeug.utils import secure_filename
 from app.extensions import db
 from app.models import User, JobCategory
 from app.models.cvdata import CVData
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.utils.ai_enhancer import enhance_full_cv_with_ai, enhance_summary_with_ai, enhance_experience_with_ai, enhance_skills_with_ai
 from app.utils.classifier import classify_cv_by_keywords, get_category_id_by_name
-from datetime import datetime
+from app.utils.image_derivatives import save_image_derivatives, load_embeddable_image
+from app.utils.blob_storage import get_blob_storage, LocalBlobStorage
 
 logger = logging.getLogger(__name__)
 
 cv_builder_bp = Blueprint('cv_builder', __name__)
 
-# Thư mục lưu ảnh đại diện
-AVATAR_UPLOAD_FOLDER = os.path.join('Flask_CVProject', 'app', 'static', 'uploads', 'avatars')
+# Thư mục (blob key prefix) lưu ảnh đại diện
+AVATAR_KEY_PREFIX = 'avatars'
 ALLOWED_IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+# Ảnh tĩnh của app (không phải upload) - /static/...
+STATIC_STORAGE = LocalBlobStorage(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static'), '/static')
 
 def allowed_image_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_IMAGE_EXTENSIONS
@@ -29,15 +31,25 @@ def allowed_image_file(filename):
 def save_avatar(file, user_id):
     """Lưu ảnh đại diện và trả về đường dẫn"""
     if file and allowed_image_file(file.filename):
-        os.makedirs(AVATAR_UPLOAD_FOLDER, exist_ok=True)
-        file_ext = file.filename.rsplit('.', 1)[1].lower()
-        filename = f'avatar_{user_id}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{file_ext}'
-        filename = secure_filename(filename)
-        file_path = os.path.join(AVATAR_UPLOAD_FOLDER, filename)
-        file.save(file_path)
-        return f'/static/uploads/avatars/{filename}'
+        # Lưu bản đã thu nhỏ (+ WebP, thumbnail) thay vì ảnh gốc; tên file theo hash nội dung
+        try:
+            return save_image_derivatives(file, get_blob_storage(), AVATAR_KEY_PREFIX,
+                                          f'avatar_{user_id}', 'avatar')
+        except ValueError as e:
+            logger.warning(f"Rejected avatar upload: {str(e)}")
     return None
 
+def resolve_image_url(url):
+    """(storage, key) of an image URL in the CV: uploaded blob or file under app/static; (None, None) otherwise"""
+    storage = get_blob_storage()
+    key = storage.key_for_url(url)
+    if key:
+        return storage, key
+    key = STATIC_STORAGE.key_for_url(url)
+    if key:
+        return STATIC_STORAGE, key
+    return None, None
+
 def get_user_id_from_jwt():
     """Helper function to get user_id from JWT identity and convert to int"""
     user_id = get_jwt_identity()
@@ -237,23 +249,15 @@ def export_temp_cv():
             
             def replace_image_src(match):
                 src = match.group(1)
-                if src.startswith('/static/'):
-                    img_path = os.path.join(os.getcwd(), 'Flask_CVProject', 'app', src.lstrip('/'))
-                    if os.path.exists(img_path):
-                        try:
-                            with open(img_path, 'rb') as img_file:
-                                img_data = img_file.read()
-                                img_base64 = base64.b64encode(img_data).decode('utf-8')
-                                ext = os.path.splitext(img_path)[1].lower()
-                                mime_type = {
-                                    '.jpg': 'image/jpeg',
-                                    '.jpeg': 'image/jpeg',
-                                    '.png': 'image/png',
-                                    '.webp': 'image/webp'
-                                }.get(ext, 'image/jpeg')
-                                return f'src="data:{mime_type};base64,{img_base64}"'
-                        except Exception as e:
-                            logger.warning(f"Could not encode image {img_path}: {e}")
+                img_storage, img_key = resolve_image_url(src)
+                if img_key and img_storage.exists(img_key):
+                    try:
+                        # Nhúng bản WebP đã thu nhỏ (vài KB) thay vì ảnh gốc
+                        mime_type, img_data = load_embeddable_image(img_storage, img_key)
+                        img_base64 = base64.b64encode(img_data).decode('utf-8')
+                        return f'src="data:{mime_type};base64,{img_base64}"'
+                    except Exception as e:
+                        logger.warning(f"Could not encode image {src}: {e}")
                 return match.group(0)
             
             html_content = re.sub(r'src="([^"]+)"', replace_image_src, html_content)
@@ -552,14 +556,15 @@ def export_temp_cv():
             font.size = Pt(11)
             
             # Header với ảnh nếu có
-            if avatar_url and avatar_url.startswith('/static/'):
-                avatar_path = os.path.join('Flask_CVProject', 'app', avatar_url.lstrip('/'))
-                if os.path.exists(avatar_path):
+            avatar_storage, avatar_key = resolve_image_url(avatar_url)
+            if avatar_key:
+                if avatar_storage.exists(avatar_key):
                     try:
                         paragraph = doc.add_paragraph()
                         run = paragraph.add_run()
                         # Kích thước ảnh: 1.5 inch = ~150px (giống với preview)
-                        run.add_picture(avatar_path, width=Inches(1.5), height=Inches(1.5))
+                        with avatar_storage.local_copy(avatar_key) as avatar_path:
+                            run.add_picture(avatar_path, width=Inches(1.5), height=Inches(1.5))
                         paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
                         paragraph_format = paragraph.paragraph_format
                         paragraph_format.space_after = Pt(12)
@@ -1,14 +1,19 @@
-import os
 import logging
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app
 from werkzeug.utils import secure_filename
 from app.extensions import db
 from app.models import CV, User, JobCategory, ClassificationLog
 from app.models.cvprocessingqueue import CVProcessingQueue
 from flask_jwt_extended import jwt_required, get_jwt_identity, decode_token
 from flask_jwt_extended.exceptions import JWTDecodeError
-from app.utils.text_extractor import extract_text_from_file
-from app.utils.classifier import classify_cv_by_keywords, get_category_id_by_name
+from app.utils.classifier import classify_cv_text
+from app.utils.cv_queue import enqueue_cv, process_cv, reuse_prior_results, get_processing_status
+from app.utils.upload_storage import store_upload, cv_blob_key, delete_blob_if_unreferenced, BlobRef, UploadTooLargeError
+from app.utils import chunked_upload
+from app.utils.chunked_upload import UploadOffsetError, UploadSessionClosedError, UploadSessionBusyError
+from app.models.uploadsession import UploadSession
+from app.utils.blob_storage import get_blob_storage
+from app.utils.file_serving import send_blob
 from datetime import datetime, timedelta
 from reportlab.pdfgen import canvas
 from sqlalchemy import func
@@ -16,23 +21,97 @@ logger = logging.getLogger(__name__)
 
 cv_bp = Blueprint('cv', __name__)
 
-# Đường dẫn tuyệt đối đến thư mục uploads
-# Dựa trên vị trí file hiện tại (cv_routes.py)
-# cv_routes.py nằm ở: Flask_CVProject/app/routes/cv_routes.py
-# Cần lấy: Flask_CVProject/app/static/uploads
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Flask_CVProject/app
-UPLOAD_FOLDER = os.path.join(BASE_DIR, 'static', 'uploads')
 ALLOWED_EXTENSIONS = {'pdf', 'docx', 'txt', 'jpg', 'jpeg', 'png'}
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+
+def save_uploaded_cv(file, user_id):
+    """
+    Stream an uploaded CV to content-addressed storage and add its CV row to the session.
+    If the same bytes were uploaded and processed before, their extracted text and
+    classification are copied instead of processing the file again.
+
+    Returns:
+        (new_cv, reused)
+    """
+    file_type = file.filename.rsplit('.', 1)[1].lower()
+    filename = secure_filename(file.filename) or f"cv.{file_type}"
+
+    stored = store_upload(file, get_blob_storage(), file_type,
+                          max_bytes=current_app.config.get('CV_MAX_UPLOAD_BYTES'))
+    return create_uploaded_cv(stored, filename, file_type, user_id)
+
+
+def create_uploaded_cv(stored, filename, file_type, user_id):
+    """
+    Add the CV row for a file already in storage (form upload or finished chunked upload).
+
+    Returns:
+        (new_cv, reused)
+    """
+    new_cv = CV(
+        file_name=filename,
+        file_type=file_type,
+        file_size=stored.size,
+        content_hash=stored.content_hash,
+        storage_path=stored.relative_path,
+        user_id=user_id
+    )
+    db.session.add(new_cv)
+
+    reused = stored.existed and reuse_prior_results(new_cv)
+    return new_cv, reused
+
+
+def process_stored_cv(cv):
+    """Run process_cv on a CV's stored file (downloaded to a temp file for remote storage)."""
+    with get_blob_storage().local_copy(cv_blob_key(cv)) as file_path:
+        return process_cv(cv, file_path)
+
+
+def uploaded_cv_json(cv):
+    return {
+        'id': cv.id,
+        'file_name': cv.file_name,
+        'file_type': cv.file_type,
+        'file_size': cv.file_size,
+        'uploaded_at': cv.uploaded_at.isoformat() if cv.uploaded_at else None
+    }
+
+
+def uploaded_cv_response(new_cv, reused, user_id):
+    """Queue or process a newly added CV, commit, and build the API upload response."""
+    if not reused and current_app.config.get('CV_ASYNC_PROCESSING', True):
+        # Trả về 202 ngay, client poll status_url để biết khi nào xử lý xong
+        queue_item = enqueue_cv(new_cv, user_id)
+        db.session.commit()
+        return jsonify({
+            'success': True,
+            'message': 'CV uploaded successfully and queued for processing',
+            'cv': uploaded_cv_json(new_cv),
+            'processing_status': queue_item.status,
+            'status_url': url_for('cv.get_cv_processing_status', cv_id=new_cv.id)
+        }), 202
+
+    if not reused:
+        process_stored_cv(new_cv)
+    db.session.commit()
+
+    return jsonify({
+        'success': True,
+        'message': 'CV uploaded successfully',
+        'deduplicated': reused,
+        'cv': uploaded_cv_json(new_cv)
+    }), 201
+
 @cv_bp.route("/api/cv/classify", methods=["POST"])
 def classify_cv():
     data = request.get_json()
     cv_text = data.get("cv_text")
 
-    category, confidence = classify_cv_by_keywords(cv_text)
+    category, confidence, _ = classify_cv_text(cv_text)
     return jsonify({"category": category, "confidence": confidence})
 
 from flask import Blueprint, send_file
@@ -216,99 +295,31 @@ def upload_cv():
             return redirect(request.url)
 
         if file and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            file_path = os.path.join(UPLOAD_FOLDER, filename)
-            os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-            
-            # Lưu file và lấy kích thước
-            file.save(file_path)
-            file_size = os.path.getsize(file_path)
-            file_type = filename.rsplit('.', 1)[1].lower()
-
-            # Extract text from file
-            # For images, skip OCR if file is too large or processing takes too long
-            extracted_text = None
-            try:
-                # Check file size before OCR for images
-                if file_type in ['jpg', 'jpeg', 'png']:
-                    file_size_mb = file_size / (1024 * 1024)
-                    if file_size_mb > 5:
-                        logger.info(f"Image {filename} is large ({file_size_mb:.1f}MB). Skipping OCR to prevent hanging. File uploaded successfully.")
-                        extracted_text = None
-                    else:
-                        logger.info(f"Processing image {filename} with OCR (may take 10-30 seconds)...")
-                        try:
-                            extracted_text = extract_text_from_file(file_path, file_type)
-                        except Exception as ocr_error:
-                            logger.warning(f"OCR failed for {filename}: {str(ocr_error)}. File uploaded but text extraction skipped.")
-                            extracted_text = None
-                else:
-                    extracted_text = extract_text_from_file(file_path, file_type)
-                
-                if extracted_text:
-                    logger.info(f"Successfully extracted text from {filename} ({len(extracted_text)} characters)")
-                else:
-                    if file_type in ['jpg', 'jpeg', 'png']:
-                        logger.info(f"Image {filename} uploaded successfully. Text extraction skipped (this is normal for large images).")
-                    else:
-                        logger.warning(f"No text extracted from {filename}")
-            except Exception as e:
-                logger.error(f"Error extracting text from {filename}: {str(e)}")
-                # Continue even if extraction fails - file is still saved
-
             # Lấy user_id nếu user đã login (từ JWT token nếu có)
             user_id = get_user_id_from_request()
 
-            # Classify CV if text was extracted
-            predicted_category_id = None
-            confidence = None
-            category_name = None
-            if extracted_text:
-                try:
-                    category_name, confidence_score = classify_cv_by_keywords(extracted_text)
-                    if category_name:
-                        predicted_category_id = get_category_id_by_name(category_name, JobCategory)
-                        if predicted_category_id:
-                            confidence = confidence_score
-                            logger.info(f"Classified CV as '{category_name}' (ID: {predicted_category_id}) with confidence {confidence_score:.2%}")
-                        else:
-                            logger.warning(f"Category '{category_name}' not found in database")
-                except Exception as e:
-                    logger.error(f"Error classifying CV: {str(e)}")
-                    # Continue even if classification fails
-
-            new_cv = CV(
-                file_name=filename,
-                file_type=file_type,
-                file_size=file_size,
-                user_id=user_id,
-                file_content=extracted_text,
-                predicted_category_id=predicted_category_id
-            )
-            db.session.add(new_cv)
-            db.session.commit()
-            
-            # Create classification log if classification was successful
-            if predicted_category_id and confidence is not None and user_id:
-                try:
-                    classification_log = ClassificationLog(
-                        cv_id=new_cv.id,
-                        predicted_category_id=predicted_category_id,
-                        confidence=confidence,
-                        user_id=user_id
-                    )
-                    db.session.add(classification_log)
-                    db.session.commit()
-                    logger.info(f"Created classification log for CV {new_cv.id}")
-                except Exception as e:
-                    logger.error(f"Error creating classification log: {str(e)}")
-                    db.session.rollback()
-
-            # Prepare success message with classification result
-            if predicted_category_id and category_name and confidence is not None:
-                flash(f'Tải lên thành công! CV đã được phân loại: {category_name} (Confidence: {confidence:.1%})', 'success')
-            else:
+            try:
+                new_cv, reused = save_uploaded_cv(file, user_id)
+            except UploadTooLargeError:
+                flash('File quá lớn.', 'danger')
+                return redirect(request.url)
+
+            if reused:
+                # File trùng nội dung với CV đã xử lý - dùng lại kết quả extract + phân loại
+                db.session.commit()
                 flash('Tải lên thành công!', 'success')
+            elif current_app.config.get('CV_ASYNC_PROCESSING', True):
+                # Extract + phân loại chạy trong cv_worker.py, không block request
+                enqueue_cv(new_cv, user_id)
+                db.session.commit()
+                flash('Tải lên thành công! CV đang được xử lý và phân loại.', 'success')
+            else:
+                result = process_stored_cv(new_cv)
+                db.session.commit()
+                if result['category'] and result['confidence'] is not None:
+                    flash(f'Tải lên thành công! CV đã được phân loại: {result["category"]} (Confidence: {result["confidence"]:.1%})', 'success')
+                else:
+                    flash('Tải lên thành công!', 'success')
             
             # Redirect to create-cv page if user is logged in, otherwise stay on upload page
             if user_id:
@@ -691,7 +702,6 @@ def get_cv_detail(cv_id):
 def download_cv(cv_id):
     """API download CV file - cho phép user download CV của mình hoặc recruiter download CV ứng viên"""
     try:
-        from flask import send_file
         current_user_id = get_user_id_from_jwt()
         user = User.query.get(current_user_id)
         
@@ -717,43 +727,18 @@ def download_cv(cv_id):
                 'message': 'You do not have permission to download this CV'
             }), 403
         
-        # Tìm file path (đảm bảo đường dẫn tuyệt đối)
-        file_path = os.path.join(UPLOAD_FOLDER, cv.file_name)
-        file_path = os.path.abspath(file_path)  # Chuyển thành đường dẫn tuyệt đối
-        
-        # Log để debug
-        logger.info(f"Looking for CV file at: {file_path}")
-        logger.info(f"File exists: {os.path.exists(file_path)}")
-        
-        if not os.path.exists(file_path):
-            # Thử tìm trong các vị trí khác có thể
-            alternative_paths = [
-                os.path.join(BASE_DIR, 'static', 'uploads', cv.file_name),  # Flask_CVProject/app/static/uploads
-                os.path.join(os.getcwd(), 'Flask_CVProject', 'app', 'static', 'uploads', cv.file_name),
-                os.path.join('Flask_CVProject', 'app', 'static', 'uploads', cv.file_name)
-            ]
-            
-            found = False
-            for alt_path in alternative_paths:
-                alt_path = os.path.abspath(alt_path)
-                if os.path.exists(alt_path):
-                    file_path = alt_path
-                    found = True
-                    logger.info(f"Found CV file at alternative path: {file_path}")
-                    break
-            
-            if not found:
-                logger.error(f"CV file not found at any path. Tried: {file_path} and alternatives")
-                return jsonify({
-                    'success': False,
-                    'message': f'CV file not found: {cv.file_name}'
-                }), 404
+        # Key lưu trên CV row - không cần dò nhiều vị trí
+        storage = get_blob_storage()
+        key = cv_blob_key(cv)
+        if not storage.exists(key):
+            logger.error(f"CV file not found for CV {cv.id}: {key}")
+            return jsonify({
+                'success': False,
+                'message': f'CV file not found: {cv.file_name}'
+            }), 404
         
-        return send_file(
-            file_path,
-            as_attachment=True,
-            download_name=cv.file_name
-        )
+        # S3: redirect tới presigned URL; local: ETag = content hash, recruiter tải lại cùng CV chỉ nhận 304
+        return send_blob(storage, key, cv.file_name, etag=cv.content_hash)
     
     except Exception as e:
         logger.error(f"Error downloading CV: {str(e)}")
@@ -762,6 +747,42 @@ def download_cv(cv_id):
             'message': f'Error downloading CV: {str(e)}'
         }), 500
 
+@cv_bp.route('/api/cvs/<int:cv_id>/status', methods=['GET'])
+@jwt_required()
+def get_cv_processing_status(cv_id):
+    """API kiểm tra trạng thái xử lý (extract + phân loại) của CV đã upload"""
+    try:
+        current_user_id = get_user_id_from_jwt()
+        
+        cv = CV.query.get_or_404(cv_id)
+        
+        if cv.user_id != current_user_id:
+            return jsonify({
+                'success': False,
+                'message': 'You do not have permission to view this CV'
+            }), 403
+        
+        queue_item = get_processing_status(cv_id)
+        
+        return jsonify({
+            'success': True,
+            'cv_id': cv.id,
+            # CV upload trước khi có queue được coi là đã xử lý xong
+            'status': queue_item.status if queue_item else 'done',
+            'attempts': queue_item.attempts if queue_item else 0,
+            'last_error': queue_item.last_error if queue_item else None,
+            'finished_at': queue_item.finished_at.isoformat() if queue_item and queue_item.finished_at else None,
+            'predicted_category': cv.category.name if cv.category else None,
+            'predicted_category_id': cv.predicted_category_id
+        }), 200
+    
+    except Exception as e:
+        logger.error(f"Error loading processing status for CV {cv_id}: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Error loading processing status: {str(e)}'
+        }), 500
+
 @cv_bp.route('/api/cvs/<int:cv_id>', methods=['DELETE'])
 @jwt_required()
 def delete_cv(cv_id):
@@ -792,20 +813,17 @@ def delete_cv(cv_id):
                 db.session.delete(queue_item)
             logger.info(f"Deleted {len(queue_items)} queue items for CV {cv_id}")
         
-        # Xóa file vật lý
-        file_path = os.path.join(UPLOAD_FOLDER, cv.file_name)
-        if os.path.exists(file_path):
-            try:
-                os.remove(file_path)
-                logger.info(f"Deleted physical file: {file_path}")
-            except Exception as file_error:
-                logger.warning(f"Error deleting physical file {file_path}: {str(file_error)}")
-                # Continue even if file deletion fails
+        # Phiên upload theo chunk đã tạo CV này: bỏ liên kết (giữ lịch sử phiên)
+        UploadSession.query.filter_by(cv_id=cv_id).update({UploadSession.cv_id: None}, synchronize_session=False)
         
         # Xóa record CV từ database
+        blob_ref = BlobRef.of(cv)
         db.session.delete(cv)
         db.session.commit()
         
+        # Xóa file vật lý sau khi commit (giữ lại nếu CV khác có cùng nội dung)
+        delete_blob_if_unreferenced(blob_ref, get_blob_storage())
+        
         logger.info(f"Successfully deleted CV {cv_id} for user {current_user_id}")
         
         return jsonify({
@@ -843,101 +861,15 @@ def api_upload_cv():
             }), 400
         
         if file and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            file_path = os.path.join(UPLOAD_FOLDER, filename)
-            os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-            
-            # Lưu file và lấy kích thước
-            file.save(file_path)
-            file_size = os.path.getsize(file_path)
-            file_type = filename.rsplit('.', 1)[1].lower()
-
-            # Extract text from file
-            # For images, skip OCR if file is too large or processing takes too long
-            extracted_text = None
             try:
-                # Check file size before OCR for images
-                if file_type in ['jpg', 'jpeg', 'png']:
-                    file_size_mb = file_size / (1024 * 1024)
-                    if file_size_mb > 5:
-                        logger.info(f"Image {filename} is large ({file_size_mb:.1f}MB). Skipping OCR to prevent hanging. File uploaded successfully.")
-                        extracted_text = None
-                    else:
-                        logger.info(f"Processing image {filename} with OCR (may take 10-30 seconds)...")
-                        try:
-                            extracted_text = extract_text_from_file(file_path, file_type)
-                        except Exception as ocr_error:
-                            logger.warning(f"OCR failed for {filename}: {str(ocr_error)}. File uploaded but text extraction skipped.")
-                            extracted_text = None
-                else:
-                    extracted_text = extract_text_from_file(file_path, file_type)
-                
-                if extracted_text:
-                    logger.info(f"Successfully extracted text from {filename} ({len(extracted_text)} characters)")
-                else:
-                    if file_type in ['jpg', 'jpeg', 'png']:
-                        logger.info(f"Image {filename} uploaded successfully. Text extraction skipped (this is normal for large images).")
-                    else:
-                        logger.warning(f"No text extracted from {filename}")
-            except Exception as e:
-                logger.error(f"Error extracting text from {filename}: {str(e)}")
-                # Continue even if extraction fails - file is still saved
-
-            # Classify CV if text was extracted
-            predicted_category_id = None
-            confidence = None
-            if extracted_text:
-                try:
-                    category_name, confidence_score = classify_cv_by_keywords(extracted_text)
-                    if category_name:
-                        predicted_category_id = get_category_id_by_name(category_name, JobCategory)
-                        if predicted_category_id:
-                            logger.info(f"Classified CV as '{category_name}' (ID: {predicted_category_id}) with confidence {confidence_score:.2%}")
-                        else:
-                            logger.warning(f"Category '{category_name}' not found in database")
-                        confidence = confidence_score
-                except Exception as e:
-                    logger.error(f"Error classifying CV: {str(e)}")
-                    # Continue even if classification fails
-
-            new_cv = CV(
-                file_name=filename,
-                file_type=file_type,
-                file_size=file_size,
-                user_id=current_user_id,
-                file_content=extracted_text,
-                predicted_category_id=predicted_category_id
-            )
-            db.session.add(new_cv)
-            db.session.commit()
-            
-            # Create classification log if classification was successful
-            if predicted_category_id and confidence is not None:
-                try:
-                    classification_log = ClassificationLog(
-                        cv_id=new_cv.id,
-                        predicted_category_id=predicted_category_id,
-                        confidence=confidence,
-                        user_id=current_user_id
-                    )
-                    db.session.add(classification_log)
-                    db.session.commit()
-                    logger.info(f"Created classification log for CV {new_cv.id}")
-                except Exception as e:
-                    logger.error(f"Error creating classification log: {str(e)}")
-                    db.session.rollback()
-            
-            return jsonify({
-                'success': True,
-                'message': 'CV uploaded successfully',
-                'cv': {
-                    'id': new_cv.id,
-                    'file_name': new_cv.file_name,
-                    'file_type': new_cv.file_type,
-                    'file_size': new_cv.file_size,
-                    'uploaded_at': new_cv.uploaded_at.isoformat() if new_cv.uploaded_at else None
-                }
-            }), 201
+                new_cv, reused = save_uploaded_cv(file, current_user_id)
+            except UploadTooLargeError:
+                return jsonify({
+                    'success': False,
+                    'message': 'File too large'
+                }), 413
+
+            return uploaded_cv_response(new_cv, reused, current_user_id)
         else:
             return jsonify({
                 'success': False,
@@ -950,3 +882,269 @@ def api_upload_cv():
             'success': False,
             'message': f'Error uploading CV: {str(e)}'
         }), 500
+
+
+# ---------- Upload CV theo chunk (resumable) ----------
+
+def get_upload_session_dir():
+    return chunked_upload.session_dir(get_blob_storage(), current_app.config.get('UPLOAD_SESSION_DIR'))
+
+
+def get_owned_upload_session(upload_id, user_id):
+    """Upload session of the user, or None (other users' sessions are reported as missing)."""
+    session = UploadSession.query.get(upload_id)
+    if session is None or session.user_id != user_id:
+        return None
+    return session
+
+
+def upload_session_json(session):
+    return {
+        'upload_id': session.id,
+        'file_name': session.file_name,
+        'file_size': session.total_size,
+        'offset': session.received_bytes,
+        'status': session.status,
+        'cv_id': session.cv_id,
+        'expires_at': session.expires_at.isoformat() if session.expires_at else None,
+        'upload_url': url_for('cv.upload_chunk', upload_id=session.id)
+    }
+
+
+def upload_session_not_found():
+    return jsonify({
+        'success': False,
+        'message': 'Upload session not found'
+    }), 404
+
+
+@cv_bp.route('/api/uploads', methods=['POST'])
+@jwt_required()
+def create_upload_session():
+    """
+    API bắt đầu upload CV theo chunk.
+    Body JSON: {"file_name": "...", "file_size": <bytes>}
+    Sau đó client PUT từng chunk lên upload_url?offset=N rồi POST .../complete
+    """
+    try:
+        current_user_id = get_user_id_from_jwt()
+        data = request.get_json(silent=True) or {}
+        file_name = data.get('file_name') or ''
+
+        if not allowed_file(file_name):
+            return jsonify({
+                'success': False,
+                'message': 'File type not allowed. Chỉ hỗ trợ: PDF, DOCX, TXT, JPG, JPEG, PNG'
+            }), 400
+
+        try:
+            file_size = int(data.get('file_size'))
+        except (TypeError, ValueError):
+            return jsonify({
+                'success': False,
+                'message': 'file_size is required'
+            }), 400
+
+        file_type = file_name.rsplit('.', 1)[1].lower()
+        try:
+            # Kiểm tra kích thước ngay từ đầu, trước khi nhận byte nào
+            session = chunked_upload.create_session(
+                current_user_id,
+                secure_filename(file_name) or f"cv.{file_type}",
+                file_type,
+                file_size,
+                get_upload_session_dir(),
+                max_bytes=current_app.config.get('CV_MAX_UPLOAD_BYTES'),
+                ttl_hours=current_app.config.get('UPLOAD_SESSION_TTL_HOURS') or chunked_upload.DEFAULT_SESSION_TTL_HOURS
+            )
+        except UploadTooLargeError:
+            return jsonify({
+                'success': False,
+                'message': 'File too large'
+            }), 413
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        db.session.commit()
+
+        result = upload_session_json(session)
+        result['chunk_size'] = current_app.config.get('UPLOAD_CHUNK_MAX_BYTES') or chunked_upload.DEFAULT_CHUNK_MAX_BYTES
+        return jsonify({'success': True, **result}), 201
+
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error creating upload session: {str(e)}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'message': f'Error creating upload session: {str(e)}'
+        }), 500
+
+
+@cv_bp.route('/api/uploads/<upload_id>', methods=['GET'])
+@jwt_required()
+def get_upload_session(upload_id):
+    """API lấy offset đã nhận - client tiếp tục upload từ đây sau khi mất kết nối"""
+    session = get_owned_upload_session(upload_id, get_user_id_from_jwt())
+    if session is None:
+        return upload_session_not_found()
+    return jsonify({'success': True, **upload_session_json(session)}), 200
+
+
+@cv_bp.route('/api/uploads/<upload_id>', methods=['PUT'])
+@jwt_required()
+def upload_chunk(upload_id):
+    """
+    API nhận một chunk (body là dữ liệu nhị phân thô).
+    Offset lấy từ query ?offset=N hoặc header Upload-Offset.
+    Trả về 409 kèm offset đúng nếu chunk không nối tiếp phần đã nhận.
+    """
+    try:
+        session = get_owned_upload_session(upload_id, get_user_id_from_jwt())
+        if session is None:
+            return upload_session_not_found()
+
+        try:
+            offset = int(request.args.get('offset', request.headers.get('Upload-Offset', '')))
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'message': 'offset is required'
+            }), 400
+
+        try:
+            received = chunked_upload.write_chunk(
+                session,
+                offset,
+                request.stream,
+                request.content_length,
+                get_upload_session_dir(),
+                chunk_max_bytes=current_app.config.get('UPLOAD_CHUNK_MAX_BYTES') or chunked_upload.DEFAULT_CHUNK_MAX_BYTES
+            )
+        except UploadOffsetError as e:
+            return jsonify({
+                'success': False,
+                'message': 'Chunk does not continue the uploaded data',
+                'offset': e.expected_offset
+            }), 409
+        except UploadTooLargeError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 413
+        except UploadSessionClosedError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 410
+
+        return jsonify({
+            'success': True,
+            'offset': received,
+            'complete': received == session.total_size
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error writing chunk for upload {upload_id}: {str(e)}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'message': f'Error uploading chunk: {str(e)}'
+        }), 500
+
+
+@cv_bp.route('/api/uploads/<upload_id>/complete', methods=['POST'])
+@jwt_required()
+def complete_upload_session(upload_id):
+    """API kết thúc upload theo chunk: lưu file và xử lý giống /api/upload"""
+    try:
+        current_user_id = get_user_id_from_jwt()
+        session = get_owned_upload_session(upload_id, current_user_id)
+        if session is None:
+            return upload_session_not_found()
+
+        if session.status == chunked_upload.STATUS_COMPLETED and session.cv_id:
+            # Gọi lại sau khi mất response: trả về CV đã tạo
+            cv = CV.query.get(session.cv_id)
+            if cv is not None:
+                return jsonify({
+                    'success': True,
+                    'message': 'CV uploaded successfully',
+                    'cv': uploaded_cv_json(cv),
+                    'status_url': url_for('cv.get_cv_processing_status', cv_id=cv.id)
+                }), 200
+
+        try:
+            chunked_upload.claim(session)
+        except UploadOffsetError as e:
+            return jsonify({
+                'success': False,
+                'message': 'Upload is incomplete',
+                'offset': e.expected_offset
+            }), 409
+        except UploadSessionBusyError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 409
+        except UploadSessionClosedError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 410
+
+        # Session đã được claim (đã commit): lỗi từ đây phải mở lại session để client thử lại
+        directory = get_upload_session_dir()
+        try:
+            stored = chunked_upload.finalize(session, get_blob_storage(), directory)
+            new_cv, reused = create_uploaded_cv(stored, session.file_name, session.file_type, current_user_id)
+            db.session.flush()
+            session.cv_id = new_cv.id
+            response = uploaded_cv_response(new_cv, reused, current_user_id)
+        except Exception:
+            db.session.rollback()
+            chunked_upload.release(upload_id)
+            raise
+
+        # CV đã commit: giờ mới bỏ file tạm
+        chunked_upload.discard_partial(session, directory)
+        return response
+
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error completing upload {upload_id}: {str(e)}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'message': f'Error uploading CV: {str(e)}'
+        }), 500
+
+
+@cv_bp.route('/api/uploads/<upload_id>', methods=['DELETE'])
+@jwt_required()
+def abort_upload_session(upload_id):
+    """API hủy upload theo chunk và xóa phần file đã nhận"""
+    try:
+        session = get_owned_upload_session(upload_id, get_user_id_from_jwt())
+        if session is None:
+            return upload_session_not_found()
+        if session.status != chunked_upload.STATUS_OPEN:
+            return jsonify({
+                'success': False,
+                'message': f'Upload session is {session.status}'
+            }), 410
+
+        chunked_upload.abort(session, get_upload_session_dir())
+        db.session.commit()
+        return jsonify({
+            'success': True,
+            'message': 'Upload aborted'
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error aborting upload {upload_id}: {str(e)}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'message': f'Error aborting upload: {str(e)}'
+        }), 500
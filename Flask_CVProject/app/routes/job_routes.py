@@ -10,6 +10,7 @@ from app.models import JobPosting, JobApplication, JobCategory, User, CV
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, time, timezone
 from sqlalchemy import desc, or_, and_
+from app.utils.image_derivatives import derivative_url
 
 logger = logging.getLogger(__name__)
 
@@ -224,7 +225,9 @@ def get_jobs():
                 'created_at': job.created_at.isoformat() if job.created_at else None,
                 'application_count': application_count,
                 'recruiter_name': recruiter_name,
-                'company_logo': job.company_logo if hasattr(job, 'company_logo') and job.company_logo else None
+                'company_logo': job.company_logo if hasattr(job, 'company_logo') and job.company_logo else None,
+                # Thumbnail WebP cho danh sách (logo cũ chưa có thumbnail thì dùng ảnh gốc)
+                'company_logo_thumb': derivative_url(job.company_logo, 'thumb') if hasattr(job, 'company_logo') else None
             })
         
         total_active = JobPosting.query.filter_by(is_active=True).count()
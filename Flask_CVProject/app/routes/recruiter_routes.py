@@ -10,24 +10,24 @@ import os
 import logging
 import re
 from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash
-from werkzeug.utils import secure_filename
 from app.extensions import db
 from app.models import User, JobPosting, JobApplication, CV, JobCategory, ClassificationLog
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timezone, time, timedelta
 from sqlalchemy import func, desc, and_, or_
-from app.utils.ai_enhancer import evaluate_cv_match_with_job
-from app.utils.text_extractor import extract_text_from_file
+from sqlalchemy.orm import selectinload
+from app.utils.ai_enhancer import evaluate_cv_match_with_job, CV_MATCH_MAX_CHARS
+from app.utils.text_extractor import extract_leading_text
+from app.utils.upload_storage import cv_blob_key
+from app.utils.blob_storage import get_blob_storage
+from app.utils.image_derivatives import save_image_derivatives, derivative_url, delete_image_set
 
 logger = logging.getLogger(__name__)
 
 recruiter_bp = Blueprint("recruiter", __name__)
 
-# Đường dẫn base directory
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Flask_CVProject/app
-
 # Thư mục lưu logo công ty
-LOGO_UPLOAD_FOLDER = os.path.join('Flask_CVProject', 'app', 'static', 'uploads', 'company_logos')
+LOGO_KEY_PREFIX = 'company_logos'
 ALLOWED_LOGO_EXTENSIONS = {'jpg', 'jpeg', 'png', 'gif', 'webp', 'svg'}
 
 def allowed_logo_file(filename):
@@ -42,20 +42,10 @@ def save_company_logo(file, job_id):
     if not allowed_logo_file(file.filename):
         raise ValueError('Định dạng file không được hỗ trợ. Chỉ chấp nhận: JPG, JPEG, PNG, GIF, WEBP, SVG')
     
-    # Tạo tên file an toàn với job_id để tránh trùng lặp
-    file_ext = file.filename.rsplit('.', 1)[1].lower()
-    filename = f'logo_{job_id}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{file_ext}'
-    filename = secure_filename(filename)
-    
-    # Tạo thư mục nếu chưa có
-    os.makedirs(LOGO_UPLOAD_FOLDER, exist_ok=True)
-    
-    # Lưu file
-    file_path = os.path.join(LOGO_UPLOAD_FOLDER, filename)
-    file.save(file_path)
-    
+    # Lưu logo đã thu nhỏ + WebP + thumbnail, tên file theo job_id và hash nội dung
     # Trả về đường dẫn relative để lưu vào database
-    return f'/static/uploads/company_logos/{filename}'
+    return save_image_derivatives(file, get_blob_storage(), LOGO_KEY_PREFIX,
+                                  f'logo_{job_id}', 'logo')
 
 def safe_decode_text(text):
     """
@@ -506,7 +496,8 @@ def get_jobs():
                 'application_count': application_count,
                 'created_at': job.created_at.isoformat() if job.created_at else None,
                 'deadline': job.deadline.isoformat() if job.deadline else None,
-                'company_logo': getattr(job, 'company_logo', None) if hasattr(job, 'company_logo') else None
+                'company_logo': getattr(job, 'company_logo', None) if hasattr(job, 'company_logo') else None,
+                'company_logo_thumb': derivative_url(getattr(job, 'company_logo', None), 'thumb')
             })
         
         return jsonify({
@@ -891,24 +882,6 @@ def create_job():
         db.session.add(new_job)
         
         try:
-            db.session.flush()
-            job_id = new_job.id
-            
-            # Rename logo file nếu cần
-            if new_job.company_logo and 'logo_0_' in new_job.company_logo:
-                try:
-                    old_path = new_job.company_logo
-                    file_ext = old_path.rsplit('.', 1)[1]
-                    new_filename = f'logo_{job_id}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{file_ext}'
-                    new_path = f'/static/uploads/company_logos/{new_filename}'
-                    old_full_path = os.path.join('Flask_CVProject', 'app', old_path.lstrip('/'))
-                    new_full_path = os.path.join('Flask_CVProject', 'app', new_path.lstrip('/'))
-                    if os.path.exists(old_full_path):
-                        os.rename(old_full_path, new_full_path)
-                        new_job.company_logo = new_path
-                except Exception as e:
-                    logger.error(f"Error renaming logo file: {str(e)}")
-            
             db.session.commit()
             
             return jsonify({
@@ -1053,12 +1026,7 @@ def update_job(job_id):
                 try:
                     # Xóa logo cũ nếu có
                     if job.company_logo:
-                        old_logo_path = os.path.join('Flask_CVProject', 'app', job.company_logo.lstrip('/'))
-                        if os.path.exists(old_logo_path):
-                            try:
-                                os.remove(old_logo_path)
-                            except:
-                                pass
+                        delete_image_set(get_blob_storage(), job.company_logo)
                     
                     # Lưu logo mới
                     logo_path = save_company_logo(logo_file, job_id)
@@ -1099,9 +1067,7 @@ def delete_job(job_id):
         # Xóa logo nếu có
         if job.company_logo:
             try:
-                logo_path = os.path.join('Flask_CVProject', 'app', job.company_logo.lstrip('/'))
-                if os.path.exists(logo_path):
-                    os.remove(logo_path)
+                delete_image_set(get_blob_storage(), job.company_logo)
             except:
                 pass
         
@@ -1240,6 +1206,9 @@ def get_top_cvs(job_id):
             JobCategory, CV.predicted_category_id == JobCategory.id
         ).filter(
             JobApplication.job_posting_id == job_id
+        ).options(
+            # Text của CV chỉ cần để chấm điểm - load một lần cho cả danh sách thay vì N query
+            selectinload(CV.text_store)
         )
         
         applied_results = applied_query.all()
@@ -1266,21 +1235,18 @@ def get_top_cvs(job_id):
                 
                 # Nếu không có file_content, extract lại từ file
                 if not cv_text and cv.file_name:
-                    # Tạo đường dẫn file từ file_name
-                    cv_file_path = os.path.join(BASE_DIR, 'static', 'uploads', cv.file_name)
-                    
-                    # Thử các đường dẫn khác nhau nếu không tìm thấy
-                    if not os.path.exists(cv_file_path):
-                        # Thử đường dẫn tuyệt đối với UPLOAD_FOLDER
-                        upload_folder = os.path.join(BASE_DIR, 'static', 'uploads')
-                        cv_file_path = os.path.join(upload_folder, cv.file_name)
+                    # Key lưu trên CV row (upload cũ chưa relocate: theo file_name)
+                    storage = get_blob_storage()
+                    cv_key = cv_blob_key(cv)
                     
-                    if os.path.exists(cv_file_path):
+                    if storage.exists(cv_key):
                         # Extract text từ CV file
                         file_ext = os.path.splitext(cv.file_name)[1].lower()
                         file_type = file_ext.lstrip('.')
                         if file_type in ['pdf', 'docx', 'txt', 'jpg', 'jpeg', 'png']:
-                            cv_text = extract_text_from_file(cv_file_path, file_type)
+                            # AI chỉ đọc phần đầu CV: dừng extract khi đã đủ ký tự
+                            with storage.local_copy(cv_key) as cv_file_path:
+                                cv_text = extract_leading_text(cv_file_path, file_type, CV_MATCH_MAX_CHARS)
                             if cv_text and len(cv_text.strip()) > 50:
                                 logger.info(f"Extracted text from file for CV {cv.id} ({len(cv_text)} characters)")
                 
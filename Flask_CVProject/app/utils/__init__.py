@@ -6,11 +6,30 @@ from app.utils.text_extractor import (
     extract_text_from_file,
     extract_text_from_pdf,
     extract_text_from_docx,
-    extract_text_from_txt
+    extract_text_from_txt,
+    detect_file_encoding,
+    iter_text_chunks,
+    extract_leading_text
+)
+
+from app.utils.extraction_cache import (
+    ExtractionCache,
+    get_extraction_cache,
+    hash_file
+)
+
+from app.utils.image_extractor import (
+    extract_text_from_image,
+    extract_text_from_images,
+    extract_text_from_large_image
 )
 
 from app.utils.classifier import (
     classify_cv_by_keywords,
+    classify_cv_streaming,
+    classify_many,
+    classify_cv_text,
+    classify_cv_texts,
     get_category_id_by_name,
     CATEGORY_KEYWORDS
 )
@@ -27,7 +46,20 @@ __all__ = [
     'extract_text_from_pdf',
     'extract_text_from_docx',
     'extract_text_from_txt',
+    'detect_file_encoding',
+    'iter_text_chunks',
+    'extract_leading_text',
+    'extract_text_from_image',
+    'extract_text_from_images',
+    'extract_text_from_large_image',
+    'ExtractionCache',
+    'get_extraction_cache',
+    'hash_file',
     'classify_cv_by_keywords',
+    'classify_cv_streaming',
+    'classify_many',
+    'classify_cv_text',
+    'classify_cv_texts',
     'get_category_id_by_name',
     'CATEGORY_KEYWORDS',
     'detect_language',
@@ -25,6 +25,8 @@ except ImportError:
     HAS_OPENAI = False
     logger.warning("OpenAI module chưa được cài đặt")
 
+CV_MATCH_MAX_CHARS = 2000  # Chỉ phần đầu CV được gửi cho AI khi đánh giá độ phù hợp
+
 def get_openai_client():
     """Khởi tạo OpenAI client"""
     if not HAS_OPENAI:
@@ -373,7 +375,7 @@ Thông tin vị trí tuyển dụng:
 {job_info}
 
 Nội dung CV (rút gọn):
-{cv_text[:2000]}
+{cv_text[:CV_MATCH_MAX_CHARS]}
 
 Chỉ trả về một số từ 0.0 đến 1.0 (ví dụ: 0.85), không có giải thích:"""
     
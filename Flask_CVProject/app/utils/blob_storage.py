@@ -0,0 +1,366 @@
+"""
+Blob storage backends for uploaded files (CVs, avatars, company logos)
+Keys are '/'-separated paths relative to the upload root (e.g. cvs/ab/cd/<sha256>.pdf,
+avatars/avatar_3_<hash>.jpg), identical to the local layout under app/static/uploads,
+so switching BLOB_STORAGE_BACKEND does not change what is stored in the database.
+
+Backends:
+- 'local' (default): files under BLOB_LOCAL_ROOT (app/static/uploads)
+- 's3': any S3-compatible object store (AWS S3, MinIO, R2...) via boto3, so several
+  web nodes can share uploads
+- 'memory': in-process dict, a stand-in for tests and local experiments
+"""
+
+import os
+import io
+import time
+import shutil
+import logging
+import tempfile
+from contextlib import contextmanager
+from typing import Optional, BinaryIO, Iterator
+from urllib.parse import quote
+
+try:
+    import boto3
+    from botocore.exceptions import ClientError
+    HAS_BOTO3 = True
+except ImportError:
+    HAS_BOTO3 = False
+
+logger = logging.getLogger(__name__)
+
+COPY_CHUNK_SIZE = 1024 * 1024  # 1MB
+STAGING_DIR = '.incoming'
+
+# app/static/uploads
+DEFAULT_LOCAL_ROOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static', 'uploads')
+DEFAULT_LOCAL_URL_PREFIX = '/static/uploads'
+
+
+def _content_disposition(download_name: str) -> str:
+    return f"attachment; filename*=UTF-8''{quote(download_name)}"
+
+
+class BlobStorage:
+    """Interface shared by all backends."""
+
+    backend = None
+
+    def staging_dir(self) -> Optional[str]:
+        """Directory for temp files before put_file (same filesystem for the local backend)."""
+        return None
+
+    def put_file(self, key: str, path: str, content_type: Optional[str] = None) -> None:
+        """Store a finished local file under key. The local file may be moved away."""
+        with open(path, 'rb') as f:
+            self.put_stream(key, f, content_type)
+
+    def put_stream(self, key: str, stream: BinaryIO, content_type: Optional[str] = None) -> None:
+        raise NotImplementedError
+
+    def put_bytes(self, key: str, data: bytes, content_type: Optional[str] = None) -> None:
+        self.put_stream(key, io.BytesIO(data), content_type)
+
+    def open(self, key: str) -> BinaryIO:
+        """Readable stream of the blob; raises FileNotFoundError if it does not exist."""
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def size(self, key: str) -> Optional[int]:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def touch(self, key: str) -> bool:
+        """Refresh the blob's modification time; False if it does not exist."""
+        raise NotImplementedError
+
+    def modified_at(self, key: str) -> Optional[float]:
+        """Modification time (epoch seconds) of the blob, None if it does not exist."""
+        raise NotImplementedError
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Path on this machine's filesystem, or None for remote backends."""
+        return None
+
+    def presigned_url(self, key: str, expires_in: int = 300, download_name: Optional[str] = None) -> Optional[str]:
+        """Time-limited URL the client can download from directly, or None if unsupported."""
+        return None
+
+    def public_url(self, key: str) -> str:
+        """Stable URL for public assets (avatars, logos)."""
+        raise NotImplementedError
+
+    def key_for_url(self, url: Optional[str]) -> Optional[str]:
+        """Inverse of public_url; None if the URL does not point into this storage."""
+        prefix = self.public_url('')
+        if url and url.startswith(prefix) and len(url) > len(prefix):
+            return url[len(prefix):]
+        return None
+
+    @contextmanager
+    def local_copy(self, key: str) -> Iterator[str]:
+        """
+        Path to a local file with the blob's content, for code that needs a real file
+        (text extraction, python-docx). Remote blobs are downloaded to a temp file that
+        is removed afterwards.
+        """
+        path = self.local_path(key)
+        if path is not None:
+            if not os.path.isfile(path):
+                raise FileNotFoundError(f"Blob not found: {key}")
+            yield path
+            return
+
+        suffix = os.path.splitext(key)[1]
+        fd, temp_path = tempfile.mkstemp(suffix=suffix)
+        try:
+            with os.fdopen(fd, 'wb') as output, self.open(key) as source:
+                shutil.copyfileobj(source, output, COPY_CHUNK_SIZE)
+            yield temp_path
+        finally:
+            os.unlink(temp_path)
+
+
+class LocalBlobStorage(BlobStorage):
+    backend = 'local'
+
+    def __init__(self, root: str = DEFAULT_LOCAL_ROOT, url_prefix: str = DEFAULT_LOCAL_URL_PREFIX):
+        self.root = root
+        self.url_prefix = url_prefix.rstrip('/')
+
+    def _path(self, key: str) -> str:
+        parts = key.split('/')
+        if '..' in parts or not key or key.startswith('/'):
+            raise ValueError(f"Invalid blob key: {key}")
+        return os.path.join(self.root, *parts)
+
+    def staging_dir(self) -> str:
+        path = os.path.join(self.root, STAGING_DIR)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def put_file(self, key, path, content_type=None):
+        target = self._path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Cùng filesystem (file tạm trong staging_dir) -> rename atomic
+        shutil.move(path, target)
+
+    def put_stream(self, key, stream, content_type=None):
+        fd, temp_path = tempfile.mkstemp(dir=self.staging_dir(), suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as output:
+                shutil.copyfileobj(stream, output, COPY_CHUNK_SIZE)
+            self.put_file(key, temp_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+    def open(self, key):
+        return open(self._path(key), 'rb')
+
+    def exists(self, key):
+        return os.path.isfile(self._path(key))
+
+    def size(self, key):
+        try:
+            return os.path.getsize(self._path(key))
+        except OSError:
+            return None
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def touch(self, key):
+        try:
+            os.utime(self._path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def modified_at(self, key):
+        try:
+            return os.path.getmtime(self._path(key))
+        except OSError:
+            return None
+
+    def local_path(self, key):
+        return self._path(key)
+
+    def public_url(self, key):
+        # Flask phục vụ /static/uploads/... trực tiếp
+        return f"{self.url_prefix}/{key}"
+
+
+class MemoryBlobStorage(BlobStorage):
+    """In-process storage; only useful within a single process (tests, scripts)."""
+
+    backend = 'memory'
+
+    def __init__(self, url_prefix: str = '/blobs'):
+        self.blobs = {}
+        self.modified = {}
+        self.url_prefix = url_prefix.rstrip('/')
+
+    def put_stream(self, key, stream, content_type=None):
+        self.blobs[key] = stream.read()
+        self.modified[key] = time.time()
+
+    def open(self, key):
+        if key not in self.blobs:
+            raise FileNotFoundError(f"Blob not found: {key}")
+        return io.BytesIO(self.blobs[key])
+
+    def exists(self, key):
+        return key in self.blobs
+
+    def size(self, key):
+        data = self.blobs.get(key)
+        return len(data) if data is not None else None
+
+    def delete(self, key):
+        self.modified.pop(key, None)
+        return self.blobs.pop(key, None) is not None
+
+    def touch(self, key):
+        if key not in self.blobs:
+            return False
+        self.modified[key] = time.time()
+        return True
+
+    def modified_at(self, key):
+        return self.modified.get(key)
+
+    def public_url(self, key):
+        return f"{self.url_prefix}/{key}"
+
+
+class S3BlobStorage(BlobStorage):
+    backend = 's3'
+
+    def __init__(self, bucket: str, prefix: str = '', endpoint_url: Optional[str] = None,
+                 region: Optional[str] = None, access_key_id: Optional[str] = None,
+                 secret_access_key: Optional[str] = None, public_base_url: Optional[str] = None):
+        if not HAS_BOTO3:
+            raise RuntimeError("BLOB_STORAGE_BACKEND=s3 requires the boto3 package")
+        if not bucket:
+            raise ValueError("S3_BUCKET is not configured")
+        self.bucket = bucket
+        self.prefix = prefix.strip('/') + '/' if prefix.strip('/') else ''
+        self.client = boto3.client(
+            's3',
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key
+        )
+        if public_base_url:
+            self.public_base_url = public_base_url.rstrip('/')
+        elif endpoint_url:
+            self.public_base_url = f"{endpoint_url.rstrip('/')}/{bucket}"
+        else:
+            self.public_base_url = f"https://{bucket}.s3.{region or 'us-east-1'}.amazonaws.com"
+
+    def _key(self, key: str) -> str:
+        return self.prefix + key
+
+    def put_file(self, key, path, content_type=None):
+        # upload_file tự chia multipart với file lớn
+        extra = {'ContentType': content_type} if content_type else None
+        self.client.upload_file(path, self.bucket, self._key(key), ExtraArgs=extra)
+        os.unlink(path)
+
+    def put_stream(self, key, stream, content_type=None):
+        extra = {'ContentType': content_type} if content_type else None
+        self.client.upload_fileobj(stream, self.bucket, self._key(key), ExtraArgs=extra)
+
+    def open(self, key):
+        try:
+            # StreamingBody: đọc dần theo chunk, không tải cả object vào RAM
+            return self.client.get_object(Bucket=self.bucket, Key=self._key(key))['Body']
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+                raise FileNotFoundError(f"Blob not found: {key}")
+            raise
+
+    def _head(self, key):
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404', 'NotFound'):
+                return None
+            raise
+
+    def exists(self, key):
+        return self._head(key) is not None
+
+    def size(self, key):
+        head = self._head(key)
+        return head['ContentLength'] if head else None
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+        return True
+
+    def touch(self, key):
+        head = self._head(key)
+        if head is None:
+            return False
+        # S3 không có "touch": copy object lên chính nó để cập nhật LastModified
+        extra = {'ContentType': head['ContentType']} if head.get('ContentType') else {}
+        self.client.copy_object(Bucket=self.bucket, Key=self._key(key), MetadataDirective='REPLACE',
+                                CopySource={'Bucket': self.bucket, 'Key': self._key(key)},
+                                Metadata=head.get('Metadata') or {}, **extra)
+        return True
+
+    def modified_at(self, key):
+        head = self._head(key)
+        return head['LastModified'].timestamp() if head else None
+
+    def presigned_url(self, key, expires_in=300, download_name=None):
+        params = {'Bucket': self.bucket, 'Key': self._key(key)}
+        if download_name:
+            params['ResponseContentDisposition'] = _content_disposition(download_name)
+        return self.client.generate_presigned_url('get_object', Params=params, ExpiresIn=expires_in)
+
+    def public_url(self, key):
+        return f"{self.public_base_url}/{self.prefix}{key}"
+
+
+def create_blob_storage(config) -> BlobStorage:
+    """Build the backend selected by config (a Flask config or any mapping)."""
+    backend = (config.get('BLOB_STORAGE_BACKEND') or 'local').lower()
+    if backend == 'local':
+        return LocalBlobStorage(config.get('BLOB_LOCAL_ROOT') or DEFAULT_LOCAL_ROOT)
+    if backend == 'memory':
+        return MemoryBlobStorage()
+    if backend == 's3':
+        return S3BlobStorage(
+            bucket=config.get('S3_BUCKET'),
+            prefix=config.get('S3_PREFIX') or '',
+            endpoint_url=config.get('S3_ENDPOINT_URL'),
+            region=config.get('S3_REGION'),
+            access_key_id=config.get('S3_ACCESS_KEY_ID'),
+            secret_access_key=config.get('S3_SECRET_ACCESS_KEY'),
+            public_base_url=config.get('S3_PUBLIC_BASE_URL')
+        )
+    raise ValueError(f"Unknown BLOB_STORAGE_BACKEND '{backend}'")
+
+
+def get_blob_storage() -> BlobStorage:
+    """Storage of the current app, created once per app."""
+    from flask import current_app
+
+    storage = current_app.extensions.get('blob_storage')
+    if storage is None:
+        storage = create_blob_storage(current_app.config)
+        current_app.extensions['blob_storage'] = storage
+    return storage
@@ -0,0 +1,364 @@
+"""
+Resumable chunked uploads for CV files
+Protocol (routes in cv_routes):
+    POST   /api/uploads                 -> create a session for file_name + file_size
+    PUT    /api/uploads/<id>?offset=N   -> write one chunk (raw body) at byte offset N
+    GET    /api/uploads/<id>            -> bytes received so far (resume point)
+    POST   /api/uploads/<id>/complete   -> hash, store and process like a normal upload
+    DELETE /api/uploads/<id>            -> abort
+Completing claims the session first (open -> completing, committed), so concurrent
+/complete calls cannot both store the file; the partial file is only removed once the
+CV row is committed, and a failed completion reopens the session for a retry.
+Expired sessions and their partial files are purged by gc_uploads.py (--area sessions).
+Each chunk is a short request, so a slow client never holds a web worker for the whole
+transfer, and after a dropped connection only the bytes after received_bytes are resent.
+The declared size is checked against CV_MAX_UPLOAD_BYTES before any byte is accepted.
+"""
+
+import os
+import time
+import uuid
+import hashlib
+import logging
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+
+from app.extensions import db
+from app.models.uploadsession import UploadSession
+from app.utils.upload_storage import store_file, StoredUpload, UploadTooLargeError, UPLOAD_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+STATUS_OPEN = 'open'
+STATUS_COMPLETING = 'completing'
+STATUS_COMPLETED = 'completed'
+STATUS_ABORTED = 'aborted'
+
+DEFAULT_CHUNK_MAX_BYTES = 8 * 1024 * 1024  # 8MB
+DEFAULT_SESSION_TTL_HOURS = 24
+SESSION_SUBDIR = 'sessions'
+MAX_CACHED_HASHERS = 256
+# Claim "completing" của một process đã chết được coi là hết hạn sau thời gian này
+COMPLETING_TIMEOUT_SECONDS = 600
+
+
+class UploadOffsetError(ValueError):
+    """The chunk does not continue the received data; the client should resume from expected_offset."""
+
+    def __init__(self, expected_offset: int):
+        super().__init__(f"Expected offset {expected_offset}")
+        self.expected_offset = expected_offset
+
+
+class UploadSessionClosedError(ValueError):
+    """The session was completed, aborted or has expired."""
+
+
+class UploadSessionBusyError(ValueError):
+    """Another request is completing the session right now."""
+
+
+class _HashState:
+    def __init__(self):
+        self.offset = 0
+        self.sha256 = hashlib.sha256()
+
+
+# SHA-256 tính dần theo từng chunk, giữ trong process. Nếu chunk đến worker khác
+# (hoặc process restart) thì hash được tính lại từ file khi finalize.
+_hash_states = OrderedDict()
+_hash_lock = threading.Lock()
+
+
+def _pop_hash_state(session_id: str) -> Optional[_HashState]:
+    with _hash_lock:
+        return _hash_states.pop(session_id, None)
+
+
+def _put_hash_state(session_id: str, state: _HashState) -> None:
+    with _hash_lock:
+        _hash_states[session_id] = state
+        while len(_hash_states) > MAX_CACHED_HASHERS:
+            _hash_states.popitem(last=False)
+
+
+def session_dir(storage, configured_dir: Optional[str] = None) -> str:
+    """Directory holding partial uploads (must be shared by all web nodes)."""
+    base = configured_dir or storage.staging_dir() or os.path.join(tempfile.gettempdir(), 'cvision_uploads')
+    path = os.path.join(base, SESSION_SUBDIR)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def partial_path(session: UploadSession, directory: str) -> str:
+    return os.path.join(directory, f"{session.id}.part")
+
+
+def create_session(user_id: int, file_name: str, file_type: str, total_size: int, directory: str,
+                   max_bytes: Optional[int] = None, ttl_hours: int = DEFAULT_SESSION_TTL_HOURS) -> UploadSession:
+    """
+    Start a chunked upload. Adds the session to the db session; the caller commits.
+
+    Raises:
+        UploadTooLargeError: total_size exceeds max_bytes
+        ValueError: total_size is not positive
+    """
+    if total_size <= 0:
+        raise ValueError("file_size must be a positive number of bytes")
+    if max_bytes is not None and total_size > max_bytes:
+        raise UploadTooLargeError(f"Upload of {total_size} bytes exceeds {max_bytes} bytes")
+
+    session = UploadSession(
+        id=uuid.uuid4().hex,
+        user_id=user_id,
+        file_name=file_name,
+        file_type=file_type,
+        total_size=total_size,
+        received_bytes=0,
+        status=STATUS_OPEN,
+        expires_at=datetime.utcnow() + timedelta(hours=ttl_hours)
+    )
+    # File rỗng tạo sẵn để mọi chunk đều ghi bằng 'r+b' tại offset của nó
+    open(partial_path(session, directory), 'wb').close()
+    db.session.add(session)
+    return session
+
+
+def _check_open(session: UploadSession) -> None:
+    if session.status != STATUS_OPEN:
+        raise UploadSessionClosedError(f"Upload session is {session.status}")
+    if session.expires_at and session.expires_at < datetime.utcnow():
+        raise UploadSessionClosedError("Upload session has expired")
+
+
+def write_chunk(session: UploadSession, offset: int, stream, length: Optional[int], directory: str,
+                chunk_max_bytes: int = DEFAULT_CHUNK_MAX_BYTES) -> int:
+    """
+    Write one chunk at offset and advance received_bytes. Commits.
+    Re-sending bytes that were already received is allowed (retry after a lost response).
+
+    Args:
+        session: Open upload session
+        offset: Byte offset of the chunk in the file
+        stream: Request body stream
+        length: Content-Length of the chunk, None if unknown
+        directory: Directory from session_dir()
+
+    Returns:
+        received_bytes after the write
+
+    Raises:
+        UploadOffsetError: offset is past the received data (a chunk is missing)
+        UploadTooLargeError: chunk larger than chunk_max_bytes or past the declared size
+        UploadSessionClosedError: session is not open
+    """
+    _check_open(session)
+    received = session.received_bytes
+    if offset < 0 or offset > received:
+        raise UploadOffsetError(received)
+    if length is not None and length > chunk_max_bytes:
+        raise UploadTooLargeError(f"Chunk of {length} bytes exceeds {chunk_max_bytes} bytes")
+    if length is not None and offset + length > session.total_size:
+        raise UploadTooLargeError(f"Chunk ends past the declared size of {session.total_size} bytes")
+
+    state = _pop_hash_state(session.id)
+    if state is None and received == 0:
+        state = _HashState()
+
+    position = offset
+    limit = min(offset + (length if length is not None else chunk_max_bytes), session.total_size)
+    with open(partial_path(session, directory), 'r+b') as output:
+        output.seek(offset)
+        while True:
+            data = stream.read(min(UPLOAD_CHUNK_SIZE, limit - position + 1))
+            if not data:
+                break
+            if position + len(data) > limit:
+                # Client gửi nhiều hơn Content-Length / giới hạn chunk / kích thước khai báo
+                raise UploadTooLargeError("Chunk exceeds the allowed size")
+            output.write(data)
+            if state is not None:
+                if state.offset < position:
+                    state = None  # Thiếu đoạn giữa (chunk đã đi qua worker khác) - tính lại khi finalize
+                elif state.offset < position + len(data):
+                    state.sha256.update(data[state.offset - position:])
+                    state.offset = position + len(data)
+            position += len(data)
+
+    new_received = max(received, position)
+    if new_received > received:
+        # Chỉ tăng, không bao giờ lùi: hai request trùng nhau không làm mất tiến độ
+        UploadSession.query.filter(
+            UploadSession.id == session.id,
+            UploadSession.received_bytes < new_received
+        ).update({UploadSession.received_bytes: new_received, UploadSession.updated_at: datetime.utcnow()},
+                 synchronize_session=False)
+        db.session.commit()
+        db.session.refresh(session)
+    if state is not None:
+        _put_hash_state(session.id, state)
+    return session.received_bytes
+
+
+def claim(session: UploadSession) -> None:
+    """
+    Mark a fully received session as completing with a conditional UPDATE and commit,
+    so only one request finalizes it. A claim older than COMPLETING_TIMEOUT_SECONDS
+    (its process died) can be taken over.
+
+    Raises:
+        UploadOffsetError: bytes are still missing
+        UploadSessionBusyError: another request holds the claim
+        UploadSessionClosedError: session is completed, aborted or expired
+    """
+    if session.status != STATUS_COMPLETING:
+        _check_open(session)
+    if session.received_bytes != session.total_size:
+        raise UploadOffsetError(session.received_bytes)
+
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=COMPLETING_TIMEOUT_SECONDS)
+    claimed = UploadSession.query.filter(
+        UploadSession.id == session.id,
+        db.or_(
+            UploadSession.status == STATUS_OPEN,
+            (UploadSession.status == STATUS_COMPLETING) & (UploadSession.updated_at < stale)
+        )
+    ).update({UploadSession.status: STATUS_COMPLETING, UploadSession.updated_at: now}, synchronize_session=False)
+    db.session.commit()
+    db.session.refresh(session)
+    if not claimed:
+        if session.status == STATUS_COMPLETING:
+            raise UploadSessionBusyError("Upload session is already being completed")
+        raise UploadSessionClosedError(f"Upload session is {session.status}")
+
+
+def release(session_id: str) -> None:
+    """Reopen a session whose completion failed (after the caller rolled back). Commits."""
+    UploadSession.query.filter(
+        UploadSession.id == session_id,
+        UploadSession.status == STATUS_COMPLETING
+    ).update({UploadSession.status: STATUS_OPEN, UploadSession.updated_at: datetime.utcnow()},
+             synchronize_session=False)
+    db.session.commit()
+
+
+def _link_or_copy(path: str, directory: str) -> str:
+    """Second name for the partial file (hard link, else a copy) that store_file may consume."""
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.finalizing')
+    os.close(fd)
+    os.unlink(temp_path)
+    try:
+        os.link(path, temp_path)
+    except OSError:
+        shutil.copyfile(path, temp_path)
+    return temp_path
+
+
+def finalize(session: UploadSession, storage, directory: str) -> StoredUpload:
+    """
+    Hash a claimed session's file and put it into blob storage. The partial file is kept
+    until discard_partial, so a failed completion can be retried.
+    Marks the session completed; the caller links cv_id, commits, then calls discard_partial
+    (or rolls back and calls release on failure).
+
+    Raises:
+        UploadSessionClosedError: session was not claimed
+    """
+    if session.status != STATUS_COMPLETING:
+        raise UploadSessionClosedError(f"Upload session is {session.status}")
+
+    path = partial_path(session, directory)
+    state = _pop_hash_state(session.id)
+    if state is not None and state.offset == session.total_size:
+        content_hash = state.sha256.hexdigest()
+    else:
+        sha256 = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b''):
+                sha256.update(chunk)
+        content_hash = sha256.hexdigest()
+        logger.info(f"Upload session {session.id}: hash recomputed from the assembled file")
+
+    stored = store_file(_link_or_copy(path, directory), storage, session.file_type, content_hash, session.total_size)
+    session.status = STATUS_COMPLETED
+    return stored
+
+
+def discard_partial(session: UploadSession, directory: str) -> None:
+    """Remove the partial file of a completed session."""
+    path = partial_path(session, directory)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        # gc_uploads.py dọn sau
+        logger.warning(f"Could not remove {path}: {str(e)}")
+
+
+def abort(session: UploadSession, directory: str) -> None:
+    """Discard a session's partial file and mark it aborted. Does not commit."""
+    _pop_hash_state(session.id)
+    path = partial_path(session, directory)
+    if os.path.exists(path):
+        os.remove(path)
+    session.status = STATUS_ABORTED
+
+
+def purge_expired(directory: str, grace_seconds: int, dry_run: bool = False) -> tuple:
+    """
+    Delete expired open/aborted sessions (and stale completing claims) and every partial
+    file in directory that no open or completing session owns and that is older than
+    grace_seconds. Commits.
+
+    Returns:
+        (sessions deleted, files deleted, bytes reclaimed)
+    """
+    now = datetime.utcnow()
+    expired = UploadSession.query.filter(
+        UploadSession.expires_at < now,
+        UploadSession.status.in_([STATUS_OPEN, STATUS_ABORTED, STATUS_COMPLETING]),
+        UploadSession.updated_at < now - timedelta(seconds=COMPLETING_TIMEOUT_SECONDS)
+    )
+    if dry_run:
+        sessions = expired.count()
+    else:
+        sessions = expired.delete(synchronize_session=False)
+        db.session.commit()
+
+    cutoff = time.time() - grace_seconds
+    files = 0
+    reclaimed = 0
+    try:
+        entries = [entry for entry in os.scandir(directory)
+                   if entry.is_file() and entry.name.endswith(('.part', '.finalizing'))]
+    except FileNotFoundError:
+        entries = []
+    candidates = [entry for entry in entries if entry.stat().st_mtime < cutoff]
+    for start in range(0, len(candidates), 500):
+        batch = candidates[start:start + 500]
+        ids = [entry.name.split('.')[0] for entry in batch]
+        live = {session_id for (session_id,) in db.session.query(UploadSession.id).filter(
+            UploadSession.id.in_(ids),
+            UploadSession.status.in_([STATUS_OPEN, STATUS_COMPLETING])
+        )}
+        for entry in batch:
+            if entry.name.endswith('.part') and entry.name.split('.')[0] in live:
+                continue
+            size = entry.stat().st_size
+            if dry_run:
+                logger.info(f"Would delete {entry.path} ({size} bytes)")
+            else:
+                try:
+                    os.remove(entry.path)
+                except OSError as e:
+                    logger.warning(f"Could not delete {entry.path}: {str(e)}")
+                    continue
+            files += 1
+            reclaimed += size
+    return sessions, files, reclaimed
@@ -4,7 +4,7 @@ Supports multilingual CVs by translating non-English text to English
 """
 
 import logging
-from typing import Optional, Tuple, Dict, List
+from typing import Optional, Tuple, Dict, List, Iterable, Iterator
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +16,20 @@ except ImportError:
     HAS_TRANSLATOR = False
     logger.warning("Translator not available, multilingual support disabled")
 
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+try:
+    from scipy import sparse
+    HAS_SCIPY = True
+except ImportError:
+    HAS_SCIPY = False
+
+from app.utils.keyword_matcher import get_keyword_matcher, ROOT_STATE
+
 CATEGORY_KEYWORDS = {
     'Software Engineer': [
         'software engineer', 'software development', 'programming', 'coding',
@@ -78,6 +92,58 @@ CATEGORY_KEYWORDS = {
 }
 
 
+# Streaming classification: dừng sớm khi xếp hạng ổn định hoặc đã đọc đủ ký tự
+STREAM_CHAR_BUDGET = 20000
+STREAM_MIN_CHARS = 2000
+STREAM_STABLE_CHUNKS = 3
+STREAM_BATCH_CHARS = 1000  # Gộp các chunk nhỏ (đoạn DOCX) trước khi dịch + chấm điểm
+
+
+def _prepare_text(text: str, auto_translate: bool) -> str:
+    """Detect language and translate to English if needed; returns the original text on failure."""
+    if not (HAS_TRANSLATOR and auto_translate):
+        return text
+    try:
+        prepared_text, detected_lang, was_translated = prepare_text_for_classification(text, auto_translate=True)
+        if was_translated:
+            logger.info(f"CV text was translated from {detected_lang} to English for classification")
+            return prepared_text
+        elif detected_lang and detected_lang != 'en':
+            logger.info(f"CV text is in {detected_lang}, but translation not performed")
+    except Exception as e:
+        logger.warning(f"Translation preparation failed: {str(e)}, using original text")
+    return text
+
+
+def _score_categories(matched: Dict[str, set], keywords_map: Dict[str, List[str]]) -> Dict[str, float]:
+    """Score = percentage of a category's keywords matched; categories without matches are omitted."""
+    category_scores = {}
+    for category, keywords in keywords_map.items():
+        matches = len(matched.get(category, ()))
+        total_keywords = len(keywords)
+        if total_keywords > 0 and matches > 0:
+            category_scores[category] = min(matches / total_keywords, 1.0)  # Cap at 1.0
+    return category_scores
+
+
+def _pick_category(category_scores: Dict[str, float]) -> Tuple[Optional[str], float]:
+    if not category_scores:
+        logger.info("No category matches found in CV text")
+        return None, 0.0
+    
+    # Find category with highest score
+    category_name, confidence = max(category_scores.items(), key=lambda x: x[1])
+    
+    logger.info(f"Classified CV as '{category_name}' with confidence {confidence:.2%}")
+    
+    # Only return if confidence is above threshold (at least 10% match)
+    if confidence >= 0.1:
+        return category_name, confidence
+    else:
+        logger.info(f"Confidence too low ({confidence:.2%}), returning None")
+        return None, 0.0
+
+
 def classify_cv_by_keywords(text: str, categories: Optional[Dict[str, List[str]]] = None, auto_translate: bool = True) -> Tuple[Optional[str], float]:
     """
     Classify CV text using keyword matching
@@ -97,57 +163,253 @@ def classify_cv_by_keywords(text: str, categories: Optional[Dict[str, List[str]]
         return None, 0.0
     
     # Prepare text for classification (detect language and translate if needed)
-    original_text = text
-    if HAS_TRANSLATOR and auto_translate:
-        try:
-            prepared_text, detected_lang, was_translated = prepare_text_for_classification(text, auto_translate=True)
-            if was_translated:
-                logger.info(f"CV text was translated from {detected_lang} to English for classification")
-                text = prepared_text
-            elif detected_lang and detected_lang != 'en':
-                logger.info(f"CV text is in {detected_lang}, but translation not performed")
-        except Exception as e:
-            logger.warning(f"Translation preparation failed: {str(e)}, using original text")
-            text = original_text
-    
-    text_lower = text.lower()
+    text_lower = _prepare_text(text, auto_translate).lower()
     
     # Use provided categories or default
     keywords_map = categories if categories else CATEGORY_KEYWORDS
     
-    # Count matches for each category
+    # Một lượt quét qua automaton thay vì một lần tìm chuỗi con cho mỗi keyword
+    matched = get_keyword_matcher(keywords_map).match(text_lower)
+    
+    return _pick_category(_score_categories(matched, keywords_map))
+
+
+def _category_count_matrix(matcher):
+    """
+    term x category matrix: entry = number of keywords of the category that are this term.
+    Built once per keyword map (cached on the matcher).
+    """
+    matrix = getattr(matcher, '_category_count_matrix', None)
+    if matrix is None:
+        matrix = np.zeros((len(matcher.terms), len(matcher.categories)), dtype=np.int32)
+        for term, position in matcher.term_categories:
+            matrix[term, position] += 1
+        matcher._category_count_matrix = matrix
+    return matrix
+
+
+def classify_many(texts: Iterable[str], categories: Optional[Dict[str, List[str]]] = None,
+                  auto_translate: bool = True) -> List[Tuple[Optional[str], float]]:
+    """
+    Classify many CV texts at once (bulk re-classification, ranking all applicants of a job).
+    Each text is matched once by the keyword automaton into a sparse document-term matrix,
+    which is multiplied by a term-category count matrix; scores and the winning category are
+    then computed for all documents with NumPy. Results are identical to calling
+    classify_cv_by_keywords on each text.
+    
+    Args:
+        texts: CV texts (None/empty entries give (None, 0.0))
+        categories: Optional custom category keywords dict
+        auto_translate: Whether to automatically translate non-English text (default: True)
+        
+    Returns:
+        List of (category_name, confidence_score), in the order of texts
+    """
+    texts = list(texts)
+    if not HAS_NUMPY:
+        return [classify_cv_by_keywords(text, categories, auto_translate) for text in texts]
+    
+    keywords_map = categories if categories else CATEGORY_KEYWORDS
+    matcher = get_keyword_matcher(keywords_map)
+    
+    # CSR: các term khớp của văn bản i nằm ở indices[indptr[i]:indptr[i + 1]]
+    indices = []
+    indptr = [0]
+    for text in texts:
+        if text and isinstance(text, str):
+            indices.extend(matcher.match_terms(_prepare_text(text, auto_translate)))
+        indptr.append(len(indices))
+    
+    counts_by_term = _category_count_matrix(matcher)
+    if HAS_SCIPY:
+        document_terms = sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.int32), np.asarray(indices, dtype=np.int32), np.asarray(indptr)),
+            shape=(len(texts), len(matcher.terms))
+        )
+        counts = np.asarray(document_terms @ counts_by_term)
+    else:
+        document_terms = np.zeros((len(texts), len(matcher.terms)), dtype=np.int32)
+        rows = np.repeat(np.arange(len(texts)), np.diff(indptr))
+        document_terms[rows, np.asarray(indices, dtype=np.int64)] = 1
+        counts = document_terms @ counts_by_term
+    
+    # Cùng công thức với _score_categories: số keyword khớp / tổng số keyword, tối đa 1.0
+    totals = np.array([len(keywords_map[category]) for category in matcher.categories], dtype=np.int64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scores = np.where(totals > 0, counts / np.maximum(totals, 1), 0.0)
+    scores = np.minimum(scores, 1.0)
+    
+    # argmax lấy category đầu tiên khi bằng điểm, giống max() trên dict trong _pick_category
+    best = scores.argmax(axis=1)
+    confidences = scores[np.arange(len(texts)), best]
+    
+    results = []
+    for position, confidence in zip(best.tolist(), confidences.tolist()):
+        if confidence >= 0.1:
+            results.append((matcher.categories[position], confidence))
+        else:
+            results.append((None, 0.0))
+    
+    logger.info(f"Batch classified {len(texts)} CVs, {sum(1 for category, _ in results if category)} with a category")
+    return results
+
+
+def _coalesce_chunks(chunks: Iterable[str], min_chars: int) -> Iterator[str]:
+    """Join consecutive small chunks until each batch holds at least min_chars characters."""
+    buffer = []
+    buffered_chars = 0
+    for chunk in chunks:
+        if not chunk or not isinstance(chunk, str):
+            continue
+        buffer.append(chunk)
+        buffered_chars += len(chunk)
+        if buffered_chars >= min_chars:
+            yield "\n".join(buffer)
+            buffer = []
+            buffered_chars = 0
+    if buffer:
+        yield "\n".join(buffer)
+
+
+def classify_cv_streaming(chunks: Iterable[str], categories: Optional[Dict[str, List[str]]] = None,
+                          auto_translate: bool = True, char_budget: int = STREAM_CHAR_BUDGET,
+                          min_chars: int = STREAM_MIN_CHARS,
+                          stable_chunks: int = STREAM_STABLE_CHUNKS) -> Tuple[Optional[str], float]:
+    """
+    Classify CV text from an iterable of chunks (e.g. text_extractor.iter_text_chunks),
+    stopping early once the leading category has been stable for `stable_chunks` batches
+    (after at least `min_chars`) or `char_budget` characters have been consumed.
+    Small chunks are joined into batches of about STREAM_BATCH_CHARS before scoring.
+    classify_cv_text (and so process_cv) uses it for its keyword fallback.
+    
+    Args:
+        chunks: Iterable of text chunks in document order
+        categories: Optional custom category keywords dict
+        auto_translate: Whether to translate non-English chunks (default: True)
+        char_budget: Maximum number of characters to consume
+        min_chars: Minimum characters to consume before an early exit is allowed
+        stable_chunks: Consecutive batches the leading category must hold to stop early
+        
+    Returns:
+        Tuple of (category_name, confidence_score), same semantics as classify_cv_by_keywords
+    """
+    keywords_map = categories if categories else CATEGORY_KEYWORDS
+    matcher = get_keyword_matcher(keywords_map)
+    
+    matched = matcher.new_matches()
     category_scores = {}
+    # Trạng thái automaton nối tiếp giữa các chunk: keyword nhiều từ vắt qua ranh giới chunk vẫn khớp
+    state = ROOT_STATE
+    consumed = 0
+    leader = None
+    leader_streak = 0
     
-    for category, keywords in keywords_map.items():
-        matches = 0
-        for keyword in keywords:
-            if keyword.lower() in text_lower:
-                matches += 1
+    for chunk in _coalesce_chunks(chunks, STREAM_BATCH_CHARS):
+        chunk = chunk[:char_budget - consumed]
+        consumed += len(chunk)
+        state = matcher.scan(_prepare_text(chunk, auto_translate), matched, state)
         
-        # Score = percentage of keywords matched (capped at reasonable level)
-        total_keywords = len(keywords)
-        if total_keywords > 0:
-            score = min(matches / total_keywords, 1.0)  # Cap at 1.0
-            if matches > 0:  # Only include categories with at least one match
-                category_scores[category] = score
+        category_scores = _score_categories(matched, keywords_map)
+        current_leader = max(category_scores.items(), key=lambda x: x[1])[0] if category_scores else None
+        if current_leader is not None and current_leader == leader:
+            leader_streak += 1
+        else:
+            leader = current_leader
+            leader_streak = 1 if current_leader is not None else 0
+        
+        if consumed >= char_budget:
+            logger.info(f"Streaming classification reached character budget ({char_budget} chars)")
+            break
+        if consumed >= min_chars and leader_streak >= stable_chunks:
+            logger.info(f"Streaming classification stable after {consumed} chars, stopping early")
+            break
     
-    if not category_scores:
-        logger.info("No category matches found in CV text")
+    if consumed == 0:
+        logger.warning("Empty or invalid text provided for classification")
         return None, 0.0
     
-    # Find category with highest score
-    best_category = max(category_scores.items(), key=lambda x: x[1])
-    category_name, confidence = best_category
+    return _pick_category(category_scores)
+
+
+def classify_cv_text(text: str, auto_translate: bool = True) -> Tuple[Optional[str], float, Optional[int]]:
+    """
+    Classify CV text with the active trained model (train_classifier.py), falling back
+    to keyword matching when no model is available or the model is not confident enough.
+    The keyword fallback streams the text through classify_cv_streaming, so long CVs stop
+    being translated and scanned once the category ranking is stable.
+    Needs an app context (the model and its MLModel row are resolved per app).
     
-    logger.info(f"Classified CV as '{category_name}' with confidence {confidence:.2%}")
+    Args:
+        text: CV text content (extracted text)
+        auto_translate: Whether the keyword fallback translates non-English text
+        
+    Returns:
+        Tuple of (category_name, confidence_score, mlmodel_id of the model that decided)
+    """
+    from flask import current_app
+    from app.utils.ml_classifier import get_active_model, get_keyword_model_id, DEFAULT_MIN_CONFIDENCE
     
-    # Only return if confidence is above threshold (at least 10% match)
-    if confidence >= 0.1:
-        return category_name, confidence
-    else:
-        logger.info(f"Confidence too low ({confidence:.2%}), returning None")
-        return None, 0.0
+    active = get_active_model()
+    if active is not None and text and isinstance(text, str):
+        try:
+            # Model được train trên text gốc (cả tiếng Việt), không cần dịch
+            category_name, confidence = active.model.predict(text)
+            min_confidence = current_app.config.get('ML_MIN_CONFIDENCE') or DEFAULT_MIN_CONFIDENCE
+            if category_name and confidence >= min_confidence:
+                logger.info(f"Model {active.version} classified CV as '{category_name}' with confidence {confidence:.2%}")
+                return category_name, confidence, active.mlmodel_id
+            logger.info(f"Model {active.version} not confident ({confidence:.2%}), using keyword matching")
+        except Exception as e:
+            logger.error(f"Model prediction failed, using keyword matching: {str(e)}")
+    
+    # Keyword fallback chỉ cần category: dừng dịch + quét khi ranking đã ổn định
+    category_name, confidence = classify_cv_streaming(
+        text.splitlines() if isinstance(text, str) else (), auto_translate=auto_translate
+    )
+    return category_name, confidence, get_keyword_model_id(CATEGORY_KEYWORDS)
+
 
+def classify_cv_texts(texts: Iterable[str], auto_translate: bool = True) -> List[Tuple[Optional[str], float, Optional[int]]]:
+    """
+    Batch version of classify_cv_text (bulk re-classification): the active model predicts
+    every text, and the texts it is not confident about go through classify_many together.
+    Needs an app context.
+    
+    Args:
+        texts: CV texts (None/empty entries fall back to keyword matching)
+        auto_translate: Whether the keyword fallback translates non-English text
+        
+    Returns:
+        List of (category_name, confidence_score, mlmodel_id), in the order of texts
+    """
+    from flask import current_app
+    from app.utils.ml_classifier import get_active_model, get_keyword_model_id, DEFAULT_MIN_CONFIDENCE
+    
+    texts = list(texts)
+    results = [None] * len(texts)
+    fallback = list(range(len(texts)))
+    
+    active = get_active_model()
+    if active is not None:
+        min_confidence = current_app.config.get('ML_MIN_CONFIDENCE') or DEFAULT_MIN_CONFIDENCE
+        fallback = []
+        for i, text in enumerate(texts):
+            if text and isinstance(text, str):
+                try:
+                    category_name, confidence = active.model.predict(text)
+                    if category_name and confidence >= min_confidence:
+                        results[i] = (category_name, confidence, active.mlmodel_id)
+                        continue
+                except Exception as e:
+                    logger.error(f"Model prediction failed, using keyword matching: {str(e)}")
+            fallback.append(i)
+    
+    if fallback:
+        keyword_model_id = get_keyword_model_id(CATEGORY_KEYWORDS)
+        keyword_results = classify_many([texts[i] for i in fallback], auto_translate=auto_translate)
+        for i, (category_name, confidence) in zip(fallback, keyword_results):
+            results[i] = (category_name, confidence, keyword_model_id)
+    return results
 
 
 def get_category_id_by_name(category_name: str, job_categories_model) -> Optional[int]:
@@ -0,0 +1,333 @@
+"""
+Asynchronous CV processing pipeline
+Uploads only save the file and enqueue a CVProcessingQueue row; cv_worker.py claims
+rows with a lease, runs extraction + classification and writes the results back,
+so web workers are never blocked on CPU-heavy parsing or OCR.
+"""
+
+import os
+import socket
+import logging
+from datetime import datetime, timedelta
+from typing import Optional, Dict
+
+from sqlalchemy import or_, and_
+
+from app.extensions import db
+from app.models import CV, JobCategory, ClassificationLog
+from app.models.cvprocessingqueue import CVProcessingQueue
+from app.utils.text_extractor import extract_text_from_file
+from app.utils.upload_storage import cv_blob_key
+from app.utils.blob_storage import get_blob_storage
+from app.utils.classifier import classify_cv_text, get_category_id_by_name
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = 'pending'
+STATUS_PROCESSING = 'processing'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+DEFAULT_LEASE_SECONDS = 300  # 5 phút - đủ cho OCR ảnh lớn
+DEFAULT_MAX_ATTEMPTS = 3
+RETRY_BACKOFF_SECONDS = 30
+CLAIM_CANDIDATES = 10
+
+IMAGE_FILE_TYPES = ['jpg', 'jpeg', 'png']
+
+
+def get_worker_id() -> str:
+    """Identify this worker process in lease records."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue_cv(cv: CV, user_id: Optional[int] = None) -> CVProcessingQueue:
+    """
+    Add a processing job for a CV to the current session (caller commits).
+
+    Args:
+        cv: CV row (may be pending flush)
+        user_id: User who uploaded the CV
+
+    Returns:
+        The new CVProcessingQueue row
+    """
+    queue_item = CVProcessingQueue(
+        cv=cv,
+        user_id=user_id,
+        status=STATUS_PENDING,
+        attempts=0,
+        available_at=datetime.utcnow()
+    )
+    db.session.add(queue_item)
+    return queue_item
+
+
+def reuse_prior_results(cv: CV) -> bool:
+    """
+    Copy extraction and classification results from an earlier CV with the same content hash.
+    Adds a ClassificationLog mirroring the earlier prediction. Does not commit.
+
+    Args:
+        cv: New CV row with content_hash set
+
+    Returns:
+        True if results were reused (no processing needed), False otherwise
+    """
+    if not cv.content_hash:
+        return False
+
+    # Chỉ dùng CV đã xử lý xong (có text); CV cùng nội dung đang chờ worker thì vẫn xử lý bình thường
+    source = CV.query.filter(
+        CV.content_hash == cv.content_hash,
+        CV.id != cv.id,
+        CV.text_store.has()
+    ).order_by(CV.id.desc()).first()
+    if source is None:
+        return False
+
+    cv.file_content = source.file_content
+    cv.text_encoding = source.text_encoding
+    cv.predicted_category_id = source.predicted_category_id
+
+    if source.predicted_category_id:
+        source_log = ClassificationLog.query.filter_by(
+            cv_id=source.id,
+            predicted_category_id=source.predicted_category_id
+        ).order_by(ClassificationLog.id.desc()).first()
+        if source_log is not None:
+            db.session.add(ClassificationLog(
+                cv=cv,
+                predicted_category_id=source_log.predicted_category_id,
+                confidence=source_log.confidence,
+                mlmodel_id=source_log.mlmodel_id,
+                user_id=cv.user_id
+            ))
+
+    logger.info(f"Reused extraction and classification of CV {source.id} for duplicate upload {cv.file_name}")
+    return True
+
+
+def process_cv(cv: CV, file_path: str) -> Dict:
+    """
+    Extract text from a stored CV file, classify it and write the results to the CV row.
+    Adds a ClassificationLog when a category was predicted. Does not commit.
+
+    Args:
+        cv: CV row to update
+        file_path: Absolute path to the uploaded file
+
+    Returns:
+        Dict with extracted character count, category name and confidence
+    """
+    file_type = (cv.file_type or os.path.splitext(file_path)[1].lstrip('.')).lower()
+    filename = cv.file_name
+
+    extracted_text = None
+    try:
+        if file_type in IMAGE_FILE_TYPES:
+            # Ảnh lớn được OCR theo tile trong image_extractor, không bỏ qua nữa
+            logger.info(f"Processing image {filename} with OCR (may take 10-30 seconds)...")
+        extracted_text = extract_text_from_file(file_path, file_type)
+        if file_type == 'txt':
+            # Encoding được phát hiện trong lần đọc file của extract_text_from_txt
+            cv.text_encoding = getattr(extracted_text, 'encoding', None)
+
+        if extracted_text:
+            logger.info(f"Successfully extracted text from {filename} ({len(extracted_text)} characters)")
+        else:
+            logger.warning(f"No text extracted from {filename}")
+    except Exception as e:
+        logger.error(f"Error extracting text from {filename}: {str(e)}")
+
+    predicted_category_id = None
+    category_name = None
+    confidence = None
+    mlmodel_id = None
+    if extracted_text:
+        try:
+            # Text phải extract đủ để lưu; chỉ bước keyword (classify_cv_streaming) dừng sớm
+            category_name, confidence_score, mlmodel_id = classify_cv_text(extracted_text)
+            if category_name:
+                predicted_category_id = get_category_id_by_name(category_name, JobCategory)
+                if predicted_category_id:
+                    confidence = confidence_score
+                    logger.info(f"Classified CV as '{category_name}' (ID: {predicted_category_id}) with confidence {confidence_score:.2%}")
+                else:
+                    logger.warning(f"Category '{category_name}' not found in database")
+        except Exception as e:
+            logger.error(f"Error classifying CV: {str(e)}")
+
+    cv.file_content = extracted_text
+    cv.predicted_category_id = predicted_category_id
+
+    if predicted_category_id and confidence is not None:
+        db.session.add(ClassificationLog(
+            cv=cv,
+            predicted_category_id=predicted_category_id,
+            confidence=confidence,
+            mlmodel_id=mlmodel_id,
+            user_id=cv.user_id
+        ))
+
+    return {
+        'characters': len(extracted_text) if extracted_text else 0,
+        'category': category_name if predicted_category_id else None,
+        'confidence': confidence
+    }
+
+
+def _claimable_filter(now: datetime):
+    return or_(
+        and_(
+            CVProcessingQueue.status == STATUS_PENDING,
+            or_(CVProcessingQueue.available_at.is_(None), CVProcessingQueue.available_at <= now)
+        ),
+        # Lease hết hạn nghĩa là worker trước đã chết giữa chừng
+        and_(
+            CVProcessingQueue.status == STATUS_PROCESSING,
+            CVProcessingQueue.lease_expires_at < now
+        )
+    )
+
+
+def _fail_exhausted(now: datetime, max_attempts: int) -> None:
+    """Mark jobs whose lease expired on their last allowed attempt as failed."""
+    failed = CVProcessingQueue.query.filter(
+        CVProcessingQueue.status == STATUS_PROCESSING,
+        CVProcessingQueue.lease_expires_at < now,
+        CVProcessingQueue.attempts >= max_attempts
+    ).update({
+        CVProcessingQueue.status: STATUS_FAILED,
+        CVProcessingQueue.last_error: 'Lease expired on final attempt',
+        CVProcessingQueue.lease_expires_at: None,
+        CVProcessingQueue.finished_at: now
+    }, synchronize_session=False)
+    if failed:
+        db.session.commit()
+        logger.warning(f"Marked {failed} queue items as failed after exhausting attempts")
+
+
+def claim_next(worker_id: str, lease_seconds: int = DEFAULT_LEASE_SECONDS,
+               max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> Optional[CVProcessingQueue]:
+    """
+    Claim the oldest claimable queue item with a lease.
+    Uses a conditional UPDATE on (id, attempts) so concurrent workers never claim the same row.
+
+    Args:
+        worker_id: Identifier of the claiming worker
+        lease_seconds: How long the claim is valid before another worker may take it over
+        max_attempts: Maximum number of attempts per item
+
+    Returns:
+        The claimed CVProcessingQueue row, or None if nothing is claimable
+    """
+    now = datetime.utcnow()
+    _fail_exhausted(now, max_attempts)
+
+    candidates = db.session.query(
+        CVProcessingQueue.id,
+        CVProcessingQueue.attempts
+    ).filter(
+        _claimable_filter(now),
+        CVProcessingQueue.attempts < max_attempts
+    ).order_by(CVProcessingQueue.id.asc()).limit(CLAIM_CANDIDATES).all()
+
+    for item_id, attempts in candidates:
+        claimed = CVProcessingQueue.query.filter(
+            CVProcessingQueue.id == item_id,
+            CVProcessingQueue.attempts == attempts,
+            _claimable_filter(now)
+        ).update({
+            CVProcessingQueue.status: STATUS_PROCESSING,
+            CVProcessingQueue.attempts: attempts + 1,
+            CVProcessingQueue.worker_id: worker_id,
+            CVProcessingQueue.lease_expires_at: now + timedelta(seconds=lease_seconds)
+        }, synchronize_session=False)
+        db.session.commit()
+        if claimed:
+            return db.session.get(CVProcessingQueue, item_id)
+
+    return None
+
+
+def _owned_filter(item: CVProcessingQueue, worker_id: str):
+    return and_(
+        CVProcessingQueue.id == item.id,
+        CVProcessingQueue.worker_id == worker_id,
+        CVProcessingQueue.attempts == item.attempts,
+        CVProcessingQueue.status == STATUS_PROCESSING
+    )
+
+
+def complete(item: CVProcessingQueue, worker_id: str) -> bool:
+    """Mark a claimed item as done in the current transaction. Returns False if the lease was lost."""
+    updated = CVProcessingQueue.query.filter(_owned_filter(item, worker_id)).update({
+        CVProcessingQueue.status: STATUS_DONE,
+        CVProcessingQueue.lease_expires_at: None,
+        CVProcessingQueue.last_error: None,
+        CVProcessingQueue.finished_at: datetime.utcnow()
+    }, synchronize_session=False)
+    return updated == 1
+
+
+def fail(item: CVProcessingQueue, worker_id: str, error: str,
+         max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> None:
+    """Release a claimed item after an error: back to pending with backoff, or failed if out of attempts."""
+    now = datetime.utcnow()
+    if item.attempts >= max_attempts:
+        values = {
+            CVProcessingQueue.status: STATUS_FAILED,
+            CVProcessingQueue.finished_at: now
+        }
+    else:
+        values = {
+            CVProcessingQueue.status: STATUS_PENDING,
+            CVProcessingQueue.available_at: now + timedelta(seconds=RETRY_BACKOFF_SECONDS * item.attempts)
+        }
+    values[CVProcessingQueue.lease_expires_at] = None
+    values[CVProcessingQueue.last_error] = error[:2000]
+    CVProcessingQueue.query.filter(_owned_filter(item, worker_id)).update(values, synchronize_session=False)
+    db.session.commit()
+
+
+def process_queue_item(item: CVProcessingQueue, worker_id: str, storage=None,
+                       max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> bool:
+    """
+    Run extraction + classification for a claimed queue item and commit the results.
+
+    Args:
+        storage: BlobStorage holding the CV files (defaults to the app's storage)
+
+    Returns:
+        True if the item completed, False if it failed or the lease was lost
+    """
+    try:
+        cv = db.session.get(CV, item.cv_id)
+        if cv is None:
+            raise LookupError(f"CV {item.cv_id} not found")
+
+        # Storage remote (S3): tải về file tạm trong lúc extract
+        storage = storage or get_blob_storage()
+        with storage.local_copy(cv_blob_key(cv)) as file_path:
+            result = process_cv(cv, file_path)
+
+        if not complete(item, worker_id):
+            # Worker khác đã lấy lại item sau khi lease hết hạn - bỏ kết quả của mình
+            db.session.rollback()
+            logger.warning(f"Lost lease on queue item {item.id} (CV {item.cv_id}), discarding result")
+            return False
+
+        db.session.commit()
+        logger.info(f"Processed CV {cv.id}: category={result['category']}, characters={result['characters']}")
+        return True
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error processing queue item {item.id} (CV {item.cv_id}): {str(e)}", exc_info=True)
+        fail(item, worker_id, str(e), max_attempts)
+        return False
+
+
+def get_processing_status(cv_id: int) -> Optional[CVProcessingQueue]:
+    """Return the most recent queue row for a CV, or None if it was never enqueued."""
+    return CVProcessingQueue.query.filter_by(cv_id=cv_id).order_by(CVProcessingQueue.id.desc()).first()
@@ -0,0 +1,160 @@
+"""
+Streaming DOCX text extraction
+Reads the WordprocessingML parts straight out of the zip with iterparse instead of
+building the python-docx object model: paragraphs and table rows come out in
+document order, merged table cells are emitted once, and headers, footers and
+text boxes are included.
+"""
+
+import re
+import zipfile
+import logging
+import xml.etree.ElementTree as ET
+from typing import Iterator, IO
+
+logger = logging.getLogger(__name__)
+
+# Transitional và Strict OOXML dùng namespace khác nhau cho cùng các tag
+_W_NAMESPACES = (
+    'http://schemas.openxmlformats.org/wordprocessingml/2006/main',
+    'http://purl.oclc.org/ooxml/wordprocessingml/main',
+)
+_MC_FALLBACK = '{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback'
+
+
+def _w_tags(name: str) -> frozenset:
+    return frozenset(f"{{{namespace}}}{name}" for namespace in _W_NAMESPACES)
+
+
+_P = _w_tags('p')
+_R = _w_tags('r')
+_T = _w_tags('t')
+_TAB = _w_tags('tab')
+_BREAK = _w_tags('br') | _w_tags('cr')
+_TBL = _w_tags('tbl')
+_TR = _w_tags('tr')
+_TC = _w_tags('tc')
+
+DOCUMENT_PART = 'word/document.xml'
+_HEADER_PART = re.compile(r'^word/header(\d*)\.xml$')
+_FOOTER_PART = re.compile(r'^word/footer(\d*)\.xml$')
+
+
+def iter_part_blocks(xml_file: IO[bytes]) -> Iterator[str]:
+    """
+    Stream text blocks out of one WordprocessingML part (document, header or footer).
+    Each block is a non-empty paragraph, or a table row rendered as "cell | cell".
+
+    Args:
+        xml_file: Binary file object of the part's XML
+
+    Yields:
+        Text blocks in document order
+    """
+    paragraphs = []  # Stack: text box nằm trong một paragraph khác
+    cells = []  # Stack các cell đang mở (bảng lồng nhau), mỗi cell là list các dòng
+    rows = []
+    run_depth = 0
+    fallback_depth = 0
+
+    for event, elem in ET.iterparse(xml_file, events=('start', 'end')):
+        tag = elem.tag
+
+        if event == 'start':
+            if tag == _MC_FALLBACK:
+                # mc:Fallback lặp lại nội dung của mc:Choice (VML textbox) - bỏ qua để không bị trùng
+                fallback_depth += 1
+            elif fallback_depth:
+                continue
+            elif tag in _P:
+                paragraphs.append([])
+            elif tag in _R:
+                run_depth += 1
+            elif tag in _TR:
+                rows.append([])
+            elif tag in _TC:
+                cells.append([])
+            continue
+
+        if tag == _MC_FALLBACK:
+            fallback_depth -= 1
+            elem.clear()
+            continue
+        if fallback_depth:
+            continue
+
+        if tag in _T:
+            if paragraphs:
+                paragraphs[-1].append(elem.text or '')
+        elif tag in _R:
+            run_depth -= 1
+        elif tag in _TAB:
+            # w:tab trong w:pPr/w:tabs là định nghĩa tab stop, không phải ký tự
+            if run_depth and paragraphs:
+                paragraphs[-1].append('\t')
+        elif tag in _BREAK:
+            if run_depth and paragraphs:
+                paragraphs[-1].append('\n')
+        elif tag in _P:
+            text = ''.join(paragraphs.pop())
+            if cells:
+                cells[-1].append(text)
+            elif text.strip():
+                yield text
+            if not paragraphs:
+                elem.clear()
+        elif tag in _TC:
+            cell_text = '\n'.join(cells.pop()).strip()
+            # Cell tiếp nối của vMerge rỗng nên cell merge chỉ xuất hiện một lần
+            if cell_text and rows:
+                rows[-1].append(cell_text)
+        elif tag in _TR:
+            row = rows.pop()
+            if row:
+                row_text = ' | '.join(row)
+                if cells:
+                    cells[-1].append(row_text)
+                else:
+                    yield row_text
+        elif tag in _TBL and not cells:
+            elem.clear()
+
+
+def _part_number(name: str, pattern) -> int:
+    number = pattern.match(name).group(1)
+    return int(number) if number else 0
+
+
+def iter_docx_blocks(file_path: str) -> Iterator[str]:
+    """
+    Stream text blocks from a DOCX file: headers, then the document body, then footers.
+    Identical header/footer parts (first-page / even-page variants) are emitted once.
+
+    Args:
+        file_path: Path to DOCX file
+
+    Yields:
+        Text blocks in reading order
+
+    Raises:
+        zipfile.BadZipFile, KeyError (no word/document.xml) or ET.ParseError for invalid files
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        names = archive.namelist()
+        if DOCUMENT_PART not in names:
+            raise KeyError(f"{DOCUMENT_PART} not found in {file_path}")
+
+        headers = sorted((n for n in names if _HEADER_PART.match(n)), key=lambda n: _part_number(n, _HEADER_PART))
+        footers = sorted((n for n in names if _FOOTER_PART.match(n)), key=lambda n: _part_number(n, _FOOTER_PART))
+
+        seen_parts = set()
+        for part in headers + [DOCUMENT_PART] + footers:
+            with archive.open(part) as xml_file:
+                if part == DOCUMENT_PART:
+                    yield from iter_part_blocks(xml_file)
+                    continue
+                blocks = list(iter_part_blocks(xml_file))
+            key = tuple(blocks)
+            if blocks and key not in seen_parts:
+                seen_parts.add(key)
+                yield from blocks
@@ -0,0 +1,174 @@
+"""
+Content-addressed cache for extracted CV text
+Keys are the SHA-256 of the file bytes plus the extractor version, so a re-upload
+of the same CV (or a recruiter view over a row without file_content) costs a hash
+lookup instead of a full PDF/DOCX parse or OCR run.
+"""
+
+import os
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Flask_CVProject/instance/extraction_cache (có thể override qua environment variable)
+_PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_CACHE_DIR = os.environ.get('EXTRACTION_CACHE_DIR') or os.path.join(_PROJECT_DIR, 'instance', 'extraction_cache')
+DEFAULT_CACHE_MAX_BYTES = int(os.environ.get('EXTRACTION_CACHE_MAX_BYTES') or 256 * 1024 * 1024)  # 256MB
+
+HASH_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+
+def hash_file(file_path: str) -> Optional[str]:
+    """
+    Compute SHA-256 of a file, reading it in chunks.
+
+    Args:
+        file_path: Path to file
+
+    Returns:
+        Hex digest string, or None if the file cannot be read
+    """
+    try:
+        sha256 = hashlib.sha256()
+        with open(file_path, 'rb') as file:
+            for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+    except OSError as e:
+        logger.warning(f"Could not hash file {file_path}: {str(e)}")
+        return None
+
+
+class ExtractionCache:
+    """
+    On-disk extraction cache with size-bounded LRU eviction.
+    Each entry is a UTF-8 text file; the file mtime is bumped on every hit and
+    the least recently used entries are evicted once the cache exceeds max_bytes.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes = None  # Tính lazily ở lần put đầu tiên
+
+    @staticmethod
+    def make_key(content_hash: str, extractor_version: str, file_type: str) -> str:
+        return f"{content_hash}-{file_type.lower()}-v{extractor_version}"
+
+    def _entry_path(self, key: str) -> str:
+        # Shard theo 2 ký tự đầu của hash để tránh một thư mục quá lớn
+        return os.path.join(self.cache_dir, key[:2], f"{key}.txt")
+
+    def get(self, key: str) -> Optional[str]:
+        """Return cached text for key, or None on miss."""
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                text = file.read()
+        except FileNotFoundError:
+            return None
+        except (OSError, UnicodeDecodeError) as e:
+            logger.warning(f"Error reading extraction cache entry {key}: {str(e)}")
+            return None
+
+        # Cập nhật mtime để đánh dấu entry vừa được sử dụng (LRU)
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        """Store text under key, evicting least recently used entries if needed."""
+        if text is None:
+            return
+
+        path = self._entry_path(key)
+        data = text.encode('utf-8')
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Ghi ra file tạm rồi os.replace để reader không bao giờ thấy entry ghi dở
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as file:
+                    file.write(data)
+                os.replace(temp_path, path)
+            except Exception:
+                if os.path.exists(temp_path):
+                    os.unlink(temp_path)
+                raise
+        except OSError as e:
+            logger.warning(f"Error writing extraction cache entry {key}: {str(e)}")
+            return
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_total_bytes()
+            else:
+                self._total_bytes += len(data)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _iter_entries(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.is_file() and entry.name.endswith('.txt'):
+                    yield entry
+
+    def _scan_total_bytes(self) -> int:
+        total = 0
+        for entry in self._iter_entries():
+            try:
+                total += entry.stat().st_size
+            except OSError:
+                continue
+        return total
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until the cache is under 90% of max_bytes."""
+        entries = []
+        for entry in self._iter_entries():
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        entries.sort()
+
+        evicted = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+                total -= size
+                evicted += 1
+            except OSError:
+                continue
+
+        self._total_bytes = total
+        if evicted:
+            logger.info(f"Evicted {evicted} extraction cache entries ({total / 1024 / 1024:.1f}MB remaining)")
+
+
+_cache = None
+
+
+def get_extraction_cache() -> ExtractionCache:
+    """Get or initialize the process-wide extraction cache."""
+    global _cache
+    if _cache is None:
+        _cache = ExtractionCache()
+    return _cache
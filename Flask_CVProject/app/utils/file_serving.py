@@ -0,0 +1,124 @@
+"""
+Serving stored upload files
+Three modes (config FILE_SERVING_MODE):
+- 'flask' (default): werkzeug send_file with conditional GET and byte ranges. The file
+  object is handed to the WSGI server's wsgi.file_wrapper, which gunicorn/uWSGI turn
+  into os.sendfile, so full downloads are not copied through Python.
+- 'x-accel': nginx serves the file from an internal location (X-Accel-Redirect).
+- 'x-sendfile': Apache mod_xsendfile / lighttpd serve the file (X-Sendfile).
+In the offloaded modes Python only checks permissions and answers If-None-Match;
+the proxy handles Range requests and the transfer itself.
+Blobs in remote storage (S3) are served by redirecting to a short-lived presigned URL.
+"""
+
+import os
+import logging
+import mimetypes
+from urllib.parse import quote
+from typing import Optional
+
+from flask import current_app, request, send_file, redirect
+
+logger = logging.getLogger(__name__)
+
+SERVING_MODES = ('flask', 'x-accel', 'x-sendfile')
+
+
+def _content_disposition(download_name: str) -> str:
+    try:
+        download_name.encode('ascii')
+        return f'attachment; filename="{download_name}"'
+    except UnicodeEncodeError:
+        # RFC 5987 cho tên file tiếng Việt
+        ascii_name = download_name.encode('ascii', 'ignore').decode('ascii') or 'download'
+        return f"attachment; filename=\"{ascii_name}\"; filename*=UTF-8''{quote(download_name)}"
+
+
+def send_upload(file_path: str, upload_folder: str, download_name: str, etag: Optional[str] = None):
+    """
+    Build the download response for a stored upload.
+
+    Args:
+        file_path: Absolute path of the stored file (must be inside upload_folder)
+        upload_folder: Root of the uploads, mapped to X_ACCEL_UPLOADS_PREFIX for nginx
+        download_name: File name presented to the browser
+        etag: Strong ETag (the content hash); derived from mtime/size when None
+
+    Returns:
+        Flask response (200, 206 or 304)
+    """
+    mode = (current_app.config.get('FILE_SERVING_MODE') or 'flask').lower()
+    if mode not in SERVING_MODES:
+        logger.warning(f"Unknown FILE_SERVING_MODE '{mode}', using 'flask'")
+        mode = 'flask'
+
+    if mode == 'flask':
+        response = send_file(
+            file_path,
+            as_attachment=True,
+            download_name=download_name,
+            etag=etag if etag else True,
+            conditional=True,
+            max_age=0
+        )
+    else:
+        stat = os.stat(file_path)
+        response = current_app.response_class(
+            mimetype=mimetypes.guess_type(download_name)[0] or 'application/octet-stream'
+        )
+        response.headers['Content-Disposition'] = _content_disposition(download_name)
+        response.set_etag(etag or f"{int(stat.st_mtime)}-{stat.st_size}")
+        response.last_modified = int(stat.st_mtime)
+        response.make_conditional(request)
+
+        if response.status_code != 304:
+            if mode == 'x-accel':
+                relative_path = os.path.relpath(file_path, upload_folder).replace(os.sep, '/')
+                prefix = current_app.config.get('X_ACCEL_UPLOADS_PREFIX') or '/protected/uploads/'
+                response.headers['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(relative_path)
+            else:
+                response.headers['X-Sendfile'] = os.path.abspath(file_path)
+
+    # File CV cần đăng nhập - không cho proxy/CDN dùng chung cache, nhưng trình duyệt được revalidate bằng ETag
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def send_blob(storage, key: str, download_name: str, etag: Optional[str] = None):
+    """
+    Build the download response for a blob in any storage backend.
+
+    Args:
+        storage: BlobStorage holding the blob
+        key: Blob key
+        download_name: File name presented to the browser
+        etag: Strong ETag (the content hash)
+
+    Returns:
+        Flask response: redirect to a presigned URL (S3), file response (local) or streamed body
+    """
+    url = storage.presigned_url(key, current_app.config.get('BLOB_PRESIGNED_URL_TTL') or 300, download_name)
+    if url:
+        # Client tải thẳng từ object store, web worker không phải truyền file
+        response = redirect(url, code=302)
+        response.cache_control.private = True
+        response.cache_control.no_store = True
+        return response
+
+    path = storage.local_path(key)
+    if path is not None:
+        return send_upload(path, storage.root, download_name, etag=etag)
+
+    response = send_file(
+        storage.open(key),
+        mimetype=mimetypes.guess_type(download_name)[0] or 'application/octet-stream',
+        as_attachment=True,
+        download_name=download_name,
+        etag=etag if etag else False,
+        conditional=True,
+        max_age=0
+    )
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
@@ -0,0 +1,207 @@
+"""
+Upload-time derivatives for avatars and company logos
+An uploaded image is decoded once, auto-rotated from EXIF, bounded in size and
+recompressed into a small set of blobs that share a content-hash name:
+
+    <prefix>_<hash>.jpg|png     render size, the URL stored in the DB (DOCX/PDF export, CV templates)
+    <prefix>_<hash>.webp        render size as WebP (inlined into PDF exports)
+    <prefix>_<hash>_thumb.webp  thumbnail for job lists
+
+The hash in the name changes whenever the content changes, so the files can be cached
+forever by browsers. SVG logos are vector and are stored unchanged.
+"""
+
+import os
+import io
+import re
+import hashlib
+import logging
+from typing import Optional, Tuple, List
+
+from werkzeug.utils import secure_filename
+
+try:
+    from PIL import Image, ImageOps
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+logger = logging.getLogger(__name__)
+
+IMAGE_MAX_UPLOAD_BYTES = 10 * 1024 * 1024  # 10MB
+NAME_HASH_LENGTH = 12
+
+# Cạnh dài nhất (px) cho từng loại ảnh: avatar hiển thị 150px trong CV -> render 2x cho bản in
+IMAGE_VARIANT_SIZES = {
+    'avatar': {'render': 320, 'thumb': 96},
+    'logo': {'render': 256, 'thumb': 96},
+}
+
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+THUMB_SUFFIX = '_thumb.webp'
+WEBP_SUFFIX = '.webp'
+
+# Ảnh nhỏ hơn ngưỡng này được nhúng nguyên vào PDF, lớn hơn thì thu nhỏ trước khi nhúng
+EMBED_MAX_BYTES = 200 * 1024
+
+MIME_TYPES = {
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.gif': 'image/gif',
+    '.webp': 'image/webp',
+    '.svg': 'image/svg+xml',
+}
+
+# Ảnh chính do pipeline này tạo ra (có bản WebP/thumbnail); ảnh upload trước đó thì không
+DERIVED_NAME_RE = re.compile(r'_[0-9a-f]{%d}\.(jpg|png)$' % NAME_HASH_LENGTH)
+
+
+def _read_upload(file_storage, max_bytes: int) -> bytes:
+    data = file_storage.stream.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise ValueError(f'Ảnh vượt quá dung lượng cho phép ({max_bytes // (1024 * 1024)}MB)')
+    if not data:
+        raise ValueError('File ảnh rỗng')
+    return data
+
+
+def _has_alpha(image) -> bool:
+    return image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+
+
+def _normalize(image):
+    """First frame, EXIF orientation applied, converted to RGB or RGBA."""
+    image.seek(0)
+    image = ImageOps.exif_transpose(image)
+    if _has_alpha(image):
+        return image.convert('RGBA')
+    return image.convert('RGB')
+
+
+def _bounded(image, max_side: int):
+    copy = image.copy()
+    copy.thumbnail((max_side, max_side), Image.LANCZOS)
+    return copy
+
+
+def _encode(image, fmt: str) -> bytes:
+    output = io.BytesIO()
+    if fmt == 'JPEG':
+        image.save(output, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    elif fmt == 'PNG':
+        image.save(output, 'PNG', optimize=True)
+    else:
+        image.save(output, 'WEBP', quality=WEBP_QUALITY, method=4)
+    return output.getvalue()
+
+
+def save_image_derivatives(file_storage, storage, key_prefix: str, name_prefix: str, kind: str) -> str:
+    """
+    Validate an uploaded image and store its size-bounded derivatives.
+
+    Args:
+        file_storage: werkzeug FileStorage of the upload
+        storage: BlobStorage the images are written to
+        key_prefix: Folder of the blob keys (e.g. avatars)
+        name_prefix: Start of the file names (e.g. avatar_12)
+        kind: Key of IMAGE_VARIANT_SIZES ('avatar' or 'logo')
+
+    Returns:
+        Public URL of the render-size image (JPEG, or PNG when the image has transparency)
+    """
+    data = _read_upload(file_storage, IMAGE_MAX_UPLOAD_BYTES)
+    content_hash = hashlib.sha256(data).hexdigest()[:NAME_HASH_LENGTH]
+    base_key = f'{key_prefix}/' + secure_filename(f'{name_prefix}_{content_hash}')
+
+    original_ext = os.path.splitext(file_storage.filename or '')[1].lower()
+    if original_ext == '.svg':
+        # Logo vector: không cần resize, chỉ đổi tên theo nội dung
+        key = f'{base_key}.svg'
+        storage.put_bytes(key, data, MIME_TYPES['.svg'])
+        return storage.public_url(key)
+
+    if not HAS_PIL:
+        raise ValueError('Pillow chưa được cài đặt, không thể xử lý ảnh')
+
+    try:
+        with Image.open(io.BytesIO(data)) as source:
+            image = _normalize(source)
+    except (Image.DecompressionBombError, OSError, SyntaxError) as e:
+        raise ValueError(f'File ảnh không hợp lệ: {str(e)}')
+
+    sizes = IMAGE_VARIANT_SIZES[kind]
+    render = _bounded(image, sizes['render'])
+    if render.mode == 'RGBA':
+        key = f'{base_key}.png'
+        render_data = _encode(render, 'PNG')
+    else:
+        key = f'{base_key}.jpg'
+        render_data = _encode(render, 'JPEG')
+
+    storage.put_bytes(base_key + WEBP_SUFFIX, _encode(render, 'WEBP'), MIME_TYPES[WEBP_SUFFIX])
+    storage.put_bytes(base_key + THUMB_SUFFIX, _encode(_bounded(image, sizes['thumb']), 'WEBP'), MIME_TYPES[WEBP_SUFFIX])
+    # File chính ghi sau cùng: URL trong DB chỉ trỏ tới bộ ảnh đã đầy đủ
+    storage.put_bytes(key, render_data, MIME_TYPES[os.path.splitext(key)[1]])
+
+    logger.info(f"Stored {kind} {key}: {len(data)} bytes -> {len(render_data)} bytes "
+                f"({image.width}x{image.height} -> {render.width}x{render.height})")
+    return storage.public_url(key)
+
+
+def derivative_paths(path: str) -> List[str]:
+    """Keys/paths of the WebP siblings of a render-size image made by save_image_derivatives."""
+    if not DERIVED_NAME_RE.search(path):
+        return []
+    base = os.path.splitext(path)[0]
+    return [base + WEBP_SUFFIX, base + THUMB_SUFFIX]
+
+
+def derivative_url(url: Optional[str], variant: str) -> Optional[str]:
+    """
+    URL of a derivative ('thumb' or 'webp'), or the URL itself for images uploaded
+    before derivatives existed. Decided from the name, so listing pages do no I/O.
+    """
+    if not url or not DERIVED_NAME_RE.search(url):
+        return url
+    return os.path.splitext(url)[0] + (THUMB_SUFFIX if variant == 'thumb' else WEBP_SUFFIX)
+
+
+def delete_image_set(storage, url: Optional[str]) -> None:
+    """Remove an image (given by its stored URL) together with its derivatives."""
+    key = storage.key_for_url(url)
+    if not key:
+        return
+    for image_key in [key] + derivative_paths(key):
+        try:
+            storage.delete(image_key)
+        except Exception as e:
+            logger.warning(f"Could not delete image {image_key}: {str(e)}")
+
+
+def load_embeddable_image(storage, key: str) -> Tuple[str, bytes]:
+    """
+    Image bytes to inline into an exported document, as small as available.
+    Prefers the WebP derivative; old full-size uploads are downscaled in memory.
+
+    Returns:
+        (mime type, bytes)
+    """
+    for candidate in derivative_paths(key)[:1]:
+        if storage.exists(candidate):
+            with storage.open(candidate) as f:
+                return MIME_TYPES[WEBP_SUFFIX], f.read()
+
+    with storage.open(key) as f:
+        data = f.read()
+    ext = os.path.splitext(key)[1].lower()
+    if HAS_PIL and ext != '.svg' and len(data) > EMBED_MAX_BYTES:
+        try:
+            with Image.open(io.BytesIO(data)) as source:
+                image = _bounded(_normalize(source), IMAGE_VARIANT_SIZES['avatar']['render'])
+            return MIME_TYPES[WEBP_SUFFIX], _encode(image, 'WEBP')
+        except Exception as e:
+            logger.warning(f"Could not downscale {key} for embedding: {str(e)}")
+
+    return MIME_TYPES.get(ext, 'image/jpeg'), data
@@ -4,16 +4,21 @@ Supports JPG, PNG, JPEG image formats using EasyOCR
 """
 
 import os
+import time
 import logging
-from typing import Optional, List
+import threading
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict
+
+from app.utils.ocr_service import get_ocr_backend, OCR_SERVICE_ADDRESS, OCR_POOL_SIZE, OCRTimeoutError, OCRUnavailableError
 
 logger = logging.getLogger(__name__)
 
-try:
-    import easyocr
-    HAS_EASYOCR = True
-except ImportError:
-    HAS_EASYOCR = False
+# Không import easyocr ở đây: import sẽ load torch vào mọi web worker.
+# Reader chỉ được tạo trong process OCR riêng (xem app.utils.ocr_service).
+HAS_EASYOCR = importlib.util.find_spec('easyocr') is not None
+if not HAS_EASYOCR and not OCR_SERVICE_ADDRESS:
     logger.warning("easyocr not installed. Image OCR support will be unavailable.")
 
 try:
@@ -23,36 +28,56 @@ except ImportError:
     HAS_PIL = False
     logger.warning("Pillow not installed. Image preprocessing will be limited.")
 
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+MIN_OCR_CONFIDENCE = 0.5
+MAX_IMAGE_SIZE_FOR_OCR = 5 * 1024 * 1024  # 5MB
 
-_reader = None
+# Tiled OCR cho ảnh lớn (> MAX_IMAGE_SIZE_FOR_OCR): downsample về DPI tối ưu cho OCR
+# rồi OCR từng tile chồng lấn nhau thay vì bỏ qua ảnh
+OCR_TARGET_DPI = 300
+OCR_MAX_PIXELS = 25_000_000  # ~A3 ở 300 DPI, giới hạn bộ nhớ khi không có thông tin DPI
+OCR_TILE_SIZE = 1600
+OCR_TILE_OVERLAP = 160  # Phải lớn hơn chiều cao một dòng chữ để dòng nằm giữa 2 tile không bị cắt
+TILED_OCR_TIME_BUDGET = 180  # Giây cho toàn bộ ảnh
+
+# Batch OCR: số ảnh mỗi lần gọi readtext_batched và số thread preprocess song song
+OCR_BATCH_SIZE = int(os.environ.get('OCR_BATCH_SIZE') or 8)
+PREPROCESS_WORKERS = min(4, os.cpu_count() or 1)
 
 
 def get_ocr_reader(languages: List[str] = ['en', 'vi']) -> Optional[object]:
     """
-    Get or initialize EasyOCR reader.
-    Initialize once for better performance.
+    Get the OCR backend (object with a readtext method).
+    Models are loaded once in a dedicated OCR process, not in the calling process.
     
     Args:
         languages: List of language codes to support (default: ['en', 'vi'])
         
     Returns:
-        EasyOCR reader object or None if not available
+        OCR backend (shared server client or local worker pool) or None if not available
     """
-    global _reader
-    
-    if not HAS_EASYOCR:
+    if not HAS_EASYOCR and not OCR_SERVICE_ADDRESS:
         return None
     
-    if _reader is None:
-        try:
-            logger.info(f"Initializing EasyOCR reader with languages: {languages}")
-            _reader = easyocr.Reader(languages, gpu=False)  # Set gpu=True if GPU available
-            logger.info("EasyOCR reader initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize EasyOCR reader: {str(e)}")
-            return None
-    
-    return _reader
+    return get_ocr_backend(languages)
+
+
+def _convert_to_rgb(image: "Image.Image") -> "Image.Image":
+    """Convert to RGB, flattening transparency (PNG) onto a white background."""
+    if image.mode in ('RGBA', 'LA', 'P'):
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        if image.mode == 'P':
+            image = image.convert('RGBA')
+        background.paste(image, mask=image.split()[-1] if image.mode in ('RGBA', 'LA') else None)
+        return background
+    elif image.mode != 'RGB':
+        return image.convert('RGB')
+    return image
 
 
 def preprocess_image(image_path: str) -> Optional[Image.Image]:
@@ -69,17 +94,7 @@ def preprocess_image(image_path: str) -> Optional[Image.Image]:
         return None
     
     try:
-        image = Image.open(image_path)
-        
-            # Convert to RGB if needed (for PNG with transparency)
-        if image.mode in ('RGBA', 'LA', 'P'):
-            background = Image.new('RGB', image.size, (255, 255, 255))
-            if image.mode == 'P':
-                image = image.convert('RGBA')
-            background.paste(image, mask=image.split()[-1] if image.mode == 'RGBA' else None)
-            image = background
-        elif image.mode != 'RGB':
-            image = image.convert('RGB')
+        image = _convert_to_rgb(Image.open(image_path))
         
         max_size = 3000
         width, height = image.size
@@ -101,10 +116,27 @@ def preprocess_image(image_path: str) -> Optional[Image.Image]:
         return None
 
 
+def _results_to_text(results: list) -> Optional[str]:
+    """Join EasyOCR result lines with confidence >= MIN_OCR_CONFIDENCE."""
+    text_lines = []
+    for (bbox, text, confidence) in results:
+        if confidence >= MIN_OCR_CONFIDENCE:
+            text_lines.append(text)
+    
+    if text_lines:
+        text = "\n".join(text_lines)
+        logger.info(f"Successfully extracted text from image ({len(text)} characters, {len(text_lines)} lines)")
+        return text.strip()
+    else:
+        logger.warning(f"No text extracted from image (all results had low confidence)")
+        return None
+
+
 def extract_text_from_image(image_path: str, languages: List[str] = ['en', 'vi'], timeout: int = 30) -> Optional[str]:
     """
     Extract text from image file using EasyOCR.
-    Added timeout to prevent hanging.
+    OCR runs in a separate worker process; a job exceeding the timeout is killed
+    and its worker restarted, so this is safe to call from any thread.
     
     Args:
         image_path: Path to image file (jpg, jpeg, png)
@@ -118,97 +150,40 @@ def extract_text_from_image(image_path: str, languages: List[str] = ['en', 'vi']
         logger.error(f"Image file not found: {image_path}")
         return None
     
-    if not HAS_EASYOCR:
+    reader = get_ocr_reader(languages)
+    if not reader:
         logger.warning("EasyOCR not available. Image uploaded but text extraction skipped.")
         return None
     
     try:
-        # Check file size - skip OCR for very large images to prevent hanging
+        # Ảnh lớn (scan độ phân giải cao) được OCR theo tile thay vì bỏ qua
         file_size = os.path.getsize(image_path)
-        max_size_for_ocr = 5 * 1024 * 1024  # 5MB
-        if file_size > max_size_for_ocr:
-            logger.warning(f"Image too large for OCR ({file_size / 1024 / 1024:.1f}MB > 5MB). Skipping text extraction.")
-            return None
-        
-        reader = get_ocr_reader(languages)
-        if not reader:
-            logger.warning("Failed to initialize EasyOCR reader. Image uploaded but text extraction skipped.")
-            return None
-        
-        # Use timeout to prevent hanging
-        import signal
+        if file_size > MAX_IMAGE_SIZE_FOR_OCR and HAS_PIL and HAS_NUMPY:
+            logger.info(f"Image is large ({file_size / 1024 / 1024:.1f}MB > 5MB), using tiled OCR")
+            return extract_text_from_large_image(image_path, languages, timeout)
         
-        def timeout_handler(signum, frame):
-            raise TimeoutError("OCR processing timeout")
-        
-        # Set timeout (Unix only, Windows will use try-except)
-        try:
-            signal.signal(signal.SIGALRM, timeout_handler)
-            signal.alarm(timeout)
-        except (AttributeError, ValueError):
-            # Windows doesn't support SIGALRM, will rely on try-except
-            pass
-        
-        try:
-            if HAS_PIL:
-                processed_image = preprocess_image(image_path)
-                if processed_image:
-                    import tempfile
-                    temp_path = None
-                    try:
-                        with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as temp_file:
-                            temp_path = temp_file.name
-                            processed_image.save(temp_path, 'JPEG', quality=95)
-                        
-                        logger.info(f"Processing image with OCR: {image_path}")
-                        results = reader.readtext(temp_path)
-                    finally:
-                        if temp_path and os.path.exists(temp_path):
-                            try:
-                                os.unlink(temp_path)
-                            except:
-                                pass
-                else:
-                    logger.warning("Image preprocessing failed, using original image")
-                    results = reader.readtext(image_path)
-            else:
-                logger.info(f"Processing image with OCR (no preprocessing): {image_path}")
-                results = reader.readtext(image_path)
-            
-            # Cancel timeout
-            try:
-                signal.alarm(0)
-            except (AttributeError, ValueError):
-                pass
-            
-            text_lines = []
-            for (bbox, text, confidence) in results:
-                if confidence >= 0.5:
-                    text_lines.append(text)
-            
-            if text_lines:
-                text = "\n".join(text_lines)
-                logger.info(f"Successfully extracted text from image ({len(text)} characters, {len(text_lines)} lines)")
-                return text.strip()
+        if HAS_PIL and HAS_NUMPY:
+            processed_image = preprocess_image(image_path)
+            if processed_image:
+                # Đưa ảnh đã preprocess thẳng vào reader dưới dạng mảng RGB trong bộ nhớ:
+                # không ghi tempfile, không encode lại JPEG, không decode lần hai
+                logger.info(f"Processing image with OCR: {image_path}")
+                results = reader.readtext(np.asarray(processed_image), timeout=timeout)
             else:
-                logger.warning(f"No text extracted from image (all results had low confidence)")
-                return None
-                
-        except TimeoutError:
-            logger.warning(f"OCR processing timeout after {timeout}s. Image uploaded but text extraction skipped.")
-            try:
-                signal.alarm(0)
-            except (AttributeError, ValueError):
-                pass
-            return None
-        except Exception as e:
-            logger.error(f"OCR extraction failed for {image_path}: {str(e)}")
-            try:
-                signal.alarm(0)
-            except (AttributeError, ValueError):
-                pass
-            return None
-            
+                logger.warning("Image preprocessing failed, using original image")
+                results = reader.readtext(os.path.abspath(image_path), timeout=timeout)
+        else:
+            logger.info(f"Processing image with OCR (no preprocessing): {image_path}")
+            results = reader.readtext(os.path.abspath(image_path), timeout=timeout)
+        
+        return _results_to_text(results)
+    
+    except OCRTimeoutError:
+        logger.warning(f"OCR processing timeout after {timeout}s. Image uploaded but text extraction skipped.")
+        return None
+    except OCRUnavailableError as e:
+        logger.error(f"OCR service unavailable: {str(e)}")
+        return None
     except Exception as e:
         logger.error(f"OCR extraction failed for {image_path}: {str(e)}")
         return None
@@ -238,3 +213,293 @@ def extract_text_from_image_file(image_path: str, file_type: str = None) -> Opti
         logger.error(f"Unsupported image file type: {file_type}")
         return None
 
+
+def _load_image_array(image_path: str):
+    """Preprocess an image and return it as an RGB NumPy array, or None on failure."""
+    try:
+        if not os.path.exists(image_path):
+            logger.error(f"Image file not found: {image_path}")
+            return None
+        if os.path.getsize(image_path) > MAX_IMAGE_SIZE_FOR_OCR:
+            # Ảnh lớn được OCR riêng theo tile (xem extract_text_from_images)
+            return None
+        processed_image = preprocess_image(image_path)
+        return np.asarray(processed_image) if processed_image else None
+    except Exception as e:
+        logger.error(f"Image preprocessing failed for {image_path}: {str(e)}")
+        return None
+
+
+def _pad_to_common_size(arrays: list) -> list:
+    """
+    Pad images onto white canvases of the batch's max height/width.
+    Padding is added right/bottom only, so bounding boxes stay valid and the
+    aspect ratio is preserved (readtext_batched needs equally sized inputs).
+    """
+    max_height = max(array.shape[0] for array in arrays)
+    max_width = max(array.shape[1] for array in arrays)
+    padded = []
+    for array in arrays:
+        if array.shape[0] == max_height and array.shape[1] == max_width:
+            padded.append(array)
+            continue
+        canvas = np.full((max_height, max_width, 3), 255, dtype=np.uint8)
+        canvas[:array.shape[0], :array.shape[1]] = array
+        padded.append(canvas)
+    return padded
+
+
+def extract_text_from_images(image_paths: List[str], languages: List[str] = ['en', 'vi'], timeout: int = 30) -> List[Optional[str]]:
+    """
+    Extract text from several images at once.
+    Images are preprocessed concurrently, grouped by size and sent to EasyOCR's
+    batched inference (readtext_batched), which keeps the recognizer busy with
+    larger batches and gives higher images-per-second than one readtext per file.
+    
+    Args:
+        image_paths: Paths to image files (jpg, jpeg, png)
+        languages: List of language codes to support (default: ['en', 'vi'])
+        timeout: Maximum OCR time in seconds per image
+        
+    Returns:
+        List of extracted texts aligned with image_paths (None where extraction failed)
+    """
+    texts = [None] * len(image_paths)
+    if not image_paths:
+        return texts
+    
+    reader = get_ocr_reader(languages)
+    if not reader:
+        logger.warning("EasyOCR not available. Image text extraction skipped.")
+        return texts
+    
+    if not (HAS_PIL and HAS_NUMPY):
+        # Không có PIL/NumPy để batch - xử lý từng ảnh
+        return [extract_text_from_image(path, languages, timeout) for path in image_paths]
+    
+    with ThreadPoolExecutor(max_workers=PREPROCESS_WORKERS) as executor:
+        arrays = list(executor.map(_load_image_array, image_paths))
+    
+    for i, path in enumerate(image_paths):
+        if arrays[i] is None and os.path.exists(path) and os.path.getsize(path) > MAX_IMAGE_SIZE_FOR_OCR:
+            texts[i] = extract_text_from_large_image(path, languages, timeout)
+    
+    # Gom các ảnh có kích thước gần nhau vào cùng batch để giảm phần padding thừa
+    indices = sorted(
+        (i for i, array in enumerate(arrays) if array is not None),
+        key=lambda i: arrays[i].shape[0] * arrays[i].shape[1]
+    )
+    
+    for start in range(0, len(indices), OCR_BATCH_SIZE):
+        group = indices[start:start + OCR_BATCH_SIZE]
+        batch = _pad_to_common_size([arrays[i] for i in group])
+        logger.info(f"Processing batch of {len(group)} images with OCR")
+        try:
+            batch_results = reader.readtext_batched(batch, timeout=timeout * len(group), batch_size=len(group))
+        except (OCRTimeoutError, OCRUnavailableError) as e:
+            logger.warning(f"Batched OCR failed ({str(e)}), falling back to per-image OCR for this batch")
+            for i in group:
+                texts[i] = extract_text_from_image(image_paths[i], languages, timeout)
+            continue
+        except Exception as e:
+            logger.error(f"Batched OCR failed: {str(e)}")
+            continue
+        
+        for i, results in zip(group, batch_results):
+            texts[i] = _results_to_text(results)
+    
+    return texts
+
+
+def _load_downsampled(image_path: str) -> "Image.Image":
+    """
+    Open an image reduced to OCR_TARGET_DPI (and at most OCR_MAX_PIXELS).
+    For JPEG, draft() lets the decoder scale down while decoding, so the
+    full-resolution bitmap never has to be held in memory.
+    """
+    image = Image.open(image_path)
+    width, height = image.size
+    
+    scale = 1.0
+    dpi = image.info.get('dpi')
+    if dpi and dpi[0] and dpi[0] > OCR_TARGET_DPI:
+        scale = OCR_TARGET_DPI / float(dpi[0])
+    if width * height * scale * scale > OCR_MAX_PIXELS:
+        scale = (OCR_MAX_PIXELS / float(width * height)) ** 0.5
+    
+    target_size = (max(1, int(width * scale)), max(1, int(height * scale)))
+    if scale < 1.0:
+        image.draft('RGB', target_size)
+    image = _convert_to_rgb(image)
+    if image.size != target_size and scale < 1.0:
+        image = image.resize(target_size, Image.Resampling.LANCZOS)
+    
+    logger.info(f"Downsampled image from {width}x{height} to {image.size[0]}x{image.size[1]} for tiled OCR")
+    return image
+
+
+def _tile_origins(length: int) -> List[int]:
+    """Start offsets of overlapping tiles covering [0, length)."""
+    if length <= OCR_TILE_SIZE:
+        return [0]
+    step = OCR_TILE_SIZE - OCR_TILE_OVERLAP
+    origins = list(range(0, length - OCR_TILE_SIZE, step))
+    origins.append(length - OCR_TILE_SIZE)
+    return origins
+
+
+def _owned_range(origin: int, origins: List[int], length: int) -> tuple:
+    """
+    The part of a tile whose detections it keeps: overlaps are split halfway
+    between neighbouring tiles, so text in an overlap is kept exactly once.
+    """
+    index = origins.index(origin)
+    start = 0 if index == 0 else (origin + origins[index - 1] + OCR_TILE_SIZE) / 2.0
+    end = length if index == len(origins) - 1 else (origin + OCR_TILE_SIZE + origins[index + 1]) / 2.0
+    return start, end
+
+
+def _merge_lines(boxes: List[tuple]) -> List[str]:
+    """
+    Merge detections (x, y_center, height, text) from all tiles into reading order:
+    boxes whose vertical centers are within half a line height form one line.
+    """
+    lines = []
+    for x, y_center, height, text in sorted(boxes, key=lambda box: box[1]):
+        if lines and abs(y_center - lines[-1]['y']) <= max(lines[-1]['height'], height) / 2.0:
+            lines[-1]['boxes'].append((x, text))
+        else:
+            lines.append({'y': y_center, 'height': height, 'boxes': [(x, text)]})
+    return [" ".join(text for _, text in sorted(line['boxes'])) for line in lines]
+
+
+def extract_text_from_large_image(image_path: str, languages: List[str] = ['en', 'vi'], timeout: int = 30,
+                                  time_budget: int = TILED_OCR_TIME_BUDGET) -> Optional[str]:
+    """
+    OCR a large scan by downsampling to OCR_TARGET_DPI and processing overlapping tiles.
+    Tiles run concurrently when the OCR backend has several workers; detections are
+    mapped back to page coordinates, de-duplicated across overlaps and merged into lines.
+    Stops scheduling new tiles once time_budget is spent and returns what was read.
+    
+    Args:
+        image_path: Path to image file
+        languages: List of language codes to support (default: ['en', 'vi'])
+        timeout: Maximum OCR time in seconds per tile
+        time_budget: Maximum total time in seconds for the whole image
+        
+    Returns:
+        Extracted text as string, or None if nothing could be read
+    """
+    reader = get_ocr_reader(languages)
+    if not reader or not (HAS_PIL and HAS_NUMPY):
+        logger.warning("Tiled OCR requires EasyOCR, Pillow and NumPy. Text extraction skipped.")
+        return None
+    
+    try:
+        image = _load_downsampled(image_path)
+    except Exception as e:
+        logger.error(f"Could not load large image {image_path}: {str(e)}")
+        return None
+    
+    width, height = image.size
+    x_origins = _tile_origins(width)
+    y_origins = _tile_origins(height)
+    tiles = [(x, y) for y in y_origins for x in x_origins]
+    deadline = time.monotonic() + time_budget
+    
+    def ocr_tile(origin):
+        x, y = origin
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return origin, None
+        tile = np.asarray(image.crop((x, y, min(x + OCR_TILE_SIZE, width), min(y + OCR_TILE_SIZE, height))))
+        try:
+            return origin, reader.readtext(tile, timeout=min(timeout, remaining))
+        except Exception as e:
+            logger.warning(f"OCR failed for tile at ({x}, {y}) of {image_path}: {str(e)}")
+            return origin, None
+    
+    logger.info(f"Running tiled OCR on {image_path}: {len(tiles)} tiles of {OCR_TILE_SIZE}px")
+    with ThreadPoolExecutor(max_workers=max(1, OCR_POOL_SIZE)) as executor:
+        tile_results = list(executor.map(ocr_tile, tiles))
+    
+    boxes = []
+    skipped = 0
+    for (x, y), results in tile_results:
+        if results is None:
+            skipped += 1
+            continue
+        x_start, x_end = _owned_range(x, x_origins, width)
+        y_start, y_end = _owned_range(y, y_origins, height)
+        for (bbox, text, confidence) in results:
+            if confidence < MIN_OCR_CONFIDENCE:
+                continue
+            xs = [point[0] + x for point in bbox]
+            ys = [point[1] + y for point in bbox]
+            x_center = (min(xs) + max(xs)) / 2.0
+            y_center = (min(ys) + max(ys)) / 2.0
+            if x_start <= x_center < x_end and y_start <= y_center < y_end:
+                boxes.append((min(xs), y_center, max(ys) - min(ys), text))
+    
+    if skipped:
+        logger.warning(f"Tiled OCR skipped {skipped}/{len(tiles)} tiles (timeout or time budget exhausted)")
+    
+    if not boxes:
+        logger.warning(f"No text extracted from large image {image_path}")
+        return None
+    
+    text = "\n".join(_merge_lines(boxes))
+    logger.info(f"Successfully extracted text from large image ({len(text)} characters, {len(tiles)} tiles)")
+    return text.strip()
+
+
+# pdfium (backend rasterize của pdfplumber) không thread-safe
+_pdf_render_lock = threading.Lock()
+PDF_OCR_MAX_SIDE = 3000  # Giống preprocess_image
+
+
+def _render_pdf_page(file_path: str, page_index: int) -> "Image.Image":
+    """Rasterize one PDF page (0-based) at OCR_TARGET_DPI, longest side capped at PDF_OCR_MAX_SIDE."""
+    import pdfplumber
+    with _pdf_render_lock:
+        with pdfplumber.open(file_path, pages=[page_index + 1]) as pdf:
+            page = pdf.pages[0]
+            longest_points = max(float(page.width), float(page.height))
+            resolution = min(OCR_TARGET_DPI, int(PDF_OCR_MAX_SIDE * 72 / longest_points))
+            image = page.to_image(resolution=resolution).original
+            return _convert_to_rgb(image)
+
+
+def extract_text_from_pdf_pages(file_path: str, page_indexes: List[int], languages: List[str] = ['en', 'vi'],
+                                timeout: int = 60) -> Dict[int, Optional[str]]:
+    """
+    OCR selected pages of a PDF (scanned pages without a text layer).
+    Pages are rasterized one at a time and OCR'd concurrently across the OCR worker pool.
+    
+    Args:
+        file_path: Path to PDF file
+        page_indexes: 0-based indexes of the pages to OCR
+        languages: List of language codes to support (default: ['en', 'vi'])
+        timeout: Maximum OCR time in seconds per page
+        
+    Returns:
+        Dict mapping page index to its text: '' when the page was read but holds no text,
+        None when rasterization or OCR failed (so the caller can retry that page later)
+    """
+    reader = get_ocr_reader(languages)
+    if not reader or not (HAS_PIL and HAS_NUMPY):
+        logger.warning("PDF OCR requires EasyOCR, Pillow and NumPy. Scanned pages skipped.")
+        return {index: None for index in page_indexes}
+    
+    def ocr_page(index):
+        try:
+            image_array = np.asarray(_render_pdf_page(file_path, index))
+            results = reader.readtext(image_array, timeout=timeout)
+        except Exception as e:
+            logger.warning(f"OCR failed for page {index + 1} of {file_path}: {str(e)}")
+            return index, None
+        return index, _results_to_text(results) or ''
+    
+    logger.info(f"Running OCR on {len(page_indexes)} scanned page(s) of {file_path}")
+    with ThreadPoolExecutor(max_workers=max(1, OCR_POOL_SIZE)) as executor:
+        return dict(executor.map(ocr_page, page_indexes))
@@ -0,0 +1,196 @@
+"""
+Aho–Corasick keyword matching for CV classification
+The keyword map (category -> keywords) is compiled once into an automaton over word
+tokens, so a CV is classified in one linear pass instead of one substring scan per keyword.
+Matching on tokens makes it word-boundary aware: 'r', 'ml', 'ba', 'pm' or 'hr' only match
+as whole words, not inside 'developer', 'html', 'database' or 'chrome'.
+Keywords with punctuation ('node.js', 'ci/cd', 'ui/ux', 'scikit-learn') are tokenized the
+same way as the text, multi-word keywords match across any whitespace (including line breaks)
+and a plural 's' on a word of the text is tolerated ('APIs' matches 'api').
+"""
+
+import re
+import logging
+from collections import OrderedDict, deque
+from typing import Dict, List, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Một token là một từ (chữ/số, kể cả tiếng Việt có dấu) hoặc một ký tự dấu câu
+TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+ROOT_STATE = 0
+MAX_CACHED_MATCHERS = 8
+MAX_CACHED_WORDS = 100000
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word/punctuation tokens used by both keywords and CV text."""
+    return TOKEN_RE.findall(text.lower())
+
+
+class KeywordMatcher:
+    """
+    Automaton for one keyword map; finds every (category, keyword index) present in a text.
+    Distinct keywords are also numbered as terms (columns of a document-term matrix):
+    term_categories lists one (term, category position) pair per keyword of the map.
+    """
+
+    def __init__(self, keywords_map: Dict[str, List[str]]):
+        self.categories = list(keywords_map)
+        # goto[state]: token -> state kế tiếp; outputs[state]: các (category, index) kết thúc tại state
+        self.goto = [{}]
+        self.fail = [ROOT_STATE]
+        self.outputs = [()]
+        self.term_outputs = [()]
+        self.terms = []
+        self.term_categories = []
+        self.vocabulary = set()
+        self._word_cache = {}
+
+        term_of_state = {}
+        for position, (category, keywords) in enumerate(keywords_map.items()):
+            for index, keyword in enumerate(keywords):
+                tokens = tokenize(keyword)
+                if not tokens:
+                    continue
+                self.vocabulary.update(tokens)
+                state = ROOT_STATE
+                for token in tokens:
+                    next_state = self.goto[state].get(token)
+                    if next_state is None:
+                        next_state = len(self.goto)
+                        self.goto[state][token] = next_state
+                        self.goto.append({})
+                        self.fail.append(ROOT_STATE)
+                        self.outputs.append(())
+                        self.term_outputs.append(())
+                    state = next_state
+                self.outputs[state] += ((category, index),)
+                # Mỗi state kết thúc keyword là một term (vd 'python' dùng chung cho 2 category)
+                if state not in term_of_state:
+                    term_of_state[state] = len(self.terms)
+                    self.terms.append(keyword.lower())
+                    self.term_outputs[state] = (term_of_state[state],)
+                self.term_categories.append((term_of_state[state], position))
+
+        self._build_failure_links()
+        logger.debug(f"Built keyword automaton: {len(self.goto)} states for {len(self.categories)} categories")
+
+    def _build_failure_links(self):
+        # BFS: fail của một state là state ứng với hậu tố dài nhất cũng là tiền tố của một keyword
+        queue = deque(self.goto[ROOT_STATE].values())
+        while queue:
+            state = queue.popleft()
+            for token, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback != ROOT_STATE and token not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(token, ROOT_STATE)
+                # Keyword ngắn hơn kết thúc cùng chỗ (vd 'analysis' trong 'data analysis')
+                self.outputs[next_state] += self.outputs[self.fail[next_state]]
+                self.term_outputs[next_state] += self.term_outputs[self.fail[next_state]]
+
+    def new_matches(self) -> Dict[str, Set[int]]:
+        return {category: set() for category in self.categories}
+
+    def _word_symbols(self, word: str) -> Tuple:
+        """
+        Automaton symbols of one whitespace-separated word: keyword tokens (plural 's'
+        removed when only the singular is a keyword token) and None for any other token.
+        Returns () for a word without keyword tokens.
+        """
+        symbols = []
+        for token in TOKEN_RE.findall(word):
+            if token not in self.vocabulary:
+                # Số nhiều trong text: 'APIs' khớp 'api', 'dashboards' khớp 'dashboard'
+                token = token[:-1] if token[-1] == 's' and token[:-1] in self.vocabulary else None
+            if token is not None or not symbols or symbols[-1] is not None:
+                symbols.append(token)
+        if all(symbol is None for symbol in symbols):
+            return ()
+        return tuple(symbols)
+
+    def _walk(self, text: str, state: int) -> Tuple[List[int], int]:
+        """States reached in text at which at least one keyword ends, and the final state."""
+        goto = self.goto
+        fail = self.fail
+        outputs = self.outputs
+        word_cache = self._word_cache
+        if len(word_cache) > MAX_CACHED_WORDS:
+            word_cache.clear()
+
+        hits = []
+        # split() chạy trong C; mỗi từ chỉ tokenize bằng regex một lần (cache), vì từ vựng CV lặp lại nhiều
+        for word in text.lower().split():
+            symbols = word_cache.get(word)
+            if symbols is None:
+                symbols = word_cache[word] = self._word_symbols(word)
+            if not symbols:
+                # Từ không chứa token nào của keyword: về state gốc
+                state = ROOT_STATE
+                continue
+            for symbol in symbols:
+                if symbol is None:
+                    state = ROOT_STATE
+                    continue
+                while state != ROOT_STATE and symbol not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(symbol, ROOT_STATE)
+                if outputs[state]:
+                    hits.append(state)
+        return hits, state
+
+    def scan(self, text: str, matched: Dict[str, Set[int]], state: int = ROOT_STATE) -> int:
+        """
+        Feed text through the automaton, adding matched keyword indices to matched.
+
+        Args:
+            text: Text to scan (any case)
+            matched: Dict from new_matches(), updated in place
+            state: State returned by the previous scan, to continue a stream of chunks
+
+        Returns:
+            Automaton state after the text
+        """
+        hits, state = self._walk(text, state)
+        outputs = self.outputs
+        for hit in hits:
+            for category, index in outputs[hit]:
+                matched[category].add(index)
+        return state
+
+    def match(self, text: str) -> Dict[str, Set[int]]:
+        """Indices of the keywords of each category that occur in text."""
+        matched = self.new_matches()
+        self.scan(text, matched)
+        return matched
+
+    def match_terms(self, text: str) -> Set[int]:
+        """Term numbers (see terms) of the distinct keywords that occur in text."""
+        hits, _ = self._walk(text, ROOT_STATE)
+        term_outputs = self.term_outputs
+        return {term for hit in set(hits) for term in term_outputs[hit]}
+
+
+_matchers = OrderedDict()
+
+
+def _signature(keywords_map: Dict[str, List[str]]) -> Tuple:
+    return tuple((category, tuple(keywords)) for category, keywords in keywords_map.items())
+
+
+def get_keyword_matcher(keywords_map: Dict[str, List[str]]) -> KeywordMatcher:
+    """
+    Compiled matcher for keywords_map, cached by content: the automaton is rebuilt
+    only when the categories or keywords change (including in-place edits of the dict).
+    """
+    signature = _signature(keywords_map)
+    matcher = _matchers.get(signature)
+    if matcher is None:
+        matcher = KeywordMatcher(keywords_map)
+        _matchers[signature] = matcher
+        while len(_matchers) > MAX_CACHED_MATCHERS:
+            _matchers.popitem(last=False)
+    return matcher
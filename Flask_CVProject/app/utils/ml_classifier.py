@@ -0,0 +1,565 @@
+"""
+Trainable TF-IDF + linear (softmax regression) CV classifier
+Trained offline by train_classifier.py from extracted CV texts and recruiter-confirmed
+categories, saved as a few NumPy arrays and registered as an MLModel row.
+
+Artifacts of a model version (<ML_MODEL_DIR>/<version>/):
+    vocab.npy      sorted uint32 CRC32 hashes of the vocabulary terms (no Python dict of strings)
+    idf.npy        float32 idf weight per term
+    coef.npy       float32 (terms x classes) weights
+    intercept.npy  float32 (classes) bias
+    meta.json      class names/ids, training parameters, metrics
+
+Inference hashes the tokens of a CV, looks them up with np.searchsorted, and only
+touches the coef rows of the terms present in the text.
+
+The arrays are memory-mapped read-only: opening a model costs only the file headers and
+all web/worker processes share one copy in the OS page cache, whatever the vocabulary size.
+A published version directory is never modified; <ML_MODEL_DIR>/CURRENT names the version
+to serve and is replaced atomically, and running processes pick it up without a restart.
+"""
+
+import os
+import re
+import json
+import time
+import zlib
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Optional, List, Tuple, Dict, Iterable
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+logger = logging.getLogger(__name__)
+
+MODEL_TYPE = 'tfidf-logreg'
+KEYWORD_MODEL_TYPE = 'keywords'
+ARTIFACT_FILES = ('vocab.npy', 'idf.npy', 'coef.npy', 'intercept.npy')
+META_FILE = 'meta.json'
+# File chứa tên version đang active; train_classifier.py ghi lại để đổi model không cần restart
+POINTER_FILE = 'CURRENT'
+NO_MODEL = 'none'
+DEFAULT_POLL_SECONDS = 5
+
+# Flask_CVProject/instance/ml_models
+_PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_MODEL_DIR = os.path.join(_PROJECT_DIR, 'instance', 'ml_models')
+
+# Xác suất tối thiểu để dùng kết quả của model; thấp hơn thì quay về phân loại theo keyword
+DEFAULT_MIN_CONFIDENCE = 0.4
+
+MODEL_TOKEN_RE = re.compile(r"\w+")
+
+
+def hash_tokens(text: str) -> 'np.ndarray':
+    """uint32 CRC32 hashes of the lowercase word tokens of text (stable across processes)."""
+    tokens = MODEL_TOKEN_RE.findall(text.lower())
+    return np.fromiter((zlib.crc32(token.encode('utf-8')) for token in tokens), dtype=np.uint32, count=len(tokens))
+
+
+def _lookup(vocab: 'np.ndarray', hashes: 'np.ndarray') -> 'np.ndarray':
+    """Vocabulary positions of the hashes that are in vocab."""
+    if not len(vocab) or not len(hashes):
+        return np.empty(0, dtype=np.int64)
+    positions = np.searchsorted(vocab, hashes)
+    positions[positions >= len(vocab)] = 0
+    return positions[vocab[positions] == hashes]
+
+
+def tfidf_vector(term_ids: 'np.ndarray', idf: 'np.ndarray') -> Tuple['np.ndarray', 'np.ndarray']:
+    """
+    Sparse L2-normalized TF-IDF vector (sublinear tf) of a document.
+
+    Returns:
+        (term indices, float32 weights)
+    """
+    terms, counts = np.unique(term_ids, return_counts=True)
+    weights = ((1.0 + np.log(counts)) * idf[terms]).astype(np.float32)
+    norm = np.linalg.norm(weights)
+    if norm > 0:
+        weights /= norm
+    return terms, weights
+
+
+def _softmax(logits: 'np.ndarray') -> 'np.ndarray':
+    logits = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+class LinearTextModel:
+    """TF-IDF + softmax regression over a hashed vocabulary."""
+
+    def __init__(self, vocab, idf, coef, intercept, classes: List[str], meta: Optional[Dict] = None):
+        self.vocab = vocab
+        self.idf = idf
+        self.coef = coef
+        self.intercept = intercept
+        self.classes = classes
+        self.meta = meta or {}
+
+    @property
+    def version(self) -> Optional[str]:
+        return self.meta.get('version')
+
+    def predict_proba(self, text: str) -> 'np.ndarray':
+        """Class probabilities for one text."""
+        terms, weights = tfidf_vector(_lookup(self.vocab, hash_tokens(text)), self.idf)
+        # Chỉ đọc các hàng coef của term có trong CV
+        logits = weights @ self.coef[terms] + self.intercept
+        return _softmax(logits)
+
+    def predict(self, text: str) -> Tuple[Optional[str], float]:
+        """
+        Returns:
+            (class name, probability); (None, 0.0) for empty text
+        """
+        if not text or not isinstance(text, str):
+            return None, 0.0
+        probabilities = self.predict_proba(text)
+        best = int(probabilities.argmax())
+        return self.classes[best], float(probabilities[best])
+
+    def predict_many(self, texts: Iterable[str]) -> List[Tuple[Optional[str], float]]:
+        return [self.predict(text) for text in texts]
+
+
+# ---------------------------------------------------------------------------
+# Training
+# ---------------------------------------------------------------------------
+
+def build_vocabulary(documents: List['np.ndarray'], min_df: int, max_features: int) -> 'np.ndarray':
+    """Sorted hashes of the max_features terms with the highest document frequency (>= min_df)."""
+    document_frequency = Counter()
+    for hashes in documents:
+        document_frequency.update(np.unique(hashes).tolist())
+    frequent = [(df, term) for term, df in document_frequency.items() if df >= min_df]
+    frequent.sort(key=lambda item: (-item[0], item[1]))
+    return np.array(sorted(term for _, term in frequent[:max_features]), dtype=np.uint32)
+
+
+def _design_rows(documents: List['np.ndarray'], vocab: 'np.ndarray', idf: 'np.ndarray'):
+    return [tfidf_vector(_lookup(vocab, hashes), idf) for hashes in documents]
+
+
+def _densify(rows, size: int) -> 'np.ndarray':
+    matrix = np.zeros((len(rows), size), dtype=np.float32)
+    for i, (terms, weights) in enumerate(rows):
+        matrix[i, terms] = weights
+    return matrix
+
+
+def _fit_softmax(rows, labels: 'np.ndarray', n_features: int, n_classes: int, epochs: int,
+                 learning_rate: float, l2: float, batch_size: int, seed: int):
+    """Mini-batch Adam on the L2-regularized cross-entropy; rows are densified one batch at a time."""
+    rng = np.random.default_rng(seed)
+    coef = np.zeros((n_features, n_classes), dtype=np.float32)
+    intercept = np.zeros(n_classes, dtype=np.float32)
+    moments = [np.zeros_like(coef), np.zeros_like(coef), np.zeros_like(intercept), np.zeros_like(intercept)]
+    beta1, beta2, eps = 0.9, 0.999, 1e-8
+    step = 0
+
+    for epoch in range(epochs):
+        order = rng.permutation(len(rows))
+        total_loss = 0.0
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            x = _densify([rows[i] for i in batch], n_features)
+            y = labels[batch]
+            probabilities = _softmax(x @ coef + intercept)
+            total_loss -= float(np.log(probabilities[np.arange(len(batch)), y] + 1e-12).sum())
+
+            probabilities[np.arange(len(batch)), y] -= 1.0
+            probabilities /= len(batch)
+            gradients = (x.T @ probabilities + l2 * coef, probabilities.sum(axis=0))
+
+            step += 1
+            for param, gradient, m, v in ((coef, gradients[0], moments[0], moments[1]),
+                                          (intercept, gradients[1], moments[2], moments[3])):
+                m *= beta1
+                m += (1 - beta1) * gradient
+                v *= beta2
+                v += (1 - beta2) * gradient * gradient
+                m_hat = m / (1 - beta1 ** step)
+                v_hat = v / (1 - beta2 ** step)
+                param -= learning_rate * m_hat / (np.sqrt(v_hat) + eps)
+        logger.debug(f"epoch {epoch + 1}/{epochs}: loss {total_loss / max(len(rows), 1):.4f}")
+
+    return coef, intercept
+
+
+def train_model(texts: List[str], labels: List[str], min_df: int = 2, max_features: int = 20000,
+                epochs: int = 30, learning_rate: float = 0.05, l2: float = 1e-4,
+                batch_size: int = 256, seed: int = 42) -> LinearTextModel:
+    """
+    Fit a TF-IDF + softmax regression model.
+
+    Args:
+        texts: Training documents
+        labels: Class name of each document
+        min_df: Minimum number of documents a term must occur in
+        max_features: Vocabulary size cap (most frequent terms are kept)
+
+    Returns:
+        LinearTextModel (meta holds the training parameters)
+    """
+    if not HAS_NUMPY:
+        raise RuntimeError("Training the classifier requires NumPy")
+
+    classes = sorted(set(labels))
+    class_index = {name: i for i, name in enumerate(classes)}
+    y = np.array([class_index[label] for label in labels], dtype=np.int64)
+
+    # Giữ mảng hash thay vì text: ít bộ nhớ hơn và chỉ tokenize một lần
+    documents = [hash_tokens(text) for text in texts]
+    vocab = build_vocabulary(documents, min_df, max_features)
+    if not len(vocab):
+        raise ValueError("Empty vocabulary: not enough training text (lower min_df?)")
+
+    document_frequency = np.zeros(len(vocab), dtype=np.float64)
+    for hashes in documents:
+        document_frequency[np.unique(_lookup(vocab, hashes))] += 1
+    idf = (np.log((1 + len(documents)) / (1 + document_frequency)) + 1.0).astype(np.float32)
+
+    rows = _design_rows(documents, vocab, idf)
+    coef, intercept = _fit_softmax(rows, y, len(vocab), len(classes), epochs, learning_rate, l2, batch_size, seed)
+
+    meta = {
+        'type': MODEL_TYPE,
+        'classes': classes,
+        'n_documents': len(texts),
+        'n_features': int(len(vocab)),
+        'params': {
+            'min_df': min_df, 'max_features': max_features, 'epochs': epochs,
+            'learning_rate': learning_rate, 'l2': l2, 'batch_size': batch_size, 'seed': seed
+        }
+    }
+    return LinearTextModel(vocab, idf, coef, intercept, classes, meta)
+
+
+def evaluate(model: LinearTextModel, texts: List[str], labels: List[str]) -> Dict:
+    """Accuracy plus macro-averaged and per-class precision/recall/F1."""
+    predictions = [model.predict(text)[0] for text in texts]
+    per_class = {}
+    for name in model.classes:
+        tp = sum(1 for p, t in zip(predictions, labels) if p == name and t == name)
+        fp = sum(1 for p, t in zip(predictions, labels) if p == name and t != name)
+        fn = sum(1 for p, t in zip(predictions, labels) if p != name and t == name)
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / (tp + fn) if tp + fn else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        per_class[name] = {'precision': precision, 'recall': recall, 'f1': f1, 'support': tp + fn}
+
+    present = [stats for stats in per_class.values() if stats['support']]
+    count = len(present) or 1
+    return {
+        'accuracy': sum(1 for p, t in zip(predictions, labels) if p == t) / len(labels) if labels else 0.0,
+        'precision': sum(s['precision'] for s in present) / count,
+        'recall': sum(s['recall'] for s in present) / count,
+        'f1': sum(s['f1'] for s in present) / count,
+        'support': len(labels),
+        'per_class': per_class
+    }
+
+
+def stratified_split(labels: List[str], test_fraction: float, seed: int = 42) -> Tuple[List[int], List[int]]:
+    """Train/test indices with about test_fraction of every class (classes with < 2 samples stay in train)."""
+    rng = np.random.default_rng(seed)
+    by_class = {}
+    for i, label in enumerate(labels):
+        by_class.setdefault(label, []).append(i)
+    train, test = [], []
+    for indices in by_class.values():
+        indices = [indices[i] for i in rng.permutation(len(indices))]
+        n_test = int(round(len(indices) * test_fraction)) if len(indices) >= 2 else 0
+        test.extend(indices[:n_test])
+        train.extend(indices[n_test:])
+    return sorted(train), sorted(test)
+
+
+# ---------------------------------------------------------------------------
+# Artifacts
+# ---------------------------------------------------------------------------
+
+def model_path(model_dir: str, version: str) -> str:
+    return os.path.join(model_dir, version)
+
+
+def save_model(model: LinearTextModel, directory: str) -> None:
+    """
+    Write the arrays and meta.json of a model version (directory must not exist yet).
+    Files are written to a temporary sibling directory that is renamed into place, so a
+    process never maps a half-written version.
+    """
+    if os.path.exists(directory):
+        raise FileExistsError(f"Model directory {directory} already exists")
+    staging = f"{directory}.tmp-{os.getpid()}"
+    os.makedirs(staging)
+    try:
+        np.save(os.path.join(staging, 'vocab.npy'), model.vocab)
+        np.save(os.path.join(staging, 'idf.npy'), model.idf)
+        np.save(os.path.join(staging, 'coef.npy'), np.ascontiguousarray(model.coef, dtype=np.float32))
+        np.save(os.path.join(staging, 'intercept.npy'), model.intercept)
+        with open(os.path.join(staging, META_FILE), 'w', encoding='utf-8') as f:
+            json.dump(model.meta, f, ensure_ascii=False, indent=2)
+        os.rename(staging, directory)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+
+def load_model(directory: str, mmap: bool = True) -> LinearTextModel:
+    """
+    Open a saved model version.
+
+    Args:
+        directory: Version directory written by save_model
+        mmap: Memory-map the arrays read-only instead of reading them into process memory.
+              Loading is then almost free, only the pages of the terms a CV contains are
+              read, and every web/worker process shares the same pages of the OS page cache.
+    """
+    with open(os.path.join(directory, META_FILE), 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    mmap_mode = 'r' if mmap else None
+    arrays = [np.load(os.path.join(directory, name), mmap_mode=mmap_mode) for name in ARTIFACT_FILES]
+    return LinearTextModel(*arrays, classes=meta['classes'], meta=meta)
+
+
+def new_version() -> str:
+    return f"{MODEL_TYPE}-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
+
+
+def read_pointer(model_dir: str) -> Optional[str]:
+    """Version named by the CURRENT pointer of model_dir, None when there is no pointer."""
+    try:
+        with open(os.path.join(model_dir, POINTER_FILE), 'r', encoding='utf-8') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def write_pointer(model_dir: str, version: str) -> None:
+    """
+    Point CURRENT at version (or NO_MODEL to use keyword classification only).
+    Written to a temporary file and renamed over the old pointer, so readers see
+    either the old or the new version, never a partial file.
+    """
+    os.makedirs(model_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix=f".{POINTER_FILE}.", dir=model_dir)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(version + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, os.path.join(model_dir, POINTER_FILE))
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def _pointer_time(model_dir: str) -> datetime:
+    """When CURRENT was last written (naive UTC, like the timestamps in the database)."""
+    mtime = os.path.getmtime(os.path.join(model_dir, POINTER_FILE))
+    return datetime.fromtimestamp(mtime, timezone.utc).replace(tzinfo=None)
+
+
+# ---------------------------------------------------------------------------
+# Active model of the running app
+# ---------------------------------------------------------------------------
+
+class ActiveModel:
+    """A loaded model together with the id of its MLModel row and when it started serving (UTC)."""
+
+    def __init__(self, model: LinearTextModel, mlmodel_id: int, version: str,
+                 activated_at: Optional[datetime] = None):
+        self.model = model
+        self.mlmodel_id = mlmodel_id
+        self.version = version
+        self.activated_at = activated_at
+
+
+_UNRESOLVED = object()
+
+
+class ModelWatcher:
+    """
+    Active model of one app, swapped in place when the model to use changes.
+
+    Which version is active, in order: ML_MODEL_VERSION (pinned), the CURRENT pointer
+    in ML_MODEL_DIR, else the newest registered model whose artifacts exist.
+    The pointer is re-read at most every ML_MODEL_POLL_SECONDS, so train_classifier.py
+    (or --activate for a rollback) switches running web and worker processes without a
+    restart. Requests in flight keep the ActiveModel they already got; the old version's
+    mapping is released once nothing references it.
+    """
+
+    def __init__(self, config):
+        self.enabled = HAS_NUMPY and config.get('ML_CLASSIFIER_ENABLED', True)
+        self.model_dir = config.get('ML_MODEL_DIR') or DEFAULT_MODEL_DIR
+        self.pinned = config.get('ML_MODEL_VERSION')
+        poll_seconds = config.get('ML_MODEL_POLL_SECONDS')
+        self.poll_seconds = DEFAULT_POLL_SECONDS if poll_seconds is None else poll_seconds
+        self._active = None
+        self._wanted = _UNRESOLVED
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def current(self) -> Optional[ActiveModel]:
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= self.poll_seconds:
+            # Chỉ một thread kiểm tra; các thread khác dùng model hiện tại, không chờ
+            # (trừ lần đầu, khi chưa có model nào để dùng)
+            if self._lock.acquire(blocking=self._checked_at is None):
+                try:
+                    if self._checked_at is None or now - self._checked_at >= self.poll_seconds:
+                        self._checked_at = now
+                        self._refresh()
+                except Exception as e:
+                    logger.error(f"Could not refresh the active classifier model: {str(e)}")
+                finally:
+                    self._lock.release()
+        return self._active
+
+    def _refresh(self) -> None:
+        wanted = self.pinned or read_pointer(self.model_dir)
+        if wanted == self._wanted:
+            return
+        if wanted == NO_MODEL:
+            active = None
+        else:
+            active = self._load(wanted)
+            if active is None and wanted is not None:
+                # Version chưa load được: giữ model cũ, lần kiểm tra sau thử lại
+                return
+            if active is not None and not self.pinned and wanted is not None:
+                active.activated_at = max(active.activated_at or datetime.min, _pointer_time(self.model_dir))
+        previous = self._active
+        # Gán một tham chiếu: request đang chạy vẫn dùng ActiveModel cũ đến khi xong
+        self._active = active
+        self._wanted = wanted
+        if previous is not None:
+            logger.info(f"Classifier model switched: {previous.version} -> {active.version if active else NO_MODEL}")
+
+    def _load(self, version: Optional[str]) -> Optional[ActiveModel]:
+        from app.models import MLModel
+
+        query = MLModel.query.filter(MLModel.type == MODEL_TYPE)
+        if version:
+            query = query.filter(MLModel.version == version)
+        rows = query.order_by(MLModel.id.desc()).limit(5).all()
+        if version and not rows:
+            logger.warning(f"Model version {version} is not registered in ml_models")
+        for row in rows:
+            directory = model_path(self.model_dir, row.version)
+            if not os.path.isfile(os.path.join(directory, META_FILE)):
+                logger.warning(f"Artifacts of model {row.version} not found in {self.model_dir}")
+                continue
+            try:
+                model = load_model(directory)
+            except Exception as e:
+                logger.error(f"Could not load model {row.version}: {str(e)}")
+                continue
+            logger.info(f"Loaded classifier model {row.version} ({model.meta.get('n_features')} terms, "
+                        f"{len(model.classes)} classes, memory-mapped)")
+            return ActiveModel(model, row.id, row.version, row.training_date)
+        return None
+
+
+def get_active_model() -> Optional[ActiveModel]:
+    """
+    Active model of the current app (see ModelWatcher), None when no trained model
+    is available or the classifier is disabled.
+    """
+    from flask import current_app
+
+    watcher = current_app.extensions.get('ml_model')
+    if watcher is None:
+        watcher = current_app.extensions.setdefault('ml_model', ModelWatcher(current_app.config))
+    return watcher.current()
+
+
+def keyword_model_version(keywords_map: Dict[str, List[str]]) -> str:
+    """Version string identifying a keyword map; changes whenever a category or keyword changes."""
+    payload = json.dumps(list(keywords_map.items()), ensure_ascii=False)
+    return f"{KEYWORD_MODEL_TYPE}-{hashlib.sha256(payload.encode('utf-8')).hexdigest()[:12]}"
+
+
+def get_keyword_model_id(keywords_map: Dict[str, List[str]]) -> Optional[int]:
+    """
+    Id of the MLModel row representing the keyword classifier with this keyword map,
+    registered on first use, so keyword predictions in ClassificationLog are versioned too.
+    The row is registered in its own short transaction (not the caller's, which may be
+    rolled back), and an id is cached only once the row is known to be committed.
+    """
+    from flask import current_app
+    from sqlalchemy.exc import IntegrityError
+    from sqlalchemy.orm import Session
+    from app.extensions import db
+    from app.models import MLModel
+
+    version = keyword_model_version(keywords_map)
+    known = current_app.extensions.setdefault('keyword_model_ids', {})
+    if version in known:
+        return known[version]
+
+    try:
+        with Session(db.engine) as session:
+            row_id = session.query(MLModel.id).filter_by(version=version).scalar()
+            if row_id is None:
+                row = MLModel(
+                    version=version,
+                    type=KEYWORD_MODEL_TYPE,
+                    training_date=datetime.utcnow(),
+                    metrics=json.dumps({'categories': len(keywords_map),
+                                        'keywords': sum(len(keywords) for keywords in keywords_map.values())})
+                )
+                session.add(row)
+                try:
+                    session.commit()
+                    row_id = row.id
+                except IntegrityError:
+                    # Worker khác vừa đăng ký cùng version (version là unique)
+                    session.rollback()
+                    row_id = session.query(MLModel.id).filter_by(version=version).scalar()
+    except Exception as e:
+        logger.error(f"Could not register keyword classifier version {version}: {str(e)}")
+        return None
+
+    if row_id is not None:
+        known[version] = row_id
+    return row_id
+
+
+def register_keyword_model(app) -> Optional[int]:
+    """
+    Register the current CATEGORY_KEYWORDS version once at process startup (web and worker
+    entry points), outside any request or job transaction. Sets app.extensions['keyword_model_registered']
+    only on success; until then the app retries at the start of each request (see create_app).
+    
+    Args:
+        app: Flask app whose database holds the MLModel rows
+        
+    Returns:
+        Id of the keyword MLModel row, or None if it could not be registered
+    """
+    from app.utils.classifier import CATEGORY_KEYWORDS
+    
+    with app.app_context():
+        keyword_model_id = get_keyword_model_id(CATEGORY_KEYWORDS)
+    if keyword_model_id is None:
+        logger.warning("Keyword classifier version could not be registered, will retry")
+    else:
+        app.extensions['keyword_model_registered'] = True
+    return keyword_model_id
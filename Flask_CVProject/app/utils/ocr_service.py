@@ -0,0 +1,358 @@
+"""
+Out-of-process OCR service
+EasyOCR readers (torch models, hundreds of MB) live in dedicated worker processes
+instead of every web worker. Each worker is a fresh interpreter running
+ocr_worker_process.py (no app imports); jobs are sent over an authenticated local
+multiprocessing connection, and a job that exceeds its timeout gets its worker killed
+and restarted, which works from any thread (unlike signal.SIGALRM).
+
+Two modes:
+- Shared server (recommended deployment): run `python ocr_server.py` once per host and set
+  OCR_SERVICE_ADDRESS (e.g. 127.0.0.1:6010) so web workers only hold a lightweight OCRClient
+  and the models are loaded once.
+- Local pool (fallback when OCR_SERVICE_ADDRESS is unset, e.g. development): each process
+  that needs OCR owns a small OCRWorkerPool with its own copy of the models; a warning is logged.
+  multiprocessing connections unpickle what they receive, so the server and its clients
+  must share a secret: OCR_SERVICE_AUTHKEY, or a key file named by OCR_SERVICE_AUTHKEY_FILE
+  (`python ocr_server.py --generate-authkey` creates one). There is no default key.
+"""
+
+import os
+import sys
+import queue
+import secrets
+import logging
+import threading
+import subprocess
+from multiprocessing.connection import Listener, Client
+from typing import Optional, List, Any
+
+from app.utils.ocr_worker_process import ALLOWED_OPS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LANGUAGES = ['en', 'vi']
+DEFAULT_TIMEOUT = 30  # Giây cho mỗi job OCR
+STARTUP_TIMEOUT = 300  # Load model lần đầu có thể mất vài phút (tải weights)
+
+OCR_SERVICE_ADDRESS = os.environ.get('OCR_SERVICE_ADDRESS')  # "host:port" hoặc đường dẫn unix socket
+OCR_SERVICE_AUTHKEY_FILE = os.environ.get('OCR_SERVICE_AUTHKEY_FILE')
+MIN_AUTHKEY_LENGTH = 16
+OCR_POOL_SIZE = int(os.environ.get('OCR_POOL_SIZE') or 1)
+OCR_USE_GPU = (os.environ.get('OCR_USE_GPU') or 'false').lower() in ('1', 'true', 'yes')
+
+# Worker chạy bằng interpreter mới thay vì multiprocessing: fork một web worker đa luồng
+# (đã import torch) dễ bị deadlock, còn spawn/forkserver import lại module __main__ của
+# process cha trong worker (vd run.py gọi create_app() ở top-level)
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ocr_worker_process.py')
+
+
+class OCRUnavailableError(RuntimeError):
+    """OCR backend could not be started or reached."""
+
+
+class OCRTimeoutError(TimeoutError):
+    """An OCR job exceeded its timeout; the worker that ran it was restarted."""
+
+
+def load_authkey(path: Optional[str] = None) -> Optional[bytes]:
+    """
+    Shared secret of the OCR server: OCR_SERVICE_AUTHKEY, else the content of the key file
+    (path or OCR_SERVICE_AUTHKEY_FILE). None when neither is configured.
+
+    Raises:
+        OCRUnavailableError: the key is shorter than MIN_AUTHKEY_LENGTH
+    """
+    key = os.environ.get('OCR_SERVICE_AUTHKEY')
+    path = path or OCR_SERVICE_AUTHKEY_FILE
+    if not key and path:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                key = f.read().strip()
+        except FileNotFoundError:
+            key = None
+    if not key:
+        return None
+    if len(key) < MIN_AUTHKEY_LENGTH:
+        raise OCRUnavailableError(f"OCR service authkey must be at least {MIN_AUTHKEY_LENGTH} characters")
+    return key.encode('utf-8')
+
+
+def generate_authkey_file(path: str) -> bytes:
+    """Create a key file with a random key (readable by the owner only) unless it exists; returns the key."""
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        return load_authkey(path)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(secrets.token_hex(32))
+    logger.info(f"Generated OCR service authkey in {path}")
+    return load_authkey(path)
+
+
+def parse_address(address: str):
+    """Parse "host:port" into a tuple, anything else is treated as a unix socket path."""
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit():
+        return (host or '127.0.0.1', int(port))
+    return address
+
+
+class OCRWorker:
+    """A single OCR worker process owning one EasyOCR reader."""
+
+    def __init__(self, languages: Optional[List[str]] = None, gpu: bool = OCR_USE_GPU):
+        self.languages = list(languages or DEFAULT_LANGUAGES)
+        self.gpu = gpu
+        self._process = None
+        self._conn = None
+
+    def _start(self) -> None:
+        authkey = secrets.token_bytes(32)
+        process = subprocess.Popen(
+            [sys.executable, WORKER_SCRIPT, ','.join(self.languages), '1' if self.gpu else '0'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE
+        )
+        logger.info(f"Starting OCR worker process {process.pid} with languages: {self.languages}")
+        try:
+            # Authkey một lần qua stdin (không lộ trên command line), worker trả về port đang listen
+            process.stdin.write(authkey.hex().encode('ascii') + b'\n')
+            process.stdin.close()
+            port = process.stdout.readline().strip()
+            process.stdout.close()
+            parent_conn = Client(('127.0.0.1', int(port)), authkey=authkey)
+        except (OSError, ValueError) as e:
+            process.kill()
+            process.wait()
+            raise OCRUnavailableError(f"OCR worker process failed to start: {str(e)}")
+
+        if not parent_conn.poll(STARTUP_TIMEOUT):
+            parent_conn.close()
+            process.kill()
+            process.wait()
+            raise OCRUnavailableError(f"OCR worker did not start within {STARTUP_TIMEOUT}s")
+
+        try:
+            status, message = parent_conn.recv()
+        except (EOFError, OSError) as e:
+            status, message = 'error', f"OCR worker process exited during startup: {str(e)}"
+        if status != 'ready':
+            parent_conn.close()
+            process.wait()
+            raise OCRUnavailableError(message)
+
+        self._process = process
+        self._conn = parent_conn
+        logger.info(f"OCR worker process {process.pid} ready")
+
+    def _kill(self) -> None:
+        if self._process is not None:
+            self._process.kill()
+            self._process.wait()
+        if self._conn is not None:
+            self._conn.close()
+        self._process = None
+        self._conn = None
+
+    def call(self, op: str, payload: Any, timeout: float = DEFAULT_TIMEOUT, **kwargs) -> Any:
+        """
+        Run a reader method (see ALLOWED_OPS) in the worker process.
+
+        Args:
+            op: Reader method name, e.g. 'readtext' or 'readtext_batched'
+            payload: Image input for the method (file path, NumPy array, bytes or a list of them)
+            timeout: Seconds before the job is abandoned and the worker restarted
+            **kwargs: Passed through to the reader method
+
+        Returns:
+            The reader method's result
+        """
+        if self._process is None or self._process.poll() is not None:
+            self._kill()
+            self._start()
+
+        try:
+            self._conn.send((op, payload, kwargs))
+            finished = self._conn.poll(timeout)
+            if finished:
+                status, result = self._conn.recv()
+        except (EOFError, OSError) as e:
+            # Worker chết giữa chừng (OOM...) - lần gọi sau sẽ khởi động lại
+            self._kill()
+            raise OCRUnavailableError(f"OCR worker process died: {str(e)}")
+
+        if not finished:
+            logger.warning(f"OCR job exceeded {timeout}s, killing worker process {self._process.pid}")
+            self._kill()
+            raise OCRTimeoutError(f"OCR processing timeout after {timeout}s")
+
+        if status != 'ok':
+            raise RuntimeError(result)
+        return result
+
+    def readtext(self, image: Any, timeout: float = DEFAULT_TIMEOUT, **kwargs) -> list:
+        """Run reader.readtext; returns a list of (bbox, text, confidence)."""
+        return self.call('readtext', image, timeout=timeout, **kwargs)
+
+    def readtext_batched(self, images: list, timeout: float = DEFAULT_TIMEOUT, **kwargs) -> list:
+        """Run reader.readtext_batched; returns one result list per image."""
+        return self.call('readtext_batched', images, timeout=timeout, **kwargs)
+
+    def close(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.send(None)
+            except OSError:
+                pass
+        if self._process is not None:
+            try:
+                self._process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                pass
+        self._kill()
+
+
+class OCRWorkerPool:
+    """A fixed-size pool of OCR worker processes, safe to share between threads."""
+
+    def __init__(self, size: int = OCR_POOL_SIZE, languages: Optional[List[str]] = None):
+        self.size = max(1, size)
+        self._workers = queue.Queue()
+        self._all_workers = []
+        for _ in range(self.size):
+            worker = OCRWorker(languages)
+            self._all_workers.append(worker)
+            self._workers.put(worker)
+
+    def call(self, op: str, payload: Any, timeout: float = DEFAULT_TIMEOUT, **kwargs) -> Any:
+        worker = self._workers.get()
+        try:
+            return worker.call(op, payload, timeout=timeout, **kwargs)
+        finally:
+            self._workers.put(worker)
+
+    def readtext(self, image: Any, timeout: float = DEFAULT_TIMEOUT, **kwargs) -> list:
+        return self.call('readtext', image, timeout=timeout, **kwargs)
+
+    def readtext_batched(self, images: list, timeout: float = DEFAULT_TIMEOUT, **kwargs) -> list:
+        return self.call('readtext_batched', images, timeout=timeout, **kwargs)
+
+    def close(self) -> None:
+        for worker in self._all_workers:
+            worker.close()
+
+
+class OCRClient:
+    """Client for a shared OCR server started with ocr_server.py."""
+
+    def __init__(self, address: str = OCR_SERVICE_ADDRESS, authkey: Optional[bytes] = None):
+        self.address = parse_address(address)
+        self.authkey = authkey
+
+    def call(self, op: str, payload: Any, timeout: float = DEFAULT_TIMEOUT, **kwargs) -> Any:
+        if self.authkey is None:
+            # Đọc khi cần: key file có thể được tạo sau khi process này khởi động
+            self.authkey = load_authkey()
+            if self.authkey is None:
+                raise OCRUnavailableError("OCR_SERVICE_AUTHKEY or OCR_SERVICE_AUTHKEY_FILE must be set "
+                                          "to use the shared OCR server")
+        try:
+            conn = Client(self.address, authkey=self.authkey)
+        except (OSError, EOFError) as e:
+            raise OCRUnavailableError(f"Cannot connect to OCR server at {self.address}: {str(e)}")
+
+        try:
+            conn.send((op, payload, kwargs, timeout))
+            # Server tự kill worker khi quá timeout; chờ thêm một chút cho round-trip
+            finished = conn.poll(timeout + 5)
+            if finished:
+                status, result = conn.recv()
+        except (EOFError, OSError) as e:
+            raise OCRUnavailableError(f"OCR server connection lost: {str(e)}")
+        finally:
+            conn.close()
+
+        if not finished:
+            raise OCRTimeoutError(f"OCR processing timeout after {timeout}s")
+        if status == 'timeout':
+            raise OCRTimeoutError(result)
+        if status != 'ok':
+            raise RuntimeError(result)
+        return result
+
+    def readtext(self, image: Any, timeout: float = DEFAULT_TIMEOUT, **kwargs) -> list:
+        return self.call('readtext', image, timeout=timeout, **kwargs)
+
+    def readtext_batched(self, images: list, timeout: float = DEFAULT_TIMEOUT, **kwargs) -> list:
+        return self.call('readtext_batched', images, timeout=timeout, **kwargs)
+
+
+def _handle_connection(conn, pool: OCRWorkerPool) -> None:
+    try:
+        op, payload, kwargs, timeout = conn.recv()
+        if op not in ALLOWED_OPS:
+            conn.send(('error', f"Unknown OCR operation: {op}"))
+            return
+        try:
+            conn.send(('ok', pool.call(op, payload, timeout=timeout, **kwargs)))
+        except OCRTimeoutError as e:
+            conn.send(('timeout', str(e)))
+        except Exception as e:
+            conn.send(('error', str(e)))
+    except (EOFError, OSError):
+        pass
+    finally:
+        conn.close()
+
+
+def serve(address: str, authkey: Optional[bytes] = None, pool_size: int = OCR_POOL_SIZE,
+          languages: Optional[List[str]] = None) -> None:
+    """
+    Run a shared OCR server: one connection per job, dispatched to a worker pool.
+    Blocks until interrupted.
+
+    Raises:
+        OCRUnavailableError: no authkey given or configured (see load_authkey)
+    """
+    authkey = authkey or load_authkey()
+    if not authkey:
+        raise OCRUnavailableError("Refusing to start the OCR server without OCR_SERVICE_AUTHKEY "
+                                  "or OCR_SERVICE_AUTHKEY_FILE")
+    pool = OCRWorkerPool(pool_size, languages)
+    listener = Listener(parse_address(address), authkey=authkey)
+    logger.info(f"OCR server listening on {address} with {pool.size} worker(s)")
+    try:
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception as e:
+                # Sai authkey hoặc client ngắt kết nối khi handshake
+                logger.warning(f"Rejected OCR connection: {str(e)}")
+                continue
+            threading.Thread(target=_handle_connection, args=(conn, pool), daemon=True).start()
+    finally:
+        listener.close()
+        pool.close()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_ocr_backend(languages: Optional[List[str]] = None):
+    """
+    Get the process-wide OCR backend: an OCRClient if OCR_SERVICE_ADDRESS is set,
+    otherwise (with a warning) a local OCRWorkerPool (created lazily, models load on first job).
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if OCR_SERVICE_ADDRESS:
+                logger.info(f"Using shared OCR server at {OCR_SERVICE_ADDRESS}")
+                _backend = OCRClient(OCR_SERVICE_ADDRESS)
+            else:
+                logger.warning(f"OCR_SERVICE_ADDRESS is not set: process {os.getpid()} starts its own OCR worker "
+                               f"pool with its own copy of the EasyOCR models. Run ocr_server.py and set "
+                               f"OCR_SERVICE_ADDRESS to load them once per host")
+                _backend = OCRWorkerPool(OCR_POOL_SIZE, languages)
+        return _backend
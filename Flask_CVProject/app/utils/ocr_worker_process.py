@@ -0,0 +1,71 @@
+"""
+OCR worker process, started by ocr_service.OCRWorker as a standalone script
+(python ocr_worker_process.py <languages> <gpu>) in a fresh interpreter.
+Only the standard library and easyocr are imported here - never the app package or the
+parent's __main__ module - so a worker never imports or builds the Flask app.
+
+Protocol: the parent writes a one-time authkey (hex) on stdin, the worker listens on a
+random localhost port, prints the port on stdout and accepts the parent's connection.
+"""
+
+import sys
+import os
+import logging
+from multiprocessing.connection import Listener
+
+logger = logging.getLogger('ocr_worker_process')
+
+# Các method của easyocr.Reader được phép gọi qua worker / server
+ALLOWED_OPS = ('readtext', 'readtext_batched')
+
+
+def serve_jobs(conn, languages, gpu):
+    """Build the EasyOCR reader once, then serve readtext jobs until the parent disconnects."""
+    try:
+        import easyocr
+        reader = easyocr.Reader(languages, gpu=gpu)
+    except Exception as e:
+        conn.send(('error', f"Failed to initialize EasyOCR reader: {str(e)}"))
+        return
+    conn.send(('ready', None))
+
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            return
+        if job is None:
+            return
+
+        op, payload, kwargs = job
+        try:
+            if op in ALLOWED_OPS:
+                conn.send(('ok', getattr(reader, op)(payload, **kwargs)))
+            else:
+                conn.send(('error', f"Unknown OCR operation: {op}"))
+        except Exception as e:
+            conn.send(('error', str(e)))
+
+
+def main():
+    languages = sys.argv[1].split(',')
+    gpu = sys.argv[2] == '1'
+    authkey = bytes.fromhex(sys.stdin.readline().strip())
+
+    with Listener(('127.0.0.1', 0), authkey=authkey) as listener:
+        print(listener.address[1], flush=True)
+        # Từ đây stdout của worker (vd tiến trình tải model của easyocr) chuyển sang stderr,
+        # process cha chỉ đọc dòng port ở trên
+        os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+        conn = listener.accept()
+
+    with conn:
+        serve_jobs(conn, languages, gpu)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    try:
+        main()
+    except KeyboardInterrupt:
+        pass
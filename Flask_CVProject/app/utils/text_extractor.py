@@ -4,8 +4,12 @@ Supports PDF, DOCX, TXT, and Image (JPG, PNG, JPEG) file formats
 """
 
 import os
+import mmap
+import codecs
 import logging
-from typing import Optional
+from typing import Optional, List, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 try:
     import PyPDF2
@@ -20,21 +24,124 @@ except ImportError:
     HAS_PDFPLUMBER = False
 
 try:
-    from docx import Document
-    HAS_DOCX = True
+    from charset_normalizer import from_bytes as detect_charset
+    HAS_CHARSET_NORMALIZER = True
 except ImportError:
-    HAS_DOCX = False
+    HAS_CHARSET_NORMALIZER = False
+
+from app.utils.extraction_cache import hash_file, get_extraction_cache
+from app.utils.docx_xml import iter_docx_blocks
 
 logger = logging.getLogger(__name__)
 
+# Tăng version khi thay đổi logic extract để cache cũ tự động bị bỏ qua
+EXTRACTOR_VERSION = '4'
+
+SUPPORTED_FILE_TYPES = {'pdf', 'docx', 'doc', 'txt', 'jpg', 'jpeg', 'png'}
+
+# PDF nhiều trang được chia page range cho process pool; dưới ngưỡng này vẫn chạy 1 process
+PDF_PARALLEL_MIN_PAGES = int(os.environ.get('PDF_PARALLEL_MIN_PAGES') or 8)
+PDF_PARALLEL_WORKERS = int(os.environ.get('PDF_PARALLEL_WORKERS') or min(4, os.cpu_count() or 1))
+
+# Trang PDF có ít hơn số ký tự này được coi là trang scan (không có text layer) và được OCR
+PDF_OCR_MIN_PAGE_CHARS = int(os.environ.get('PDF_OCR_MIN_PAGE_CHARS') or 20)
+PDF_OCR_ENABLED = (os.environ.get('PDF_OCR_ENABLED') or 'true').lower() in ('1', 'true', 'yes')
+
+# TXT: đọc một lần qua mmap, phát hiện encoding từ một mẫu đầu file
+TXT_MAX_BYTES = int(os.environ.get('TXT_MAX_BYTES') or 10 * 1024 * 1024)  # 10MB, phần sau bị bỏ qua
+TXT_DETECT_SAMPLE_BYTES = 64 * 1024
+TXT_FALLBACK_ENCODING = 'cp1252'
+# Khi charset-normalizer đánh giá ngang nhau (mẫu ngắn), ưu tiên bảng mã Windows phương Tây / tiếng Việt
+TXT_PREFERRED_ENCODINGS = ('cp1252', 'cp1258')
+
+# BOM -> codec tự bỏ BOM khi decode. UTF-32 phải đứng trước UTF-16 (BOM UTF-32 LE bắt đầu bằng BOM UTF-16 LE)
+_TEXT_BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+_pdf_pool = None
+
+
+class PartialText(str):
+    """
+    Extracted text with some parts missing (e.g. a scanned page whose OCR timed out).
+    Returned like a normal string, but not stored in the whole-file extraction cache
+    so the next extraction retries the missing parts.
+    """
+    incomplete = True
+
+
+class DecodedText(str):
+    """Text decoded from a TXT file, with the encoding detected while reading it."""
+
+    def __new__(cls, value: str, encoding: Optional[str]):
+        text = super().__new__(cls, value)
+        text.encoding = encoding
+        return text
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    """Get or create the shared process pool used for page-parallel PDF extraction."""
+    global _pdf_pool
+    if _pdf_pool is None:
+        _pdf_pool = ProcessPoolExecutor(max_workers=PDF_PARALLEL_WORKERS)
+    return _pdf_pool
+
+
+def _extract_pdf_page_range(file_path: str, start: int, end: int) -> List[str]:
+    """
+    Extract text from pages [start, end) of a PDF with pdfplumber.
+    Runs inside a pool worker, so it must stay a module-level function.
+    """
+    with pdfplumber.open(file_path, pages=list(range(start + 1, end + 1))) as pdf:
+        return [page.extract_text() or '' for page in pdf.pages]
+
+
+def _split_page_ranges(page_count: int, parts: int) -> List[tuple]:
+    """Split page_count pages into at most `parts` contiguous (start, end) ranges."""
+    parts = max(1, min(parts, page_count))
+    size, remainder = divmod(page_count, parts)
+    ranges = []
+    start = 0
+    for i in range(parts):
+        end = start + size + (1 if i < remainder else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def _extract_pdf_pages_parallel(file_path: str, page_count: int, workers: int) -> List[str]:
+    """Extract all pages across the process pool and reassemble them in page order."""
+    global _pdf_pool
+    ranges = _split_page_ranges(page_count, workers)
+    try:
+        pool = _get_pdf_pool()
+        futures = [pool.submit(_extract_pdf_page_range, file_path, start, end) for start, end in ranges]
+        pages_text = []
+        for future in futures:
+            pages_text.extend(future.result())
+        return pages_text
+    except BrokenProcessPool:
+        # Worker bị kill (OOM...) - bỏ pool cũ để lần sau tạo lại
+        _pdf_pool = None
+        raise
+
 
-def extract_text_from_pdf(file_path: str) -> Optional[str]:
+def extract_text_from_pdf(file_path: str, parallel: Optional[bool] = None) -> Optional[str]:
     """
     Extract text from PDF file.
     Tries pdfplumber first (better), falls back to PyPDF2.
+    PDFs with at least PDF_PARALLEL_MIN_PAGES pages are split into page ranges
+    and extracted across a process pool.
     
     Args:
         file_path: Path to PDF file
+        parallel: Force page-parallel extraction on (True) or off (False).
+                  None (default) decides based on page count.
         
     Returns:
         Extracted text as string, or None if error
@@ -49,15 +156,26 @@ def extract_text_from_pdf(file_path: str) -> Optional[str]:
     if HAS_PDFPLUMBER:
         try:
             with pdfplumber.open(file_path) as pdf:
-                pages_text = []
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        pages_text.append(page_text)
-                text = "\n".join(pages_text)
-                if text:
-                    logger.info(f"Successfully extracted text from PDF using pdfplumber: {file_path}")
-                    return text.strip()
+                page_count = len(pdf.pages)
+                use_parallel = parallel if parallel is not None else page_count >= PDF_PARALLEL_MIN_PAGES
+                pages_text = None
+                if use_parallel and page_count > 1 and PDF_PARALLEL_WORKERS > 1:
+                    try:
+                        pages_text = _extract_pdf_pages_parallel(file_path, page_count, PDF_PARALLEL_WORKERS)
+                        logger.info(f"Extracted {page_count} PDF pages in parallel ({PDF_PARALLEL_WORKERS} workers): {file_path}")
+                    except Exception as e:
+                        logger.warning(f"Parallel PDF extraction failed for {file_path}: {str(e)}, falling back to serial")
+                        pages_text = None
+                if pages_text is None:
+                    pages_text = [page.extract_text() for page in pdf.pages]
+            
+            complete = True
+            if PDF_OCR_ENABLED:
+                pages_text, complete = _ocr_scanned_pages(file_path, pages_text)
+            text = "\n".join(page_text for page_text in pages_text if page_text)
+            if text:
+                logger.info(f"Successfully extracted text from PDF using pdfplumber: {file_path}")
+                return text.strip() if complete else PartialText(text.strip())
         except Exception as e:
             logger.warning(f"pdfplumber extraction failed for {file_path}: {str(e)}, trying PyPDF2")
     
@@ -91,9 +209,78 @@ def extract_text_from_pdf(file_path: str) -> Optional[str]:
     return None
 
 
+def _ocr_scanned_pages(file_path: str, pages_text: List[Optional[str]], first_page: int = 0,
+                       content_hash: Optional[str] = None) -> tuple:
+    """
+    OCR the pages of a PDF that have no usable text layer.
+    Each page's OCR result is cached by file hash and page number, so a re-run only
+    OCRs the pages that failed last time.
+    
+    Args:
+        file_path: Path to PDF file
+        pages_text: Text layer of consecutive pages, starting at page index first_page
+        first_page: 0-based index of the first page in pages_text
+        content_hash: Hash of the file if already known (hashed here otherwise)
+        
+    Returns:
+        (pages_text with scanned pages filled in, whether every scanned page was read)
+    """
+    missing = [i for i, page_text in enumerate(pages_text) if _needs_ocr(page_text)]
+    if not missing:
+        return pages_text, True
+    
+    try:
+        from app.utils.image_extractor import extract_text_from_pdf_pages
+    except ImportError:
+        logger.error("Image extractor not available. Install easyocr and Pillow to OCR scanned PDF pages.")
+        return pages_text, True
+    
+    pages_text = list(pages_text)
+    cache = get_extraction_cache()
+    content_hash = content_hash or hash_file(file_path)
+    page_keys = {}
+    to_ocr = []
+    for index in missing:
+        if content_hash:
+            page_keys[index] = cache.make_key(content_hash, EXTRACTOR_VERSION, f"pdf-ocr-p{first_page + index + 1}")
+            cached = cache.get(page_keys[index])
+            if cached is not None:
+                pages_text[index] = cached or pages_text[index]
+                continue
+        to_ocr.append(index)
+    
+    if not to_ocr:
+        logger.info(f"All {len(missing)} scanned page(s) of {file_path} served from cache")
+        return pages_text, True
+    
+    logger.info(f"{len(to_ocr)} PDF page(s) without a text layer, running OCR: {file_path}")
+    failed = 0
+    ocr_results = extract_text_from_pdf_pages(file_path, [first_page + index for index in to_ocr])
+    for page_index, page_text in ocr_results.items():
+        index = page_index - first_page
+        if page_text is None:
+            failed += 1
+            continue
+        # Cache cả kết quả rỗng (trang trắng) để lần sau không OCR lại
+        if index in page_keys:
+            cache.put(page_keys[index], page_text)
+        pages_text[index] = page_text or pages_text[index]
+    
+    if failed:
+        logger.warning(f"OCR failed for {failed} page(s) of {file_path}, they will be retried on the next extraction")
+    return pages_text, failed == 0
+
+
+def _needs_ocr(page_text: Optional[str]) -> bool:
+    """Whether a PDF page's text layer is too short to be real text (scanned page)."""
+    return len((page_text or '').strip()) < PDF_OCR_MIN_PAGE_CHARS
+
+
 def extract_text_from_docx(file_path: str) -> Optional[str]:
     """
     Extract text from DOCX file.
+    Streams the XML parts out of the zip (see app.utils.docx_xml), so paragraphs and
+    table rows keep document order and headers and text boxes are included.
     
     Args:
         file_path: Path to DOCX file
@@ -105,30 +292,8 @@ def extract_text_from_docx(file_path: str) -> Optional[str]:
         logger.error(f"DOCX file not found: {file_path}")
         return None
     
-    if not HAS_DOCX:
-        logger.error("python-docx library not installed")
-        return None
-    
     try:
-        doc = Document(file_path)
-        paragraphs = []
-        for paragraph in doc.paragraphs:
-            if paragraph.text.strip():
-                paragraphs.append(paragraph.text)
-        
-        text = "\n".join(paragraphs)
-        
-        # Also extract text from tables if present
-        for table in doc.tables:
-            for row in table.rows:
-                row_text = []
-                for cell in row.cells:
-                    if cell.text.strip():
-                        row_text.append(cell.text.strip())
-                if row_text:
-                    paragraphs.append(" | ".join(row_text))
-        
-        text = "\n".join(paragraphs)
+        text = "\n".join(iter_docx_blocks(file_path))
         
         if text:
             logger.info(f"Successfully extracted text from DOCX: {file_path}")
@@ -142,9 +307,65 @@ def extract_text_from_docx(file_path: str) -> Optional[str]:
         return None
 
 
+def detect_text_encoding(sample: bytes) -> str:
+    """
+    Detect the encoding of a text sample: BOM first, then strict UTF-8,
+    then charset-normalizer (if installed), else TXT_FALLBACK_ENCODING.
+    
+    Args:
+        sample: Leading bytes of the file (a truncated last character is tolerated)
+        
+    Returns:
+        Python codec name
+    """
+    for bom, encoding in _TEXT_BOMS:
+        if sample.startswith(bom):
+            return encoding
+    
+    try:
+        # Incremental decoder không báo lỗi khi mẫu bị cắt giữa một ký tự nhiều byte
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    
+    if HAS_CHARSET_NORMALIZER:
+        matches = detect_charset(sample)
+        best = matches.best()
+        if best is not None:
+            for match in matches:
+                if (match.encoding in TXT_PREFERRED_ENCODINGS
+                        and match.chaos == best.chaos and match.coherence == best.coherence):
+                    return match.encoding
+            return best.encoding
+    
+    return TXT_FALLBACK_ENCODING
+
+
+def detect_file_encoding(file_path: str) -> Optional[str]:
+    """
+    Detect the encoding of a text file from its first TXT_DETECT_SAMPLE_BYTES.
+    
+    Args:
+        file_path: Path to TXT file
+        
+    Returns:
+        Python codec name, or None if the file cannot be read or is empty
+    """
+    try:
+        with open(file_path, 'rb') as file:
+            sample = file.read(TXT_DETECT_SAMPLE_BYTES)
+    except OSError as e:
+        logger.warning(f"Could not read {file_path} for encoding detection: {str(e)}")
+        return None
+    return detect_text_encoding(sample) if sample else None
+
+
 def extract_text_from_txt(file_path: str) -> Optional[str]:
     """
     Extract text from TXT file.
+    The file is memory-mapped and read once: the encoding is detected from the
+    first TXT_DETECT_SAMPLE_BYTES and the content (up to TXT_MAX_BYTES) decoded with it.
     
     Args:
         file_path: Path to TXT file
@@ -156,38 +377,46 @@ def extract_text_from_txt(file_path: str) -> Optional[str]:
         logger.error(f"TXT file not found: {file_path}")
         return None
     
-    encodings = ['utf-8', 'utf-8-sig', 'cp1252', 'latin-1', 'iso-8859-1']
-    
-    for encoding in encodings:
-        try:
-            with open(file_path, 'r', encoding=encoding, errors='replace') as file:
-                text = file.read()
-                if text:
-                    logger.info(f"Successfully extracted text from TXT ({encoding}): {file_path}")
-                    return text.strip()
-        except UnicodeDecodeError:
-            continue
-        except Exception as e:
-            logger.warning(f"Error reading TXT with {encoding}: {str(e)}")
-            continue
+    try:
+        file_size = os.path.getsize(file_path)
+        if file_size == 0:
+            logger.warning(f"TXT file is empty: {file_path}")
+            return None
+        if file_size > TXT_MAX_BYTES:
+            logger.warning(f"TXT file is {file_size / 1024 / 1024:.1f}MB, only the first {TXT_MAX_BYTES / 1024 / 1024:.0f}MB is read: {file_path}")
+        
+        with open(file_path, 'rb') as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                encoding = detect_text_encoding(mapped[:TXT_DETECT_SAMPLE_BYTES])
+                # errors='replace' chỉ để xử lý ký tự bị cắt ở TXT_MAX_BYTES, encoding đã được xác định
+                text = str(mapped[:TXT_MAX_BYTES], encoding, errors='replace')
+    except (OSError, ValueError, LookupError) as e:
+        logger.error(f"TXT extraction failed for {file_path}: {str(e)}")
+        return None
     
-    logger.error(f"TXT extraction failed for {file_path}: Could not decode with any encoding")
-    return None
+    text = text.strip()
+    if text:
+        logger.info(f"Successfully extracted text from TXT ({encoding}): {file_path}")
+        return DecodedText(text, encoding)
     
+    logger.warning(f"No text extracted from TXT: {file_path}")
     return None
 
 
-def extract_text_from_file(file_path: str, file_type: str = None) -> Optional[str]:
+def extract_text_from_file(file_path: str, file_type: str = None, use_cache: bool = True) -> Optional[str]:
     """
     Extract text from file based on file type.
     Supports PDF, DOCX, TXT, and Image (JPG, PNG, JPEG) formats.
+    Results are cached by content hash, so re-extracting the same bytes is a lookup.
     
     Args:
         file_path: Path to file
         file_type: File extension (pdf, docx, txt, jpg, jpeg, png). If None, auto-detect from file_path
+        use_cache: Whether to read/write the content-addressed extraction cache (default: True)
         
     Returns:
-        Extracted text as string, or None if error or unsupported format
+        Extracted text as string, or None if error or unsupported format.
+        TXT text is a DecodedText whose encoding attribute is the detected encoding.
     """
     if not file_type:
         # Auto-detect from file extension
@@ -196,6 +425,34 @@ def extract_text_from_file(file_path: str, file_type: str = None) -> Optional[st
     
     file_type = file_type.lower()
     
+    if not use_cache or file_type not in SUPPORTED_FILE_TYPES or not os.path.exists(file_path):
+        return _extract_text_uncached(file_path, file_type)
+    
+    content_hash = hash_file(file_path)
+    if not content_hash:
+        return _extract_text_uncached(file_path, file_type)
+    
+    cache = get_extraction_cache()
+    cache_key = cache.make_key(content_hash, EXTRACTOR_VERSION, file_type)
+    # TXT: encoding đã phát hiện được lưu cạnh text, để cache hit không phải đọc file để phát hiện lại
+    encoding_key = f"{cache_key}-encoding"
+    text = cache.get(cache_key)
+    if text is not None:
+        logger.info(f"Extraction cache hit for {file_path} ({len(text)} characters)")
+        if file_type == 'txt':
+            return DecodedText(text, cache.get(encoding_key))
+        return text
+    
+    text = _extract_text_uncached(file_path, file_type)
+    if text and not getattr(text, 'incomplete', False):
+        cache.put(cache_key, text)
+        if getattr(text, 'encoding', None):
+            cache.put(encoding_key, text.encoding)
+    return text
+
+
+def _extract_text_uncached(file_path: str, file_type: str) -> Optional[str]:
+    """Dispatch to the format-specific extractor without touching the cache."""
     # Document formats
     if file_type == 'pdf':
         return extract_text_from_pdf(file_path)
@@ -215,3 +472,154 @@ def extract_text_from_file(file_path: str, file_type: str = None) -> Optional[st
         logger.error(f"Unsupported file type: {file_type}")
         return None
 
+
+TXT_CHUNK_CHARS = 4000
+
+
+def iter_text_chunks(file_path: str, file_type: str = None) -> Iterator[str]:
+    """
+    Yield text from a CV file incrementally instead of materializing the whole document.
+    PDF yields one chunk per page (scanned pages OCR'd as in extract_text_from_pdf),
+    DOCX one per paragraph / table row, TXT blocks of paragraphs of roughly TXT_CHUNK_CHARS
+    from the first TXT_MAX_BYTES. Other formats yield the full extracted text once.
+    
+    Args:
+        file_path: Path to file
+        file_type: File extension. If None, auto-detect from file_path
+        
+    Yields:
+        Non-empty text chunks in document order
+    """
+    if not file_type:
+        _, ext = os.path.splitext(file_path)
+        file_type = ext.lstrip('.').lower()
+    
+    file_type = file_type.lower()
+    
+    if not os.path.exists(file_path):
+        logger.error(f"File not found: {file_path}")
+        return
+    
+    if file_type == 'pdf':
+        yield from _iter_pdf_chunks(file_path)
+    elif file_type in ['docx', 'doc']:
+        yield from _iter_docx_chunks(file_path)
+    elif file_type == 'txt':
+        yield from _iter_txt_chunks(file_path)
+    else:
+        text = extract_text_from_file(file_path, file_type)
+        if text:
+            yield text
+
+
+def extract_leading_text(file_path: str, file_type: str = None, max_chars: int = 2000) -> Optional[str]:
+    """
+    Extract the first max_chars characters of a CV file, reading chunks from
+    iter_text_chunks only until enough text is collected (long PDFs stop after a few pages).
+    
+    Args:
+        file_path: Path to file
+        file_type: File extension. If None, auto-detect from file_path
+        max_chars: Number of leading characters needed
+        
+    Returns:
+        Leading text, or None if nothing could be extracted
+    """
+    chunks = []
+    collected = 0
+    for chunk in iter_text_chunks(file_path, file_type):
+        chunks.append(chunk)
+        collected += len(chunk)
+        if collected >= max_chars:
+            break
+    text = "\n".join(chunks).strip()[:max_chars]
+    return text or None
+
+
+def _iter_pdf_chunks(file_path: str) -> Iterator[str]:
+    # Số page đã xử lý: nếu pdfplumber lỗi giữa chừng, PyPDF2 đọc tiếp từ page này
+    # thay vì từ đầu (không yield trùng page)
+    pages_done = 0
+    content_hash = None
+    if HAS_PDFPLUMBER:
+        try:
+            with pdfplumber.open(file_path) as pdf:
+                for page in pdf.pages:
+                    page_text = page.extract_text()
+                    # Giải phóng cache của page đã đọc để giới hạn bộ nhớ với PDF dài
+                    page.close()
+                    if PDF_OCR_ENABLED and _needs_ocr(page_text):
+                        # Trang scan: OCR giống extract_text_from_pdf (dùng chung cache OCR theo page)
+                        content_hash = content_hash or hash_file(file_path)
+                        (page_text,), _ = _ocr_scanned_pages(file_path, [page_text], pages_done, content_hash)
+                    pages_done += 1
+                    if page_text and page_text.strip():
+                        yield page_text
+            return
+        except Exception as e:
+            logger.warning(f"pdfplumber chunked extraction failed for {file_path} after {pages_done} pages: "
+                           f"{str(e)}, trying PyPDF2")
+    
+    if HAS_PYPDF2:
+        try:
+            with open(file_path, 'rb') as file:
+                for page in PyPDF2.PdfReader(file).pages[pages_done:]:
+                    page_text = page.extract_text()
+                    if page_text and page_text.strip():
+                        yield page_text
+        except Exception as e:
+            logger.error(f"PyPDF2 chunked extraction failed for {file_path}: {str(e)}")
+
+
+def _iter_docx_chunks(file_path: str) -> Iterator[str]:
+    try:
+        yield from iter_docx_blocks(file_path)
+    except Exception as e:
+        logger.error(f"DOCX chunked extraction failed for {file_path}: {str(e)}")
+
+
+def _iter_txt_lines(file_path: str) -> Iterator[str]:
+    """Decode the first TXT_MAX_BYTES of a text file line by line, like extract_text_from_txt."""
+    with open(file_path, 'rb') as file:
+        data = file.read(min(TXT_DETECT_SAMPLE_BYTES, TXT_MAX_BYTES))
+        if not data:
+            return
+        encoding = detect_text_encoding(data)
+        file_size = os.fstat(file.fileno()).st_size
+        if file_size > TXT_MAX_BYTES:
+            logger.warning(f"TXT file is {file_size / 1024 / 1024:.1f}MB, only the first {TXT_MAX_BYTES / 1024 / 1024:.0f}MB is read: {file_path}")
+        decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        remaining = TXT_MAX_BYTES - len(data)
+        pending = ''
+        while data:
+            pending += decoder.decode(data)
+            lines = pending.splitlines(keepends=True)
+            # Dòng cuối có thể chưa hết: giữ lại chờ block sau
+            pending = lines.pop() if lines and not lines[-1].endswith(('\n', '\r')) else ''
+            yield from lines
+            data = file.read(min(TXT_DETECT_SAMPLE_BYTES, remaining)) if remaining > 0 else b''
+            remaining -= len(data)
+        pending += decoder.decode(b'', final=True)
+        if pending:
+            yield pending
+
+
+def _iter_txt_chunks(file_path: str) -> Iterator[str]:
+    try:
+        buffer = []
+        buffered_chars = 0
+        for line in _iter_txt_lines(file_path):
+            buffer.append(line)
+            buffered_chars += len(line)
+            # Chỉ cắt chunk ở ranh giới đoạn văn (dòng trống) để không tách đôi keyword
+            if buffered_chars >= TXT_CHUNK_CHARS and not line.strip():
+                chunk = "".join(buffer).strip()
+                if chunk:
+                    yield chunk
+                buffer = []
+                buffered_chars = 0
+        chunk = "".join(buffer).strip()
+        if chunk:
+            yield chunk
+    except (OSError, ValueError, LookupError) as e:
+        logger.error(f"TXT chunked extraction failed for {file_path}: {str(e)}")
@@ -0,0 +1,170 @@
+"""
+Content-addressed storage for uploaded CV files
+Uploads are streamed to a temp file in chunks while their SHA-256 is computed, then
+stored in the blob storage (app.utils.blob_storage) under cvs/<h[:2]>/<h[2:4]>/<sha256>.<ext>.
+Two users uploading "CV.pdf" no longer overwrite each other, identical bytes are stored
+once, and no directory grows past a few hundred entries. The key is stored on the CV row
+(CV.storage_path) so a download is a single lookup.
+"""
+
+import os
+import time
+import hashlib
+import logging
+import tempfile
+from typing import Optional, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
+CV_BLOB_DIR = 'cvs'
+# Blob được upload/dedupe gần đây có thể thuộc về một CV chưa commit: không xóa khi xóa CV,
+# để gc_uploads.py dọn sau grace period của nó
+RECENT_BLOB_SECONDS = 3600
+
+
+class UploadTooLargeError(ValueError):
+    """The upload exceeded the allowed size while it was being streamed."""
+
+
+class StoredUpload(NamedTuple):
+    content_hash: str
+    relative_path: str  # Blob key, giá trị lưu vào CV.storage_path
+    size: int
+    existed: bool  # Blob với cùng nội dung đã có sẵn trong storage
+
+
+def blob_relative_path(content_hash: str, file_type: str) -> str:
+    """Canonical path of a blob relative to the upload folder, sharded by the first 4 hex digits."""
+    # Luôn dùng '/' để giá trị trong DB giống nhau trên Windows và Linux
+    return f"{CV_BLOB_DIR}/{content_hash[:2]}/{content_hash[2:4]}/{content_hash}.{file_type.lower()}"
+
+
+def resolve_path(upload_folder: str, relative_path: str) -> str:
+    """Absolute path for a stored relative path."""
+    return os.path.join(upload_folder, *relative_path.split('/'))
+
+
+def legacy_cv_key(cv) -> str:
+    """Key of a CV uploaded before sharded storage (flat <hash>.<ext> or its file name)."""
+    if cv.content_hash:
+        return f"{cv.content_hash}.{cv.file_type.lower()}"
+    return cv.file_name
+
+
+def legacy_cv_file_path(cv, upload_folder: str) -> str:
+    """Where a CV uploaded before sharded storage lives on the local filesystem."""
+    return os.path.join(upload_folder, legacy_cv_key(cv))
+
+
+def cv_blob_key(cv) -> str:
+    """Blob key of a CV's stored file: CV.storage_path, legacy layout until relocated."""
+    return cv.storage_path or legacy_cv_key(cv)
+
+
+def store_upload(file_storage, storage, file_type: str, max_bytes: Optional[int] = None) -> StoredUpload:
+    """
+    Stream an uploaded file to content-addressed storage, hashing while writing.
+
+    Args:
+        file_storage: werkzeug FileStorage (or any object with a readable .stream)
+        storage: BlobStorage the upload is stored in
+        file_type: File extension used for the blob name (pdf, docx, ...)
+        max_bytes: Abort with UploadTooLargeError once this many bytes were received
+
+    Returns:
+        StoredUpload with the SHA-256 hex digest, blob key, size and whether the blob already existed
+    """
+    incoming_dir = storage.staging_dir()
+
+    sha256 = hashlib.sha256()
+    size = 0
+    fd, temp_path = tempfile.mkstemp(dir=incoming_dir, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as output:
+            for chunk in iter(lambda: file_storage.stream.read(UPLOAD_CHUNK_SIZE), b''):
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    raise UploadTooLargeError(f"Upload exceeds {max_bytes} bytes")
+                sha256.update(chunk)
+                output.write(chunk)
+
+        return store_file(temp_path, storage, file_type, sha256.hexdigest(), size)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def store_file(temp_path: str, storage, file_type: str, content_hash: str, size: int) -> StoredUpload:
+    """
+    Move a fully received, already hashed temp file into content-addressed storage.
+    The temp file is consumed (moved, uploaded or deleted).
+
+    Returns:
+        StoredUpload for the blob
+    """
+    relative_path = blob_relative_path(content_hash, file_type)
+    # touch thay vì exists: blob được dedupe có mtime mới, nên delete_blob_if_unreferenced
+    # và gc_uploads.py không xóa nó trước khi CV mới trỏ tới nó được commit
+    if storage.touch(relative_path):
+        # Cùng nội dung đã được lưu - giữ blob cũ, bỏ file tạm
+        os.unlink(temp_path)
+        logger.info(f"Upload matches existing blob {relative_path} ({size} bytes)")
+        return StoredUpload(content_hash, relative_path, size, True)
+
+    storage.put_file(relative_path, temp_path)
+    logger.info(f"Stored upload as {relative_path} ({size} bytes)")
+    return StoredUpload(content_hash, relative_path, size, False)
+
+
+class BlobRef(NamedTuple):
+    """What delete_blob_if_unreferenced needs of a CV, captured before the row is deleted."""
+    cv_id: int
+    storage_path: Optional[str]
+    content_hash: Optional[str]
+    file_type: Optional[str]
+    file_name: str
+
+    @classmethod
+    def of(cls, cv) -> 'BlobRef':
+        return cls(cv.id, cv.storage_path, cv.content_hash, cv.file_type, cv.file_name)
+
+
+def delete_blob_if_unreferenced(ref: BlobRef, storage, min_age_seconds: int = RECENT_BLOB_SECONDS) -> bool:
+    """
+    Delete the stored file of a deleted CV unless another CV row points at the same content.
+    Call after the deletion of the CV row has been committed, so a failed commit never
+    leaves a row without its file. A blob modified within min_age_seconds is kept (a
+    concurrent upload of the same content may be about to reference it); gc_uploads.py
+    removes it later if it stays unreferenced.
+
+    Returns:
+        True if the file was removed
+    """
+    from app.models import CV
+
+    if ref.storage_path:
+        same_file = CV.storage_path == ref.storage_path
+    elif ref.content_hash:
+        same_file = (CV.storage_path.is_(None)) & (CV.content_hash == ref.content_hash)
+    else:
+        # Upload cũ lưu theo tên file: các CV trùng tên dùng chung một file
+        same_file = (CV.storage_path.is_(None)) & (CV.content_hash.is_(None)) & (CV.file_name == ref.file_name)
+    shared = CV.query.filter(same_file, CV.id != ref.cv_id).first()
+    if shared is not None:
+        logger.info(f"Keeping file of CV {ref.cv_id}, still referenced by CV {shared.id}")
+        return False
+
+    key = ref.storage_path or legacy_cv_key(ref)
+    try:
+        modified_at = storage.modified_at(key)
+        if modified_at is not None and time.time() - modified_at < min_age_seconds:
+            logger.info(f"Keeping recently written file {key} of CV {ref.cv_id}, left to gc_uploads.py")
+            return False
+        if storage.delete(key):
+            logger.info(f"Deleted stored file: {key}")
+            return True
+    except Exception as e:
+        logger.warning(f"Error deleting stored file {key}: {str(e)}")
+    return False
@@ -0,0 +1,102 @@
+"""
+Benchmark: python-docx DOM vs streaming XML DOCX extraction
+Chạy trên các DOCX mẫu trong app/static/uploads và một DOCX tổng hợp lớn
+(nhiều đoạn văn + bảng có cell merge) để thấy chi phí của cell.text trên cell merge.
+Chạy: python benchmarks/bench_docx_extract.py [--paragraphs 2000] [--rows 200] [--repeat 3]
+"""
+
+import sys
+import os
+import time
+import argparse
+import tempfile
+import statistics
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx import Document
+
+from app.utils.text_extractor import extract_text_from_docx
+
+UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app', 'static', 'uploads')
+
+
+def extract_with_python_docx(file_path):
+    """Extractor cũ: dựng toàn bộ object model python-docx, đoạn văn trước rồi đến bảng"""
+    doc = Document(file_path)
+    paragraphs = [paragraph.text for paragraph in doc.paragraphs if paragraph.text.strip()]
+    for table in doc.tables:
+        for row in table.rows:
+            row_text = [cell.text.strip() for cell in row.cells if cell.text.strip()]
+            if row_text:
+                paragraphs.append(" | ".join(row_text))
+    return "\n".join(paragraphs).strip()
+
+
+def build_large_docx(paragraph_count, row_count):
+    """Tạo DOCX tổng hợp: paragraph_count đoạn văn và một bảng row_count x 6 với cell merge"""
+    doc = Document()
+    doc.sections[0].header.paragraphs[0].text = "Nguyen Van A - Senior Python Developer"
+    for i in range(paragraph_count):
+        doc.add_paragraph(f"Paragraph {i}: developed REST APIs with Flask, SQLAlchemy and PostgreSQL for project {i}.")
+
+    table = doc.add_table(rows=row_count, cols=6)
+    for r, row in enumerate(table.rows):
+        for c, cell in enumerate(row.cells):
+            cell.text = f"r{r}c{c} skill"
+    # Merge ngang cả hàng và merge dọc cột đầu theo từng khối 10 hàng
+    for r in range(0, row_count, 10):
+        table.cell(r, 1).merge(table.cell(r, 5))
+        table.cell(r, 0).merge(table.cell(min(r + 9, row_count - 1), 0))
+
+    fd, output_path = tempfile.mkstemp(suffix='.docx', prefix='bench_large_')
+    os.close(fd)
+    doc.save(output_path)
+    return output_path
+
+
+def time_extraction(func, file_path, repeat):
+    timings = []
+    text = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        text = func(file_path)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), text or ''
+
+
+def main():
+    parser = argparse.ArgumentParser(description='python-docx vs streaming XML DOCX extraction benchmark')
+    parser.add_argument('--paragraphs', type=int, default=2000, help='Paragraphs in the synthetic DOCX')
+    parser.add_argument('--rows', type=int, default=200, help='Table rows in the synthetic DOCX')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per file (median is reported)')
+    args = parser.parse_args()
+
+    sample_docx = sorted(
+        os.path.join(UPLOAD_FOLDER, name) for name in os.listdir(UPLOAD_FOLDER) if name.lower().endswith('.docx')
+    )
+    synthetic_docx = build_large_docx(args.paragraphs, args.rows)
+
+    print(f"{'file':<40} {'python-docx (ms)':>17} {'stream (ms)':>12} {'speedup':>8} {'chars old/new':>16}  old lines kept")
+    print('-' * 115)
+
+    try:
+        for path in sample_docx + [synthetic_docx]:
+            old_time, old_text = time_extraction(extract_with_python_docx, path, args.repeat)
+            new_time, new_text = time_extraction(extract_text_from_docx, path, args.repeat)
+            # Stream extractor khử trùng lặp cell merge, nên so sánh theo tập dòng thay vì bằng nhau tuyệt đối
+            new_lines = set(new_text.splitlines())
+            kept = all(line in new_lines for line in old_text.splitlines() if ' | ' not in line)
+            name = os.path.basename(path)
+            if path == synthetic_docx:
+                name = f"<synthetic {args.paragraphs}p/{args.rows}r>"
+            speedup = old_time / new_time if new_time else 0.0
+            print(f"{name[:40]:<40} {old_time * 1000:>17.2f} {new_time * 1000:>12.2f} {speedup:>7.2f}x "
+                  f"{len(old_text):>7}/{len(new_text):<8}  {kept}")
+    finally:
+        os.unlink(synthetic_docx)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,399 @@
+"""
+Benchmark suite cho các extractor (PDF, DOCX, TXT, ảnh) trên một corpus CV
+Corpus = các file mẫu trong app/static/uploads + tài liệu tổng hợp lớn (PDF nhiều trang,
+DOCX dài có bảng, TXT vài MB ở nhiều encoding, ảnh scan > 5MB).
+Mỗi (format, engine) chạy trong một process riêng để đo peak RSS độc lập.
+Báo cáo p50/p95 latency, peak RSS, ký tự/giây và ghi ra JSON để so sánh giữa các commit.
+Chạy: python benchmarks/bench_extraction.py [--repeat 5] [--formats pdf,docx,txt,image]
+      [--output results.json] [--compare previous.json] [--no-synthetic]
+"""
+
+import sys
+import os
+import json
+import math
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import subprocess
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import resource
+    HAS_RESOURCE = True
+except ImportError:
+    # Windows: không đo được peak RSS
+    HAS_RESOURCE = False
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+UPLOAD_FOLDER = os.path.join(PROJECT_DIR, 'app', 'static', 'uploads')
+
+FORMAT_EXTENSIONS = {
+    'pdf': ('.pdf',),
+    'docx': ('.docx',),
+    'txt': ('.txt',),
+    'image': ('.jpg', '.jpeg', '.png'),
+}
+
+# (format, engine) -> mô tả; engine được dispatch trong run_extractor
+ENGINES = {
+    'pdf': ['pdfplumber-serial', 'pdfplumber-parallel'],
+    'docx': ['stream-xml'],
+    'txt': ['mmap'],
+    'image': ['easyocr'],
+}
+
+CV_LINES = [
+    "Senior Python Developer with 6 years of experience building REST APIs using Flask and Django.",
+    "Designed PostgreSQL and SQL Server schemas, wrote SQLAlchemy models and Alembic migrations.",
+    "Led a team of 4 engineers; introduced CI/CD with GitHub Actions, Docker and Kubernetes.",
+    "Skills: Python, JavaScript, React, Redis, Celery, AWS (EC2, S3, RDS), unit testing with pytest.",
+    "Education: Bachelor of Computer Science, Da Nang University of Science and Technology.",
+]
+CV_LINES_VI = [
+    "Kỹ sư phần mềm Python với 6 năm kinh nghiệm phát triển hệ thống web và API.",
+    "Thiết kế cơ sở dữ liệu, tối ưu truy vấn SQL, triển khai dịch vụ trên AWS.",
+    "Kỹ năng: Python, Flask, Django, ReactJS, Docker, Kubernetes, làm việc nhóm.",
+]
+
+
+# ---------------------------------------------------------------------------
+# Corpus
+# ---------------------------------------------------------------------------
+
+def build_synthetic_pdf(output_dir, pages):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    path = os.path.join(output_dir, f'synthetic_{pages}_pages.pdf')
+    pdf = canvas.Canvas(path, pagesize=A4)
+    width, height = A4
+    for page in range(pages):
+        y = height - 60
+        pdf.setFont('Helvetica-Bold', 14)
+        pdf.drawString(50, y, f"Project portfolio - page {page + 1}")
+        pdf.setFont('Helvetica', 10)
+        y -= 30
+        line = 0
+        while y > 50:
+            pdf.drawString(50, y, CV_LINES[line % len(CV_LINES)])
+            y -= 14
+            line += 1
+        pdf.showPage()
+    pdf.save()
+    return path
+
+
+def build_synthetic_docx(output_dir, paragraphs):
+    from docx import Document
+
+    path = os.path.join(output_dir, f'synthetic_{paragraphs}_paragraphs.docx')
+    doc = Document()
+    doc.sections[0].header.paragraphs[0].text = "Nguyen Van A - Senior Python Developer"
+    for i in range(paragraphs):
+        doc.add_paragraph(f"{i}. {(CV_LINES + CV_LINES_VI)[i % (len(CV_LINES) + len(CV_LINES_VI))]}")
+    table = doc.add_table(rows=paragraphs // 10, cols=4)
+    for r, row in enumerate(table.rows):
+        for c, cell in enumerate(row.cells):
+            cell.text = f"Skill {r}.{c}"
+    doc.save(path)
+    return path
+
+
+def build_synthetic_txt(output_dir, size_mb):
+    paths = []
+    block = "\n".join(CV_LINES + CV_LINES_VI) + "\n\n"
+    repeat = max(1, int(size_mb * 1024 * 1024 / len(block.encode('utf-8'))))
+    for encoding in ('utf-8', 'utf-16'):
+        path = os.path.join(output_dir, f'synthetic_{size_mb}mb_{encoding}.txt')
+        with open(path, 'w', encoding=encoding) as file:
+            file.write(block * repeat)
+        paths.append(path)
+    # Bảng mã Windows phương Tây: chỉ phần tiếng Anh
+    path = os.path.join(output_dir, f'synthetic_{size_mb}mb_cp1252.txt')
+    english_block = "\n".join(CV_LINES) + "\nRésumé - café, naïve, façade\n\n"
+    with open(path, 'w', encoding='cp1252') as file:
+        file.write(english_block * max(1, int(size_mb * 1024 * 1024 / len(english_block))))
+    paths.append(path)
+    return paths
+
+
+def build_synthetic_image(output_dir):
+    """Ảnh scan A4 ở 600 DPI có nhiễu, đủ lớn (> 5MB) để đi vào nhánh tiled OCR"""
+    import numpy as np
+    from PIL import Image, ImageDraw
+
+    width, height = 4960, 7016
+    image = Image.new('L', (width, height), 255)
+    draw = ImageDraw.Draw(image)
+    y = 200
+    line = 0
+    while y < height - 200:
+        draw.text((300, y), CV_LINES[line % len(CV_LINES)], fill=0)
+        y += 60
+        line += 1
+    noise = np.random.default_rng(0).integers(-12, 12, size=(height, width), dtype=np.int16)
+    array = np.clip(np.asarray(image, dtype=np.int16) + noise, 0, 255).astype(np.uint8)
+    path = os.path.join(output_dir, 'synthetic_scan_600dpi.jpg')
+    Image.fromarray(array).convert('RGB').save(path, 'JPEG', quality=95, dpi=(600, 600))
+    return path
+
+
+def build_corpus(output_dir, formats, synthetic, pdf_pages, docx_paragraphs, txt_mb):
+    """Return {format: [paths]} from the sample uploads plus synthetic documents."""
+    corpus = {fmt: [] for fmt in formats}
+    for name in sorted(os.listdir(UPLOAD_FOLDER)):
+        path = os.path.join(UPLOAD_FOLDER, name)
+        if not os.path.isfile(path):
+            continue  # avatars/, company_logos/ không phải CV
+        for fmt in formats:
+            if name.lower().endswith(FORMAT_EXTENSIONS[fmt]):
+                corpus[fmt].append(path)
+
+    if synthetic:
+        builders = {
+            'pdf': lambda: [build_synthetic_pdf(output_dir, pdf_pages)],
+            'docx': lambda: [build_synthetic_docx(output_dir, docx_paragraphs)],
+            'txt': lambda: build_synthetic_txt(output_dir, txt_mb),
+            'image': lambda: [build_synthetic_image(output_dir)],
+        }
+        for fmt in formats:
+            try:
+                corpus[fmt].extend(builders[fmt]())
+            except ImportError as e:
+                print(f"Skipping synthetic {fmt} fixture: {str(e)}")
+    return corpus
+
+
+# ---------------------------------------------------------------------------
+# Measurement (chạy trong process con)
+# ---------------------------------------------------------------------------
+
+def _rss_mb(who):
+    if not HAS_RESOURCE:
+        return None
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux báo KB, macOS báo byte
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def run_extractor(fmt, engine, path):
+    from app.utils import text_extractor, image_extractor
+
+    if fmt == 'pdf':
+        return text_extractor.extract_text_from_pdf(path, parallel=(engine == 'pdfplumber-parallel'))
+    if fmt == 'docx':
+        return text_extractor.extract_text_from_docx(path)
+    if fmt == 'txt':
+        return text_extractor.extract_text_from_txt(path)
+    if fmt == 'image':
+        return image_extractor.extract_text_from_image(path)
+    raise ValueError(f"Unknown format: {fmt}")
+
+
+def _fresh_extraction_cache():
+    """OCR fallback của PDF cache theo trang - dùng cache rỗng để mỗi lần đo đều OCR thật"""
+    from app.utils import extraction_cache
+    cache_dir = tempfile.mkdtemp(prefix='bench_cache_')
+    extraction_cache._cache = extraction_cache.ExtractionCache(cache_dir)
+    return cache_dir
+
+
+def measure_group(fmt, engine, paths, repeat):
+    """Run one (format, engine) over all paths in this (fresh) process."""
+    import logging
+    logging.disable(logging.WARNING)
+
+    from app.utils.image_extractor import get_ocr_reader
+    if fmt == 'image' and get_ocr_reader() is None:
+        return {'format': fmt, 'engine': engine, 'skipped': 'OCR backend not available'}
+
+    baseline_rss = _rss_mb(resource.RUSAGE_SELF) if HAS_RESOURCE else None
+
+    # Warm-up: import lazy, khởi động process pool / load model OCR không tính vào latency
+    cache_dir = _fresh_extraction_cache()
+    run_extractor(fmt, engine, paths[0])
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+    timings = []
+    total_chars = 0
+    total_seconds = 0.0
+    failures = 0
+    files = []
+    for path in paths:
+        file_timings = []
+        chars = 0
+        for _ in range(repeat):
+            cache_dir = _fresh_extraction_cache()
+            start = time.perf_counter()
+            try:
+                text = run_extractor(fmt, engine, path)
+            except Exception:
+                text = None
+            elapsed = time.perf_counter() - start
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            file_timings.append(elapsed)
+            chars = len(text or '')
+            if not text:
+                failures += 1
+            total_chars += chars
+            total_seconds += elapsed
+        timings.extend(file_timings)
+        files.append({
+            'file': os.path.basename(path),
+            'bytes': os.path.getsize(path),
+            'chars': chars,
+            'p50_ms': percentile(file_timings, 50) * 1000,
+        })
+
+    return {
+        'format': fmt,
+        'engine': engine,
+        'files': len(paths),
+        'runs': len(timings),
+        'failures': failures,
+        'p50_ms': percentile(timings, 50) * 1000,
+        'p95_ms': percentile(timings, 95) * 1000,
+        'mean_ms': sum(timings) / len(timings) * 1000,
+        'chars_per_sec': total_chars / total_seconds if total_seconds else 0.0,
+        'baseline_rss_mb': baseline_rss,
+        'peak_rss_mb': _rss_mb(resource.RUSAGE_SELF) if HAS_RESOURCE else None,
+        'peak_rss_children_mb': _rss_mb(resource.RUSAGE_CHILDREN) if HAS_RESOURCE else None,
+        'per_file': files,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Report
+# ---------------------------------------------------------------------------
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_DIR,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _fmt(value, spec):
+    return format(value, spec) if value is not None else '-'
+
+
+def print_results(results):
+    print(f"{'format':<7} {'engine':<20} {'files':>5} {'p50 (ms)':>10} {'p95 (ms)':>10} "
+          f"{'chars/s':>12} {'peak RSS (MB)':>14} {'fail':>5}")
+    print('-' * 95)
+    for row in results:
+        if row.get('skipped'):
+            print(f"{row['format']:<7} {row['engine']:<20} skipped: {row['skipped']}")
+            continue
+        print(f"{row['format']:<7} {row['engine']:<20} {row['files']:>5} {row['p50_ms']:>10.2f} {row['p95_ms']:>10.2f} "
+              f"{row['chars_per_sec']:>12.0f} {_fmt(row['peak_rss_mb'], '>14.1f')} {row['failures']:>5}")
+
+
+def print_comparison(results, previous_path):
+    with open(previous_path, 'r', encoding='utf-8') as file:
+        previous = json.load(file)
+    baseline = {(row['format'], row['engine']): row for row in previous.get('results', []) if not row.get('skipped')}
+
+    print(f"\nCompared with {previous_path} (commit {previous.get('meta', {}).get('commit')}):")
+    print(f"{'format':<7} {'engine':<20} {'p50':>9} {'p95':>9} {'chars/s':>9} {'peak RSS':>9}")
+    print('-' * 68)
+
+    def change(new, old):
+        if new is None or not old:
+            return '-'
+        return f"{(new - old) / old * 100:+.1f}%"
+
+    for row in results:
+        old = baseline.get((row['format'], row['engine']))
+        if row.get('skipped') or old is None:
+            continue
+        print(f"{row['format']:<7} {row['engine']:<20} {change(row['p50_ms'], old['p50_ms']):>9} "
+              f"{change(row['p95_ms'], old['p95_ms']):>9} {change(row['chars_per_sec'], old['chars_per_sec']):>9} "
+              f"{change(row['peak_rss_mb'], old.get('peak_rss_mb')):>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Extraction benchmark suite (PDF, DOCX, TXT, image)')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per file')
+    parser.add_argument('--formats', default='pdf,docx,txt,image', help='Comma-separated formats to benchmark')
+    parser.add_argument('--output', help='JSON output path (default: benchmarks/results/extraction-<commit>.json)')
+    parser.add_argument('--compare', help='Previous JSON result to compare against')
+    parser.add_argument('--no-synthetic', action='store_true', help='Only use the sample uploads')
+    parser.add_argument('--pdf-pages', type=int, default=40, help='Pages in the synthetic PDF')
+    parser.add_argument('--docx-paragraphs', type=int, default=3000, help='Paragraphs in the synthetic DOCX')
+    parser.add_argument('--txt-mb', type=int, default=2, help='Size in MB of the synthetic TXT files')
+    args = parser.parse_args()
+
+    formats = [fmt.strip() for fmt in args.formats.split(',') if fmt.strip()]
+    unknown = [fmt for fmt in formats if fmt not in ENGINES]
+    if unknown:
+        parser.error(f"Unknown format(s): {', '.join(unknown)}")
+
+    fixture_dir = tempfile.mkdtemp(prefix='bench_corpus_')
+    results = []
+    try:
+        context = multiprocessing.get_context('spawn')
+        # Dựng corpus trong process riêng: ảnh scan tổng hợp chiếm vài trăm MB, nếu dựng ở đây
+        # peak RSS đó sẽ bị tính vào mọi process con (ru_maxrss được giữ qua fork/exec)
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            corpus = executor.submit(build_corpus, fixture_dir, formats, not args.no_synthetic,
+                                     args.pdf_pages, args.docx_paragraphs, args.txt_mb).result()
+        for fmt in formats:
+            if not corpus[fmt]:
+                print(f"No {fmt} fixtures found, skipping")
+                continue
+            for engine in ENGINES[fmt]:
+                print(f"Running {fmt}/{engine} on {len(corpus[fmt])} file(s)...")
+                # Process mới cho mỗi group để peak RSS không bị lẫn giữa các engine
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    results.append(executor.submit(measure_group, fmt, engine, corpus[fmt], args.repeat).result())
+    finally:
+        shutil.rmtree(fixture_dir, ignore_errors=True)
+
+    from app.utils.text_extractor import EXTRACTOR_VERSION
+    commit = git_commit()
+    report = {
+        'meta': {
+            'commit': commit,
+            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'extractor_version': EXTRACTOR_VERSION,
+            'repeat': args.repeat,
+            'synthetic': not args.no_synthetic,
+        },
+        'results': results,
+    }
+
+    output = args.output or os.path.join(PROJECT_DIR, 'benchmarks', 'results', f"extraction-{commit or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2, ensure_ascii=False)
+
+    print()
+    print_results(results)
+    print(f"\nResults written to {output}")
+    if args.compare:
+        print_comparison(results, args.compare)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""
+Benchmark: substring loop vs Aho–Corasick automaton cho classify_cv_by_keywords
+Chạy trên text của các CV mẫu (PDF/DOCX/TXT trong app/static/uploads) và các CV tổng hợp
+ở nhiều kích thước. Báo cáo thời gian match mỗi CV, speedup, thời gian build automaton và
+những CV mà kết quả phân loại thay đổi (do keyword ngắn 'r', 'ml', 'ba', 'pm', 'hr'
+không còn khớp bên trong từ khác).
+Phần batch so sánh classify_cv_by_keywords từng CV với classify_many (ma trận document-term)
+trên N CV tổng hợp và kiểm tra kết quả giống hệt nhau.
+Chạy: python benchmarks/bench_keyword_matching.py [--sizes 2000,20000,200000] [--repeat 20] [--no-samples]
+      [--batch 5000]
+"""
+
+import sys
+import os
+import time
+import random
+import argparse
+import statistics
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.classifier import CATEGORY_KEYWORDS, _score_categories, _pick_category, classify_cv_by_keywords, classify_many
+from app.utils.keyword_matcher import KeywordMatcher, get_keyword_matcher
+
+UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app', 'static', 'uploads')
+SAMPLE_EXTENSIONS = ('.pdf', '.docx', '.txt')
+
+CV_LINES = [
+    "Senior Python Developer with 6 years of experience building REST APIs using Flask and Django.",
+    "Designed PostgreSQL and SQL Server schemas, wrote SQLAlchemy models and Alembic migrations.",
+    "Led a team of 4 engineers; introduced CI/CD with GitHub Actions, Docker and Kubernetes.",
+    "Skills: Python, JavaScript, React, Redis, Celery, AWS (EC2, S3, RDS), unit testing with pytest.",
+    "Built dashboards in Power BI and Excel for the HR and finance departments.",
+    "Education: Bachelor of Computer Science, Da Nang University of Science and Technology.",
+]
+
+
+def match_substring(text, keywords_map):
+    """Cách cũ: một lần tìm chuỗi con (không phân biệt ranh giới từ) cho mỗi keyword"""
+    text_lower = text.lower()
+    return {
+        category: {i for i, keyword in enumerate(keywords) if keyword.lower() in text_lower}
+        for category, keywords in keywords_map.items()
+    }
+
+
+def match_automaton(text, keywords_map):
+    return get_keyword_matcher(keywords_map).match(text)
+
+
+def build_synthetic_text(size):
+    lines = []
+    total = 0
+    i = 0
+    while total < size:
+        line = CV_LINES[i % len(CV_LINES)]
+        lines.append(line)
+        total += len(line) + 1
+        i += 1
+    return "\n".join(lines)[:size]
+
+
+def build_batch_texts(count, seed=42):
+    """CV ngắn (~1000 ký tự) trộn câu mô tả và keyword của vài category ngẫu nhiên"""
+    rng = random.Random(seed)
+    categories = list(CATEGORY_KEYWORDS)
+    texts = []
+    for _ in range(count):
+        parts = []
+        for category in rng.sample(categories, 2):
+            keywords = CATEGORY_KEYWORDS[category]
+            parts.append(f"Experience with {', '.join(rng.sample(keywords, rng.randint(1, len(keywords) // 2)))}.")
+        parts.extend(rng.sample(CV_LINES, 4))
+        texts.append(" ".join(parts * 2))
+    return texts
+
+
+def run_batch(count):
+    texts = build_batch_texts(count)
+    chars = sum(len(text) for text in texts)
+
+    start = time.perf_counter()
+    single = [classify_cv_by_keywords(text, auto_translate=False) for text in texts]
+    single_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = classify_many(texts, auto_translate=False)
+    batch_time = time.perf_counter() - start
+
+    print(f"Batch of {count} CVs ({chars / count:.0f} chars avg):")
+    print(f"  classify_cv_by_keywords loop {single_time * 1000:>9.1f} ms  {count / single_time:>9.0f} CVs/s")
+    print(f"  classify_many                {batch_time * 1000:>9.1f} ms  {count / batch_time:>9.0f} CVs/s")
+    print(f"  identical results: {single == batch}")
+
+
+def load_sample_texts():
+    from app.utils.text_extractor import extract_text_from_file
+
+    texts = []
+    for name in sorted(os.listdir(UPLOAD_FOLDER)):
+        path = os.path.join(UPLOAD_FOLDER, name)
+        if os.path.isfile(path) and name.lower().endswith(SAMPLE_EXTENSIONS):
+            text = extract_text_from_file(path)
+            if text:
+                texts.append((name, text))
+    return texts
+
+
+def time_match(func, text, repeat):
+    timings = []
+    matched = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        matched = func(text, CATEGORY_KEYWORDS)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), matched
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Substring loop vs Aho-Corasick keyword matching benchmark')
+    parser.add_argument('--sizes', default='2000,20000,200000', help='Synthetic CV sizes in characters')
+    parser.add_argument('--repeat', type=int, default=20, help='Runs per text (median is reported)')
+    parser.add_argument('--no-samples', action='store_true', help='Skip the sample CVs in app/static/uploads')
+    parser.add_argument('--batch', type=int, default=5000, help='Synthetic CVs for the batch comparison (0 to skip)')
+    args = parser.parse_args()
+
+    keyword_count = sum(len(keywords) for keywords in CATEGORY_KEYWORDS.values())
+    build_timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        matcher = KeywordMatcher(CATEGORY_KEYWORDS)
+        build_timings.append(time.perf_counter() - start)
+    print(f"Automaton: {keyword_count} keywords, {len(matcher.goto)} states, "
+          f"build {statistics.median(build_timings) * 1000:.2f} ms (once per keyword set)")
+    print()
+
+    texts = [] if args.no_samples else load_sample_texts()
+    texts += [(f"<synthetic {int(size)} chars>", build_synthetic_text(int(size))) for size in args.sizes.split(',')]
+
+    print(f"{'text':<40} {'chars':>8} {'substring (ms)':>15} {'automaton (ms)':>15} {'speedup':>8}  category old -> new")
+    print('-' * 125)
+    for name, text in texts:
+        old_time, old_matched = time_match(match_substring, text, args.repeat)
+        new_time, new_matched = time_match(match_automaton, text, args.repeat)
+        old_category = _pick_category(_score_categories(old_matched, CATEGORY_KEYWORDS))[0]
+        new_category = _pick_category(_score_categories(new_matched, CATEGORY_KEYWORDS))[0]
+        speedup = old_time / new_time if new_time else 0.0
+        changed = '' if old_category == new_category else '  (changed)'
+        print(f"{name[:40]:<40} {len(text):>8} {old_time * 1000:>15.3f} {new_time * 1000:>15.3f} {speedup:>7.2f}x  "
+              f"{old_category} -> {new_category}{changed}")
+
+        # Keyword chỉ khớp với cách cũ: thường là keyword ngắn nằm bên trong từ khác
+        dropped = sorted({CATEGORY_KEYWORDS[category][i]
+                          for category, indices in old_matched.items()
+                          for i in indices - new_matched[category]})
+        if dropped:
+            print(f"{'':<40} substring-only matches: {', '.join(dropped)}")
+
+    if args.batch:
+        print()
+        run_batch(args.batch)
+
+    return 0
+
+
+if __name__ == '__main__':
+    import logging
+    logging.disable(logging.INFO)
+    sys.exit(main())
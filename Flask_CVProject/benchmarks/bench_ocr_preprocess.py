@@ -0,0 +1,95 @@
+"""
+Microbenchmark: tempfile JPEG handoff vs in-memory NumPy handoff cho OCR
+Đo phần việc trước khi EasyOCR bắt đầu nhận dạng, trên các ảnh mẫu trong app/static/uploads:
+- tempfile: preprocess -> encode JPEG q95 -> ghi đĩa -> EasyOCR decode lại (RGB + grayscale) -> xóa file
+- in-memory: preprocess -> np.asarray
+Chạy: python benchmarks/bench_ocr_preprocess.py [--repeat 5]
+"""
+
+import sys
+import os
+import time
+import argparse
+import tempfile
+import statistics
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image
+
+from app.utils.image_extractor import preprocess_image
+
+UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app', 'static', 'uploads')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def tempfile_handoff(image_path):
+    """Đường cũ: trả về (mảng ảnh mà reader nhận được, số byte ghi ra đĩa)"""
+    processed_image = preprocess_image(image_path)
+    with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as temp_file:
+        temp_path = temp_file.name
+        processed_image.save(temp_path, 'JPEG', quality=95)
+    try:
+        bytes_written = os.path.getsize(temp_path)
+        # EasyOCR với input là path: đọc ảnh màu cho detector và đọc lại grayscale cho recognizer
+        with Image.open(temp_path) as image:
+            array = np.asarray(image.convert('RGB'))
+        with Image.open(temp_path) as image:
+            np.asarray(image.convert('L'))
+    finally:
+        os.unlink(temp_path)
+    return array, bytes_written
+
+
+def in_memory_handoff(image_path):
+    """Đường mới: mảng RGB trong bộ nhớ, không ghi đĩa"""
+    return np.asarray(preprocess_image(image_path)), 0
+
+
+def measure(func, image_path, repeat):
+    timings = []
+    bytes_written = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _, bytes_written = func(image_path)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), bytes_written
+
+
+def main():
+    parser = argparse.ArgumentParser(description='OCR preprocessing handoff microbenchmark')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per image (median is reported)')
+    args = parser.parse_args()
+
+    image_paths = []
+    for root, _, files in os.walk(UPLOAD_FOLDER):
+        for name in sorted(files):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                image_paths.append(os.path.join(root, name))
+    if not image_paths:
+        print("No sample images found in app/static/uploads")
+        return 1
+
+    print(f"{'image':<40} {'tempfile (ms)':>14} {'in-memory (ms)':>15} {'saved (ms)':>11} {'disk I/O saved':>15}")
+    print('-' * 100)
+
+    total_saved_ms = 0.0
+    total_saved_bytes = 0
+    for path in image_paths:
+        old_ms, old_bytes = measure(tempfile_handoff, path, args.repeat)
+        new_ms, _ = measure(in_memory_handoff, path, args.repeat)
+        total_saved_ms += old_ms - new_ms
+        # Byte ghi ra + đọc lại hai lần
+        io_bytes = old_bytes * 3
+        total_saved_bytes += io_bytes
+        name = os.path.relpath(path, UPLOAD_FOLDER)
+        print(f"{name[:40]:<40} {old_ms:>14.2f} {new_ms:>15.2f} {old_ms - new_ms:>11.2f} {io_bytes / 1024:>12.1f} KB")
+
+    count = len(image_paths)
+    print('-' * 100)
+    print(f"{count} images: {total_saved_ms / count:.2f} ms and {total_saved_bytes / count / 1024:.1f} KB of disk I/O saved per image on average")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Benchmark: serial vs page-parallel PDF extraction
+Chạy trên các PDF mẫu trong app/static/uploads và một PDF tổng hợp nhiều trang
+(ghép lặp lại các trang mẫu) để thấy rõ speedup với CV/portfolio dài.
+Chạy: python benchmarks/bench_pdf_parallel.py [--pages 40] [--repeat 3]
+"""
+
+import sys
+import os
+import time
+import argparse
+import tempfile
+import statistics
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils import text_extractor
+from app.utils.text_extractor import extract_text_from_pdf
+
+UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app', 'static', 'uploads')
+
+
+def build_multipage_pdf(source_paths, page_count):
+    """Tạo PDF tổng hợp page_count trang bằng cách lặp lại các trang của PDF mẫu"""
+    from PyPDF2 import PdfReader, PdfWriter
+
+    source_pages = []
+    for path in source_paths:
+        source_pages.extend(PdfReader(path).pages)
+
+    writer = PdfWriter()
+    for i in range(page_count):
+        writer.add_page(source_pages[i % len(source_pages)])
+
+    fd, output_path = tempfile.mkstemp(suffix='.pdf', prefix='bench_multipage_')
+    with os.fdopen(fd, 'wb') as file:
+        writer.write(file)
+    return output_path
+
+
+def time_extraction(file_path, parallel, repeat):
+    timings = []
+    text = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        text = extract_text_from_pdf(file_path, parallel=parallel)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), text
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serial vs page-parallel PDF extraction benchmark')
+    parser.add_argument('--pages', type=int, default=40, help='Page count of the synthetic multi-page PDF')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per file (median is reported)')
+    args = parser.parse_args()
+
+    sample_pdfs = sorted(
+        os.path.join(UPLOAD_FOLDER, name) for name in os.listdir(UPLOAD_FOLDER) if name.lower().endswith('.pdf')
+    )
+    if not sample_pdfs:
+        print("No sample PDFs found in app/static/uploads")
+        return 1
+
+    synthetic_pdf = build_multipage_pdf(sample_pdfs, args.pages)
+    print(f"Workers: {text_extractor.PDF_PARALLEL_WORKERS} (cpu_count={os.cpu_count()}), "
+          f"parallel threshold: {text_extractor.PDF_PARALLEL_MIN_PAGES} pages")
+    print(f"{'file':<45} {'serial (s)':>11} {'parallel (s)':>13} {'speedup':>8}  same text")
+    print('-' * 90)
+
+    try:
+        # Warm up pool để không tính chi phí fork/spawn vào lần đo đầu tiên
+        extract_text_from_pdf(synthetic_pdf, parallel=True)
+
+        for path in sample_pdfs + [synthetic_pdf]:
+            serial_time, serial_text = time_extraction(path, False, args.repeat)
+            parallel_time, parallel_text = time_extraction(path, True, args.repeat)
+            name = os.path.basename(path)
+            if path == synthetic_pdf:
+                name = f"<synthetic {args.pages} pages>"
+            speedup = serial_time / parallel_time if parallel_time else 0.0
+            print(f"{name[:45]:<45} {serial_time:>11.3f} {parallel_time:>13.3f} {speedup:>7.2f}x  {serial_text == parallel_text}")
+    finally:
+        os.unlink(synthetic_pdf)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -44,3 +44,45 @@ class Config:
     }
     
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'super-secret-jwt-key'
+    
+    # Xử lý CV bất đồng bộ: upload chỉ lưu file + đưa vào cv_processing_queue, cv_worker.py xử lý
+    # Đặt CV_ASYNC_PROCESSING=false để extract/phân loại ngay trong request (tiện khi dev không chạy worker)
+    CV_ASYNC_PROCESSING = (os.environ.get('CV_ASYNC_PROCESSING') or 'true').lower() in ('1', 'true', 'yes')
+    
+    # Kích thước tối đa của một file CV upload (kiểm tra trong lúc stream ra đĩa)
+    CV_MAX_UPLOAD_BYTES = int(os.environ.get('CV_MAX_UPLOAD_BYTES') or 20 * 1024 * 1024)  # 20MB
+    
+    # Cách phục vụ file download: 'flask' (send_file + Range/ETag), 'x-accel' (nginx) hoặc 'x-sendfile' (Apache)
+    # Với x-accel, nginx cần một internal location trỏ tới app/static/uploads, ví dụ:
+    #   location /protected/uploads/ { internal; alias /path/to/Flask_CVProject/app/static/uploads/; }
+    FILE_SERVING_MODE = os.environ.get('FILE_SERVING_MODE') or 'flask'
+    X_ACCEL_UPLOADS_PREFIX = os.environ.get('X_ACCEL_UPLOADS_PREFIX') or '/protected/uploads/'
+    
+    # Nơi lưu file upload (CV, avatar, logo): 'local' (app/static/uploads), 's3' (S3/MinIO/R2 - nhiều web node dùng chung)
+    # hoặc 'memory' (chỉ để test)
+    BLOB_STORAGE_BACKEND = os.environ.get('BLOB_STORAGE_BACKEND') or 'local'
+    BLOB_LOCAL_ROOT = os.environ.get('BLOB_LOCAL_ROOT')  # Mặc định: app/static/uploads
+    S3_BUCKET = os.environ.get('S3_BUCKET')
+    S3_PREFIX = os.environ.get('S3_PREFIX') or ''
+    S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL')  # Bỏ trống với AWS S3
+    S3_REGION = os.environ.get('S3_REGION')
+    S3_ACCESS_KEY_ID = os.environ.get('S3_ACCESS_KEY_ID')
+    S3_SECRET_ACCESS_KEY = os.environ.get('S3_SECRET_ACCESS_KEY')
+    S3_PUBLIC_BASE_URL = os.environ.get('S3_PUBLIC_BASE_URL')  # CDN/bucket public cho avatar + logo
+    # Thời hạn (giây) của presigned URL khi download CV từ S3
+    BLOB_PRESIGNED_URL_TTL = int(os.environ.get('BLOB_PRESIGNED_URL_TTL') or 300)
+    
+    # Upload CV theo chunk (resumable): kích thước tối đa mỗi chunk và thời hạn của một phiên upload
+    UPLOAD_CHUNK_MAX_BYTES = int(os.environ.get('UPLOAD_CHUNK_MAX_BYTES') or 8 * 1024 * 1024)  # 8MB
+    UPLOAD_SESSION_TTL_HOURS = int(os.environ.get('UPLOAD_SESSION_TTL_HOURS') or 24)
+    # Thư mục chứa file đang upload dở; phải dùng chung giữa các web node (mặc định: staging của storage)
+    UPLOAD_SESSION_DIR = os.environ.get('UPLOAD_SESSION_DIR')
+    
+    # Classifier đã train (train_classifier.py): thư mục artifacts, version cố định (mặc định: version trong CURRENT)
+    ML_MODEL_DIR = os.environ.get('ML_MODEL_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'ml_models')
+    ML_MODEL_VERSION = os.environ.get('ML_MODEL_VERSION')
+    # Số giây giữa hai lần đọc file CURRENT (version đang active) để đổi model không cần restart
+    ML_MODEL_POLL_SECONDS = float(os.environ.get('ML_MODEL_POLL_SECONDS') or 5)
+    ML_CLASSIFIER_ENABLED = (os.environ.get('ML_CLASSIFIER_ENABLED') or 'true').lower() in ('1', 'true', 'yes')
+    # Xác suất tối thiểu để dùng kết quả của model, thấp hơn thì dùng phân loại theo keyword
+    ML_MIN_CONFIDENCE = float(os.environ.get('ML_MIN_CONFIDENCE') or 0.4)
@@ -0,0 +1,83 @@
+"""
+Worker xử lý CV bất đồng bộ - claim các job trong cv_processing_queue,
+extract text, phân loại và ghi kết quả vào bảng cvs / classification_logs
+Chạy: python cv_worker.py [--once] [--poll-interval 2] [--lease-seconds 300] [--max-attempts 3]
+"""
+
+import sys
+import os
+import time
+import logging
+import argparse
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.utils.ml_classifier import register_keyword_model
+from app.utils.cv_queue import (
+    claim_next,
+    process_queue_item,
+    get_worker_id,
+    DEFAULT_LEASE_SECONDS,
+    DEFAULT_MAX_ATTEMPTS
+)
+
+logger = logging.getLogger('cv_worker')
+
+
+def run_worker(once=False, poll_interval=2.0, lease_seconds=DEFAULT_LEASE_SECONDS, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """Claim and process queue items until interrupted (or until the queue is empty with once=True)"""
+    app = create_app()
+    worker_id = get_worker_id()
+    # Đăng ký version keyword trước khi xử lý job (ngoài transaction của job)
+    register_keyword_model(app)
+
+    with app.app_context():
+        logger.info(f"CV worker {worker_id} started (lease={lease_seconds}s, max_attempts={max_attempts})")
+        processed = 0
+        failed = 0
+
+        while True:
+            item = claim_next(worker_id, lease_seconds=lease_seconds, max_attempts=max_attempts)
+            if item is None:
+                if once:
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            logger.info(f"Claimed queue item {item.id} (CV {item.cv_id}, attempt {item.attempts})")
+            if process_queue_item(item, worker_id, max_attempts=max_attempts):
+                processed += 1
+            else:
+                failed += 1
+
+        logger.info(f"CV worker {worker_id} finished: {processed} processed, {failed} failed")
+        return failed == 0
+
+
+if __name__ == '__main__':
+    # Set UTF-8 encoding for Windows
+    if sys.platform == 'win32':
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    parser = argparse.ArgumentParser(description='Process queued CV uploads')
+    parser.add_argument('--once', action='store_true', help='Exit when the queue is empty')
+    parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds to sleep when the queue is empty')
+    parser.add_argument('--lease-seconds', type=int, default=DEFAULT_LEASE_SECONDS, help='Lease duration per claimed job')
+    parser.add_argument('--max-attempts', type=int, default=DEFAULT_MAX_ATTEMPTS, help='Attempts before a job is marked failed')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    try:
+        success = run_worker(
+            once=args.once,
+            poll_interval=args.poll_interval,
+            lease_seconds=args.lease_seconds,
+            max_attempts=args.max_attempts
+        )
+    except KeyboardInterrupt:
+        print("\nWorker stopped")
+        success = True
+
+    sys.exit(0 if success else 1)
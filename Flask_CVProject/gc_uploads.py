@@ -0,0 +1,307 @@
+"""
+Dọn các file upload không còn được tham chiếu (CV, logo công ty, ảnh đại diện)
+- CV: file trong static/uploads (layout cũ) và cvs/ (layout shard) không còn CV row nào trỏ tới,
+  cùng các file tạm .incoming/*.part bị bỏ dở.
+- Logo: file trong company_logos/ (kể cả bản WebP/thumbnail) không thuộc JobPosting.company_logo nào.
+- Avatar: ảnh đại diện không được lưu vào DB (URL chỉ nằm trong form CV builder phía client),
+  nên giữ ảnh mới nhất của mỗi user và xóa các ảnh cũ hơn.
+- Sessions: các upload_sessions đã hết hạn (chưa hoàn tất) và file .part không còn session nào đang
+  mở trong thư mục upload theo chunk (UPLOAD_SESSION_DIR, staging local hoặc tempdir khi dùng S3).
+  Khu vực này chạy được với mọi backend.
+Chỉ xóa file đã cũ hơn grace period, để không đụng vào upload đang được xử lý.
+Quét theo batch và lưu checkpoint (.gc_state.json) sau mỗi batch: chạy lại sẽ tiếp tục từ chỗ dừng.
+Chạy: python gc_uploads.py [--dry-run] [--grace-days 7] [--batch-size 500] [--area cvs|logos|avatars|sessions] [--restart]
+"""
+
+import sys
+import os
+import re
+import json
+import time
+import logging
+import argparse
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.extensions import db
+from app.models import CV, JobPosting
+from app.utils.upload_storage import CV_BLOB_DIR
+from app.utils.blob_storage import STAGING_DIR, get_blob_storage
+from app.utils import chunked_upload
+from app.utils.image_derivatives import THUMB_SUFFIX, WEBP_SUFFIX
+
+logger = logging.getLogger('gc_uploads')
+
+AVATAR_DIR = 'avatars'
+LOGO_DIR = 'company_logos'
+LOGO_URL_PREFIX = '/static/uploads/company_logos/'
+STATE_FILE = '.gc_state.json'
+LOCAL_AREAS = ('cvs', 'logos', 'avatars')
+AREAS = LOCAL_AREAS + ('sessions',)
+
+AVATAR_NAME_RE = re.compile(r'^avatar_(\d+)_')
+SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class GCStats:
+    def __init__(self):
+        self.scanned = 0
+        self.deleted = 0
+        self.reclaimed = 0
+
+
+def iter_files(root, relative_dir=''):
+    """Yield (relative path, DirEntry) in lexicographic order of path components, so a checkpoint is a total order."""
+    directory = os.path.join(root, *relative_dir.split('/')) if relative_dir else root
+    try:
+        entries = sorted(os.scandir(directory), key=lambda entry: entry.name)
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        relative_path = f"{relative_dir}/{entry.name}" if relative_dir else entry.name
+        if entry.is_dir(follow_symlinks=False):
+            yield from iter_files(root, relative_path)
+        elif entry.is_file(follow_symlinks=False):
+            yield relative_path, entry
+
+
+def image_base_name(name):
+    """Base name (without extension) of the image a derivative file belongs to."""
+    if name.endswith(THUMB_SUFFIX):
+        return name[:-len(THUMB_SUFFIX)]
+    return os.path.splitext(name)[0]
+
+
+class UploadGC:
+    def __init__(self, upload_folder, grace_days=7, batch_size=500, dry_run=False):
+        self.upload_folder = upload_folder
+        self.cutoff = time.time() - grace_days * 86400
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.state_path = os.path.join(upload_folder, STATE_FILE)
+        self.state = self._load_state()
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_state(self):
+        if self.dry_run:
+            return
+        temp_path = f"{self.state_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f)
+        os.replace(temp_path, self.state_path)
+
+    def reset_state(self):
+        self.state = {}
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+
+    def _delete(self, path, size, stats):
+        if self.dry_run:
+            logger.info(f"Would delete {path} ({size} bytes)")
+        else:
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning(f"Could not delete {path}: {str(e)}")
+                return
+        stats.deleted += 1
+        stats.reclaimed += size
+
+    def _run_batches(self, area, candidates, find_unreferenced):
+        """
+        Feed old-enough files to find_unreferenced in batches and delete what it returns.
+
+        Args:
+            area: Checkpoint key
+            candidates: Iterator of (key, relative path, DirEntry) in checkpoint order
+            find_unreferenced: Callable(list of (key, relative path, DirEntry)) -> set of relative paths
+        """
+        stats = GCStats()
+        checkpoint = self.state.get(area)
+        batch = []
+
+        def flush():
+            if batch:
+                unreferenced = find_unreferenced(batch)
+                for _, relative_path, entry in batch:
+                    if relative_path in unreferenced:
+                        self._delete(entry.path, entry.stat().st_size, stats)
+                self.state[area] = batch[-1][1]
+                self._save_state()
+                batch.clear()
+
+        for key, relative_path, entry in candidates:
+            if checkpoint is not None and relative_path.split('/') <= checkpoint.split('/'):
+                continue
+            stats.scanned += 1
+            if entry.stat().st_mtime > self.cutoff:
+                continue
+            batch.append((key, relative_path, entry))
+            if len(batch) >= self.batch_size:
+                flush()
+                logger.info(f"[{area}] scanned {stats.scanned}, deleted {stats.deleted} "
+                            f"({stats.reclaimed / 1024 / 1024:.1f}MB), at {relative_path}")
+        flush()
+
+        # Quét xong cả khu vực: lần chạy sau bắt đầu lại từ đầu
+        self.state.pop(area, None)
+        self._save_state()
+        return stats
+
+    # ---------- CV files ----------
+
+    def collect_cvs(self):
+        def candidates():
+            for relative_path, entry in iter_files(self.upload_folder):
+                top = relative_path.split('/')[0]
+                if '/' not in relative_path:
+                    if entry.name.startswith('.'):
+                        continue  # .gc_state.json ...
+                    yield 'legacy', relative_path, entry
+                elif top == CV_BLOB_DIR:
+                    yield 'blob', relative_path, entry
+                elif top == STAGING_DIR:
+                    if relative_path.split('/')[1] == chunked_upload.SESSION_SUBDIR:
+                        continue  # Upload theo chunk: khu vực sessions
+                    yield 'incoming', relative_path, entry
+                # avatars/ và company_logos/ được xử lý riêng
+
+        def find_unreferenced(batch):
+            blobs = [relative_path for key, relative_path, _ in batch if key == 'blob']
+            legacy_names = [relative_path for key, relative_path, _ in batch if key == 'legacy']
+            referenced = set()
+            if blobs:
+                referenced.update(path for (path,) in db.session.query(CV.storage_path)
+                                  .filter(CV.storage_path.in_(blobs)))
+            if legacy_names:
+                # File layout cũ: tham chiếu qua tên file hoặc <content_hash>.<ext>
+                # (giữ cả file của CV đã relocate - relocate_uploads.py --remove-legacy lo phần đó)
+                hashes = [os.path.splitext(name)[0] for name in legacy_names
+                          if SHA256_RE.match(os.path.splitext(name)[0])]
+                conditions = [CV.file_name.in_(legacy_names)]
+                if hashes:
+                    conditions.append(CV.content_hash.in_(hashes))
+                for file_name, content_hash, file_type in db.session.query(
+                        CV.file_name, CV.content_hash, CV.file_type).filter(db.or_(*conditions)):
+                    referenced.add(file_name)
+                    if content_hash and file_type:
+                        referenced.add(f"{content_hash}.{file_type.lower()}")
+            # File .part cũ hơn grace period là upload bị bỏ dở
+            return {relative_path for _, relative_path, _ in batch if relative_path not in referenced}
+
+        return self._run_batches('cvs', candidates(), find_unreferenced)
+
+    # ---------- Company logos ----------
+
+    def collect_logos(self):
+        def candidates():
+            for relative_path, entry in iter_files(os.path.join(self.upload_folder, LOGO_DIR)):
+                if '/' not in relative_path:
+                    yield image_base_name(entry.name), relative_path, entry
+
+        def find_unreferenced(batch):
+            # Bản WebP/thumbnail thuộc về ảnh chính <base>.jpg|png|... nên so theo base name
+            urls = {}
+            for base, relative_path, _ in batch:
+                for ext in ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg'):
+                    urls[LOGO_URL_PREFIX + base + ext] = base
+            referenced_bases = set()
+            url_list = list(urls)
+            for start in range(0, len(url_list), self.batch_size):
+                for (url,) in db.session.query(JobPosting.company_logo).filter(
+                        JobPosting.company_logo.in_(url_list[start:start + self.batch_size])):
+                    referenced_bases.add(urls[url])
+            return {relative_path for base, relative_path, _ in batch if base not in referenced_bases}
+
+        return self._run_batches('logos', candidates(), find_unreferenced)
+
+    # ---------- Avatars ----------
+
+    def collect_avatars(self):
+        avatar_folder = os.path.join(self.upload_folder, AVATAR_DIR)
+        # Pass 1: ảnh mới nhất của mỗi user (chỉ liệt kê thư mục, không đọc file)
+        newest = {}
+        for relative_path, entry in iter_files(avatar_folder):
+            match = AVATAR_NAME_RE.match(entry.name)
+            if not match or entry.name.endswith(WEBP_SUFFIX):
+                continue
+            mtime = entry.stat().st_mtime
+            user_id = match.group(1)
+            if user_id not in newest or mtime > newest[user_id][0]:
+                newest[user_id] = (mtime, os.path.splitext(entry.name)[0])
+        keep_bases = {base for _, base in newest.values()}
+
+        def candidates():
+            for relative_path, entry in iter_files(avatar_folder):
+                if '/' not in relative_path:
+                    yield image_base_name(entry.name), relative_path, entry
+
+        def find_unreferenced(batch):
+            return {relative_path for base, relative_path, _ in batch
+                    if base not in keep_bases and AVATAR_NAME_RE.match(base)}
+
+        return self._run_batches('avatars', candidates(), find_unreferenced)
+
+    def run(self, areas=AREAS):
+        results = {}
+        for area in areas:
+            collect = getattr(self, f"collect_{area}")
+            results[area] = collect()
+        return results
+
+
+if __name__ == '__main__':
+    # Set UTF-8 encoding for Windows
+    if sys.platform == 'win32':
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    parser = argparse.ArgumentParser(description='Delete upload files no longer referenced by CV/JobPosting rows')
+    parser.add_argument('--grace-days', type=float, default=7, help='Only delete files older than this')
+    parser.add_argument('--batch-size', type=int, default=500, help='Files checked per DB query/checkpoint')
+    parser.add_argument('--area', choices=AREAS, action='append', help='Limit to one area (repeatable)')
+    parser.add_argument('--dry-run', action='store_true', help='Only report what would be deleted')
+    parser.add_argument('--restart', action='store_true', help='Ignore the saved checkpoint')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    app = create_app()
+    with app.app_context():
+        storage = get_blob_storage()
+        areas = tuple(args.area) if args.area else AREAS
+        results = {}
+        if 'sessions' in areas:
+            directory = chunked_upload.session_dir(storage, app.config.get('UPLOAD_SESSION_DIR'))
+            sessions, files, reclaimed = chunked_upload.purge_expired(directory, args.grace_days * 86400, args.dry_run)
+            print(f"sessions {'would delete' if args.dry_run else 'deleted'} {sessions} expired upload sessions")
+            stats = GCStats()
+            stats.deleted, stats.reclaimed = files, reclaimed
+            results['sessions'] = stats
+
+        local_areas = tuple(area for area in areas if area in LOCAL_AREAS)
+        if local_areas and storage.backend != 'local':
+            # Script duyệt thư mục local; chưa hỗ trợ liệt kê object trên S3
+            print(f"Areas {', '.join(local_areas)} only work with the local backend (BLOB_STORAGE_BACKEND={storage.backend})")
+            if args.area:
+                sys.exit(1)
+            local_areas = ()
+        if local_areas:
+            gc = UploadGC(storage.root, args.grace_days, args.batch_size, args.dry_run)
+            if args.restart:
+                gc.reset_state()
+            results.update(gc.run(local_areas))
+
+        total = 0
+        print()
+        for area, stats in results.items():
+            total += stats.reclaimed
+            print(f"{area:8s} scanned {stats.scanned:6d}, {'would delete' if args.dry_run else 'deleted'} "
+                  f"{stats.deleted:6d} files ({stats.reclaimed / 1024 / 1024:.1f}MB)")
+        print(f"Total {'reclaimable' if args.dry_run else 'reclaimed'}: {total / 1024 / 1024:.1f}MB")
@@ -0,0 +1,40 @@
+"""Add status and lease columns to cv_processing_queue
+
+Revision ID: 3f6a2c1d9b47
+Revises: cebe1a06f4af
+Create Date: 2026-10-17 09:12:41.318205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f6a2c1d9b47'
+down_revision = 'cebe1a06f4af'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('cv_processing_queue', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('status', sa.String(length=20), nullable=False, server_default='pending'))
+        batch_op.add_column(sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('available_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('lease_expires_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('worker_id', sa.String(length=100), nullable=True))
+        batch_op.add_column(sa.Column('last_error', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('finished_at', sa.DateTime(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_cv_processing_queue_status'), ['status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('cv_processing_queue', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_cv_processing_queue_status'))
+        batch_op.drop_column('finished_at')
+        batch_op.drop_column('last_error')
+        batch_op.drop_column('worker_id')
+        batch_op.drop_column('lease_expires_at')
+        batch_op.drop_column('available_at')
+        batch_op.drop_column('attempts')
+        batch_op.drop_column('status')
@@ -0,0 +1,116 @@
+"""Move cvs.file_content into compressed cv_texts table
+
+Revision ID: 5d81f0c3a2e6
+Revises: 9c2e7b4a1f03
+Create Date: 2026-10-17 13:05:27.118342
+
+"""
+import zlib
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d81f0c3a2e6'
+down_revision = '9c2e7b4a1f03'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+# Giống app.models.cvtext (giữ migration độc lập với code app): text ngắn lưu không nén, còn lại zlib
+MIN_COMPRESS_BYTES = 256
+ZLIB_LEVEL = 6
+
+cvs = sa.table(
+    'cvs',
+    sa.column('id', sa.Integer),
+    sa.column('file_content', sa.Text),
+)
+cv_texts = sa.table(
+    'cv_texts',
+    sa.column('cv_id', sa.Integer),
+    sa.column('codec', sa.String),
+    sa.column('content', sa.LargeBinary),
+    sa.column('text_length', sa.Integer),
+    sa.column('updated_at', sa.DateTime),
+)
+
+
+def _pack(text):
+    data = text.encode('utf-8')
+    if len(data) < MIN_COMPRESS_BYTES:
+        return 'none', data
+    return 'zlib', zlib.compress(data, ZLIB_LEVEL)
+
+
+def _unpack(codec, data):
+    if codec == 'zlib':
+        data = zlib.decompress(data)
+    elif codec == 'zstd':
+        import zstandard
+        data = zstandard.ZstdDecompressor().decompress(data)
+    return data.decode('utf-8')
+
+
+def upgrade():
+    op.create_table('cv_texts',
+    sa.Column('cv_id', sa.Integer(), nullable=False),
+    sa.Column('codec', sa.String(length=10), nullable=False),
+    sa.Column('content', sa.LargeBinary(), nullable=False),
+    sa.Column('text_length', sa.Integer(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['cv_id'], ['cvs.id'], ),
+    sa.PrimaryKeyConstraint('cv_id')
+    )
+
+    # Backfill theo từng batch (keyset theo id) để không load toàn bộ text vào bộ nhớ
+    connection = op.get_bind()
+    last_id = 0
+    now = datetime.utcnow()
+    while True:
+        rows = connection.execute(
+            sa.select(cvs.c.id, cvs.c.file_content)
+            .where(cvs.c.id > last_id, cvs.c.file_content.isnot(None))
+            .order_by(cvs.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        values = []
+        for cv_id, text in rows:
+            if text:
+                codec, content = _pack(text)
+                values.append({'cv_id': cv_id, 'codec': codec, 'content': content,
+                               'text_length': len(text), 'updated_at': now})
+        if values:
+            connection.execute(cv_texts.insert(), values)
+        last_id = rows[-1][0]
+
+    with op.batch_alter_table('cvs', schema=None) as batch_op:
+        batch_op.drop_column('file_content')
+
+
+def downgrade():
+    with op.batch_alter_table('cvs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('file_content', sa.Text(), nullable=True))
+
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(cv_texts.c.cv_id, cv_texts.c.codec, cv_texts.c.content)
+            .where(cv_texts.c.cv_id > last_id)
+            .order_by(cv_texts.c.cv_id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        for cv_id, codec, content in rows:
+            connection.execute(
+                cvs.update().where(cvs.c.id == cv_id).values(file_content=_unpack(codec, content))
+            )
+        last_id = rows[-1][0]
+
+    op.drop_table('cv_texts')
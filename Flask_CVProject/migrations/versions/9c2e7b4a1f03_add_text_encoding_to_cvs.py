@@ -0,0 +1,26 @@
+"""Add text_encoding to cvs
+
+Revision ID: 9c2e7b4a1f03
+Revises: 3f6a2c1d9b47
+Create Date: 2026-10-17 11:48:05.604913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c2e7b4a1f03'
+down_revision = '3f6a2c1d9b47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('cvs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('text_encoding', sa.String(length=32), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('cvs', schema=None) as batch_op:
+        batch_op.drop_column('text_encoding')
@@ -0,0 +1,29 @@
+"""Add content_hash to cvs
+
+Revision ID: a47d3e9b6c12
+Revises: 5d81f0c3a2e6
+Create Date: 2026-10-17 14:21:50.907716
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a47d3e9b6c12'
+down_revision = '5d81f0c3a2e6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CV cũ giữ content_hash = NULL và tiếp tục được tìm theo file_name
+    with op.batch_alter_table('cvs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+        batch_op.create_index(batch_op.f('ix_cvs_content_hash'), ['content_hash'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('cvs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_cvs_content_hash'))
+        batch_op.drop_column('content_hash')
@@ -0,0 +1,29 @@
+"""Add storage_path to cvs
+
+Revision ID: c18b5f2e7a90
+Revises: a47d3e9b6c12
+Create Date: 2026-10-17 15:02:13.446581
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c18b5f2e7a90'
+down_revision = 'a47d3e9b6c12'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Các CV cũ được điền storage_path bằng relocate_uploads.py (di chuyển file), không phải ở đây
+    with op.batch_alter_table('cvs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('storage_path', sa.String(length=255), nullable=True))
+        batch_op.create_index(batch_op.f('ix_cvs_storage_path'), ['storage_path'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('cvs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_cvs_storage_path'))
+        batch_op.drop_column('storage_path')
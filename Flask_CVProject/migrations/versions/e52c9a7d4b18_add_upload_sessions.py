@@ -0,0 +1,44 @@
+"""Add upload_sessions table for resumable chunked uploads
+
+Revision ID: e52c9a7d4b18
+Revises: c18b5f2e7a90
+Create Date: 2026-10-17 16:21:48.902117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e52c9a7d4b18'
+down_revision = 'c18b5f2e7a90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('upload_sessions',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('file_name', sa.String(length=255), nullable=False),
+    sa.Column('file_type', sa.String(length=50), nullable=False),
+    sa.Column('total_size', sa.Integer(), nullable=False),
+    sa.Column('received_bytes', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('status', sa.String(length=20), nullable=False, server_default='open'),
+    sa.Column('cv_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['cv_id'], ['cvs.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('upload_sessions', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_upload_sessions_status'), ['status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('upload_sessions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_upload_sessions_status'))
+
+    op.drop_table('upload_sessions')
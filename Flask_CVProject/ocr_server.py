@@ -0,0 +1,59 @@
+"""
+OCR server dùng chung - load model EasyOCR một lần cho cả host,
+các web worker / cv_worker gửi job qua local socket (đặt OCR_SERVICE_ADDRESS)
+Server và client phải dùng chung một authkey: OCR_SERVICE_AUTHKEY hoặc file OCR_SERVICE_AUTHKEY_FILE
+(--generate-authkey tạo file với key ngẫu nhiên nếu chưa có).
+Chạy: python ocr_server.py [--address 127.0.0.1:6010] [--workers 1] [--languages en,vi]
+      [--authkey-file /path/to/key --generate-authkey]
+"""
+
+import sys
+import os
+import logging
+import argparse
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils.ocr_service import (
+    serve,
+    load_authkey,
+    generate_authkey_file,
+    OCRUnavailableError,
+    OCR_POOL_SIZE,
+    OCR_SERVICE_AUTHKEY_FILE,
+    DEFAULT_LANGUAGES
+)
+
+
+if __name__ == '__main__':
+    # Set UTF-8 encoding for Windows
+    if sys.platform == 'win32':
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    parser = argparse.ArgumentParser(description='Shared EasyOCR server')
+    parser.add_argument('--address', default=os.environ.get('OCR_SERVICE_ADDRESS') or '127.0.0.1:6010',
+                        help='host:port or unix socket path to listen on')
+    parser.add_argument('--workers', type=int, default=OCR_POOL_SIZE, help='Number of OCR worker processes')
+    parser.add_argument('--languages', default=','.join(DEFAULT_LANGUAGES), help='Comma-separated EasyOCR language codes')
+    parser.add_argument('--authkey-file', default=OCR_SERVICE_AUTHKEY_FILE,
+                        help='File with the shared authkey (default: OCR_SERVICE_AUTHKEY_FILE)')
+    parser.add_argument('--generate-authkey', action='store_true',
+                        help='Create the authkey file with a random key if it does not exist')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    try:
+        if args.generate_authkey:
+            if not args.authkey_file:
+                print("--generate-authkey needs --authkey-file or OCR_SERVICE_AUTHKEY_FILE")
+                sys.exit(1)
+            authkey = generate_authkey_file(args.authkey_file)
+        else:
+            authkey = load_authkey(args.authkey_file)
+        serve(args.address, authkey=authkey, pool_size=args.workers, languages=args.languages.split(','))
+    except OCRUnavailableError as e:
+        print(str(e))
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print("\nOCR server stopped")
@@ -0,0 +1,297 @@
+"""
+Phân loại lại các CV đã có (backfill) sau khi CATEGORY_KEYWORDS hoặc model đang active thay đổi
+Duyệt CV theo keyset (id tăng dần, mỗi batch một query), phân loại cả batch bằng classify_cv_texts,
+rồi ghi bằng một bulk UPDATE cvs.predicted_category_id và một bulk INSERT classification_logs.
+- Resumable: id cuối cùng của mỗi batch đã commit được lưu vào checkpoint; chạy lại sẽ tiếp tục.
+  CV có log mới nhất do model hiện tại ghi (sau khi model được active) được bỏ qua, nên batch bị chạy
+  lại không tạo log trùng. Sau khi rollback về một version cũ nên chạy với --force.
+- Nhiều process: --workers N --worker-index i chỉ xử lý CV có id % N == i (mỗi phần có checkpoint riêng),
+  hoặc --processes N để tự chạy N process con trên máy này.
+Chạy: python reclassify_cvs.py [--batch-size 500] [--processes 4] [--workers N --worker-index i]
+      [--force] [--no-translate] [--dry-run] [--restart]
+"""
+
+import sys
+import os
+import json
+import time
+import logging
+import argparse
+import subprocess
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import func, insert, update
+
+from app import create_app
+from app.extensions import db
+from app.models import CV, ClassificationLog, JobCategory, MLModel
+from app.models.cvtext import CVText, decompress_text
+from app.utils.classifier import CATEGORY_KEYWORDS, classify_cv_texts
+from app.utils.ml_classifier import get_active_model, get_keyword_model_id
+
+logger = logging.getLogger('reclassify_cvs')
+
+STATE_FILE = '.reclassify_state.{index}-of-{workers}.json'
+PROGRESS_INTERVAL_SECONDS = 10
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    return f"{hours}h{minutes:02d}m{seconds:02d}s" if hours else f"{minutes}m{seconds:02d}s"
+
+
+class BackfillError(RuntimeError):
+    """The backfill cannot start (e.g. the current classifier could not be resolved)."""
+
+
+class BackfillStats:
+    def __init__(self):
+        self.scanned = 0
+        self.classified = 0
+        self.changed = 0
+        self.skipped = 0
+        self.without_text = 0
+
+
+class Reclassifier:
+    def __init__(self, state_dir, batch_size=500, workers=1, worker_index=0,
+                 force=False, auto_translate=True, dry_run=False):
+        self.batch_size = batch_size
+        self.workers = workers
+        self.worker_index = worker_index
+        self.force = force
+        self.auto_translate = auto_translate
+        self.dry_run = dry_run
+        self.state_path = os.path.join(state_dir, STATE_FILE.format(index=worker_index, workers=workers))
+        self.category_ids = {name: category_id for category_id, name in db.session.query(JobCategory.id, JobCategory.name)}
+
+        # Các MLModel có thể quyết định lúc này: model đang active và bộ keyword hiện tại (fallback).
+        # Log của chúng chỉ là kết quả hiện tại nếu được ghi sau khi cả hai cùng được dùng
+        # (vd log keyword cũ, ghi khi chưa có model, thì phải phân loại lại)
+        active = get_active_model()
+        keyword_model_id = get_keyword_model_id(CATEGORY_KEYWORDS)
+        if keyword_model_id is None:
+            # Không biết log nào là kết quả hiện tại: chạy tiếp sẽ phân loại lại (và ghi log) sai
+            raise BackfillError("Could not register the current keyword classifier version (see the error above); "
+                                "check the database connection and that migrations are applied")
+        self.current_model_ids = {keyword_model_id}
+        self.current_since = db.session.get(MLModel, keyword_model_id).training_date or datetime.min
+        if active is not None:
+            self.current_model_ids.add(active.mlmodel_id)
+            self.current_since = max(self.current_since, active.activated_at or datetime.min)
+        db.session.commit()
+        self.target = {'models': sorted(self.current_model_ids), 'since': self.current_since.isoformat()}
+        self.state = self._load_state()
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+        if state.get('target') != self.target:
+            # Model/keyword đã đổi kể từ lần chạy dở: phải duyệt lại từ đầu
+            logger.info("Classifier changed since the saved checkpoint, starting over")
+            return {}
+        return state
+
+    def _save_state(self):
+        if self.dry_run:
+            return
+        temp_path = f"{self.state_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f)
+        os.replace(temp_path, self.state_path)
+
+    def reset_state(self):
+        self.state = {}
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+
+    def _partition_filter(self, query, after_id):
+        query = query.filter(CV.id > after_id)
+        if self.workers > 1:
+            query = query.filter(CV.id % self.workers == self.worker_index)
+        return query
+
+    def _current_cv_ids(self, cv_ids):
+        """CVs of the batch whose latest log was written by the current classifier."""
+        latest = db.session.query(
+            ClassificationLog.cv_id, func.max(ClassificationLog.id).label('log_id')
+        ).filter(ClassificationLog.cv_id.in_(cv_ids)).group_by(ClassificationLog.cv_id).subquery()
+        rows = db.session.query(ClassificationLog.cv_id).join(
+            latest, ClassificationLog.id == latest.c.log_id
+        ).filter(
+            ClassificationLog.mlmodel_id.in_(self.current_model_ids),
+            ClassificationLog.created_at >= self.current_since
+        )
+        return {cv_id for (cv_id,) in rows}
+
+    def _process_batch(self, rows, stats):
+        cv_ids = [cv_id for cv_id, _, _ in rows]
+        skip = set() if self.force else self._current_cv_ids(cv_ids)
+        stats.skipped += len(skip)
+
+        # Đọc text trực tiếp từ cv_texts (không tạo object CV/CVText trong session)
+        texts = {cv_id: decompress_text(codec, content) for cv_id, codec, content in db.session.query(
+            CVText.cv_id, CVText.codec, CVText.content).filter(CVText.cv_id.in_([i for i in cv_ids if i not in skip]))}
+        todo = [row for row in rows if row[0] in texts and texts[row[0]].strip()]
+        stats.without_text += len(rows) - len(skip) - len(todo)
+        if not todo:
+            return
+
+        results = classify_cv_texts([texts[cv_id] for cv_id, _, _ in todo], auto_translate=self.auto_translate)
+        now = datetime.utcnow()
+        updates = []
+        logs = []
+        for (cv_id, user_id, old_category_id), (category_name, confidence, mlmodel_id) in zip(todo, results):
+            category_id = self.category_ids.get(category_name) if category_name else None
+            if category_name and category_id is None:
+                logger.warning(f"Category '{category_name}' not found in database (CV {cv_id})")
+            if category_id != old_category_id:
+                updates.append({'id': cv_id, 'predicted_category_id': category_id})
+            if category_id is not None:
+                logs.append({'cv_id': cv_id, 'predicted_category_id': category_id, 'confidence': confidence,
+                             'mlmodel_id': mlmodel_id, 'user_id': user_id, 'created_at': now})
+        stats.classified += len(todo)
+        stats.changed += len(updates)
+
+        if self.dry_run:
+            return
+        # Bulk UPDATE theo primary key + bulk INSERT (executemany), một transaction cho cả batch
+        if updates:
+            db.session.execute(update(CV), updates)
+        if logs:
+            db.session.execute(insert(ClassificationLog), logs)
+
+    def run(self):
+        stats = BackfillStats()
+        after_id = self.state.get('last_id', 0)
+        total = self._partition_filter(db.session.query(func.count(CV.id)), after_id).scalar()
+        part = f" (partition {self.worker_index}/{self.workers})" if self.workers > 1 else ''
+        logger.info(f"Re-classifying {total} CVs{part}"
+                    f"{f' after id {after_id}' if after_id else ''}, current models {self.target['models']}")
+
+        start = time.monotonic()
+        reported_at = start
+        while True:
+            rows = self._partition_filter(
+                db.session.query(CV.id, CV.user_id, CV.predicted_category_id), after_id
+            ).order_by(CV.id).limit(self.batch_size).all()
+            if not rows:
+                break
+
+            try:
+                self._process_batch(rows, stats)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            after_id = rows[-1][0]
+            stats.scanned += len(rows)
+            # Checkpoint chỉ ghi sau khi batch đã commit
+            self.state = {'last_id': after_id, 'target': self.target}
+            self._save_state()
+
+            now = time.monotonic()
+            if now - reported_at >= PROGRESS_INTERVAL_SECONDS or stats.scanned >= total:
+                reported_at = now
+                rate = stats.scanned / max(now - start, 1e-9)
+                remaining = max(total - stats.scanned, 0)
+                logger.info(f"{stats.scanned}/{total} CVs ({stats.scanned / max(total, 1):.0%}){part}, "
+                            f"{stats.changed} changed, {stats.skipped} up to date, {rate:.0f} CVs/s, "
+                            f"ETA {format_duration(remaining / rate) if rate else '?'}")
+
+        # Duyệt xong: lần chạy sau bắt đầu lại từ đầu
+        self.state = {}
+        if not self.dry_run and os.path.exists(self.state_path):
+            os.remove(self.state_path)
+        logger.info(f"Done{part} in {format_duration(time.monotonic() - start)}: {stats.scanned} scanned, "
+                    f"{stats.classified} classified, {stats.changed} changed, {stats.skipped} up to date, "
+                    f"{stats.without_text} without text")
+        return stats
+
+
+def spawn_processes(processes):
+    """Run this script once per partition in child processes and wait for all of them."""
+    # Tham số của process con: như lệnh gốc, trừ phần chia partition
+    skip_next = False
+    child_args = []
+    for arg in sys.argv[1:]:
+        if skip_next:
+            skip_next = False
+            continue
+        if arg in ('--processes', '--workers', '--worker-index'):
+            skip_next = True
+            continue
+        if arg.startswith(('--processes=', '--workers=', '--worker-index=')):
+            continue
+        child_args.append(arg)
+
+    children = [
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), *child_args,
+                          '--workers', str(processes), '--worker-index', str(index)])
+        for index in range(processes)
+    ]
+    codes = [child.wait() for child in children]
+    failed = sum(1 for code in codes if code != 0)
+    if failed:
+        print(f"{failed} of {processes} processes failed; run again to resume them")
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-classify existing CVs with the current keywords/model')
+    parser.add_argument('--batch-size', type=int, default=500, help='CVs per query, classification batch and commit')
+    parser.add_argument('--workers', type=int, default=1, help='Total number of partitions (processes) of the run')
+    parser.add_argument('--worker-index', type=int, default=0, help='Partition handled by this process (0..workers-1)')
+    parser.add_argument('--processes', type=int, default=1, help='Spawn this many local processes, one per partition')
+    parser.add_argument('--force', action='store_true', help='Also re-classify CVs already classified by the current models')
+    parser.add_argument('--no-translate', action='store_true', help='Do not translate non-English CVs for keyword matching')
+    parser.add_argument('--dry-run', action='store_true', help='Classify and report, do not write or checkpoint')
+    parser.add_argument('--restart', action='store_true', help='Ignore the saved checkpoint')
+    args = parser.parse_args()
+
+    if args.processes > 1:
+        return spawn_processes(args.processes)
+    if not 0 <= args.worker_index < args.workers:
+        print("--worker-index must be between 0 and --workers - 1")
+        return 1
+
+    app = create_app()
+    with app.app_context():
+        os.makedirs(app.instance_path, exist_ok=True)
+        try:
+            reclassifier = Reclassifier(
+                app.instance_path,
+                batch_size=args.batch_size,
+                workers=args.workers,
+                worker_index=args.worker_index,
+                force=args.force,
+                auto_translate=not args.no_translate,
+                dry_run=args.dry_run
+            )
+        except BackfillError as e:
+            print(str(e))
+            return 1
+        if args.restart:
+            reclassifier.reset_state()
+        reclassifier.run()
+    return 0
+
+
+if __name__ == '__main__':
+    # Set UTF-8 encoding for Windows
+    if sys.platform == 'win32':
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("\nStopped; run again to resume from the last committed batch")
+        sys.exit(1)
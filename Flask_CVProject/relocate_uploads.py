@@ -0,0 +1,156 @@
+"""
+Chuyển các file CV upload theo layout cũ (phẳng trong static/uploads, đặt theo tên file
+hoặc <hash>.<ext>) sang layout shard theo hash và ghi CV.storage_path.
+Không cần downtime: file được hard-link (hoặc copy) sang vị trí mới trước, rồi mới cập nhật
+CV row; file cũ giữ nguyên cho tới khi chạy lại với --remove-legacy.
+Chạy: python relocate_uploads.py [--batch-size 200] [--dry-run]
+      python relocate_uploads.py --remove-legacy   (sau khi các web worker đã chạy code mới)
+"""
+
+import sys
+import os
+import shutil
+import logging
+import argparse
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.extensions import db
+from app.models import CV
+from app.utils.extraction_cache import hash_file
+from app.utils.upload_storage import blob_relative_path, resolve_path, legacy_cv_file_path
+from app.utils.blob_storage import get_blob_storage
+
+logger = logging.getLogger('relocate_uploads')
+
+
+def link_or_copy(source, target):
+    """Place source at target atomically: hard link when on the same filesystem, copy otherwise."""
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    temp_path = f"{target}.{os.getpid()}.tmp"
+    try:
+        try:
+            os.link(source, temp_path)
+        except OSError:
+            shutil.copy2(source, temp_path)
+        os.replace(temp_path, target)
+    finally:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+
+def relocate(upload_folder, batch_size=200, dry_run=False):
+    """Relocate every CV without storage_path; returns (relocated, missing)."""
+    relocated = 0
+    missing = 0
+    last_id = 0
+
+    while True:
+        # Keyset pagination: không dùng OFFSET, và upload mới (đã có storage_path) không bị lẫn vào
+        batch = CV.query.filter(CV.id > last_id, CV.storage_path.is_(None)).order_by(CV.id).limit(batch_size).all()
+        if not batch:
+            break
+
+        for cv in batch:
+            legacy_path = legacy_cv_file_path(cv, upload_folder)
+            if not os.path.isfile(legacy_path):
+                logger.warning(f"CV {cv.id}: file not found at {legacy_path}, skipped")
+                missing += 1
+                continue
+
+            content_hash = cv.content_hash or hash_file(legacy_path)
+            if not content_hash:
+                missing += 1
+                continue
+            file_type = (cv.file_type or os.path.splitext(legacy_path)[1].lstrip('.')).lower()
+            relative_path = blob_relative_path(content_hash, file_type)
+
+            if dry_run:
+                logger.info(f"CV {cv.id}: {os.path.basename(legacy_path)} -> {relative_path}")
+            else:
+                target_path = resolve_path(upload_folder, relative_path)
+                if not os.path.exists(target_path):
+                    link_or_copy(legacy_path, target_path)
+                cv.content_hash = content_hash
+                cv.storage_path = relative_path
+            relocated += 1
+
+        last_id = batch[-1].id
+        if not dry_run:
+            # Commit từng batch: file mới đã nằm đúng chỗ trước khi row trỏ tới nó
+            db.session.commit()
+        logger.info(f"Relocated {relocated} CV files so far (last id {last_id})")
+
+    return relocated, missing
+
+
+def remove_legacy_files(upload_folder, batch_size=200, dry_run=False):
+    """Delete old flat files whose CVs were all relocated; returns (files removed, bytes reclaimed)."""
+    removed = 0
+    reclaimed = 0
+    last_id = 0
+
+    while True:
+        batch = CV.query.filter(CV.id > last_id, CV.storage_path.isnot(None)).order_by(CV.id).limit(batch_size).all()
+        if not batch:
+            break
+        last_id = batch[-1].id
+
+        for cv in batch:
+            # CV mới upload thẳng vào layout shard không có file cũ
+            for legacy_path in {os.path.join(upload_folder, cv.file_name),
+                                os.path.join(upload_folder, f"{cv.content_hash}.{(cv.file_type or '').lower()}")}:
+                if not os.path.isfile(legacy_path):
+                    continue
+                target_path = resolve_path(upload_folder, cv.storage_path)
+                if not os.path.isfile(target_path) or os.path.getsize(target_path) != os.path.getsize(legacy_path):
+                    continue
+                if hash_file(legacy_path) != cv.content_hash:
+                    continue  # File trùng tên nhưng là nội dung khác - không phải bản cũ của CV này
+                name = os.path.basename(legacy_path)
+                still_used = CV.query.filter(
+                    CV.storage_path.is_(None),
+                    db.or_(CV.file_name == name, CV.content_hash == cv.content_hash)
+                ).first()
+                if still_used is not None:
+                    continue
+
+                size = os.path.getsize(legacy_path)
+                if dry_run:
+                    logger.info(f"Would remove {legacy_path} ({size} bytes)")
+                else:
+                    os.remove(legacy_path)
+                removed += 1
+                reclaimed += size
+
+    return removed, reclaimed
+
+
+if __name__ == '__main__':
+    # Set UTF-8 encoding for Windows
+    if sys.platform == 'win32':
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    parser = argparse.ArgumentParser(description='Relocate CV uploads into the hash-sharded layout')
+    parser.add_argument('--batch-size', type=int, default=200, help='CV rows per batch/commit')
+    parser.add_argument('--dry-run', action='store_true', help='Only report what would change')
+    parser.add_argument('--remove-legacy', action='store_true',
+                        help='Delete old flat files whose CVs have all been relocated')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    app = create_app()
+    with app.app_context():
+        storage = get_blob_storage()
+        if storage.backend != 'local':
+            print(f"relocate_uploads.py only works with the local backend (BLOB_STORAGE_BACKEND={storage.backend})")
+            sys.exit(1)
+        if args.remove_legacy:
+            removed, reclaimed = remove_legacy_files(storage.root, args.batch_size, args.dry_run)
+            print(f"\n{'Would remove' if args.dry_run else 'Removed'} {removed} legacy files "
+                  f"({reclaimed / 1024 / 1024:.1f}MB)")
+        else:
+            relocated, missing = relocate(storage.root, args.batch_size, args.dry_run)
+            print(f"\n{'Would relocate' if args.dry_run else 'Relocated'} {relocated} CV files, {missing} missing")
@@ -1,6 +1,10 @@
 from app import create_app
+from app.utils.ml_classifier import register_keyword_model
 
 app = create_app()
+# Đăng ký version bộ keyword (dòng ml_models) một lần khi khởi động, ngoài transaction của request:
+# get_keyword_model_id không phải ghi (và chờ lock SQLite) giữa một request
+register_keyword_model(app)
 
 if __name__ == "__main__":
     app.run(debug=True)
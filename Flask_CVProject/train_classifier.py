@@ -0,0 +1,216 @@
+"""
+Train the TF-IDF + linear CV classifier offline and register it as an MLModel version
+Dữ liệu train: text đã extract của CV (cv_texts) + category mà recruiter đã xác nhận, tức là
+category của tin tuyển dụng mà CV được chuyển sang trạng thái shortlisted/hired.
+Đánh giá trên tập test tách theo từng category, rồi train lại trên toàn bộ dữ liệu,
+lưu artifacts NumPy vào ML_MODEL_DIR/<version>/, thêm một dòng ml_models rồi ghi version
+vào ML_MODEL_DIR/CURRENT: web/worker đang chạy tự chuyển sang model mới, không cần restart.
+Chạy: python train_classifier.py [--test-fraction 0.2] [--min-df 2] [--max-features 20000]
+      [--epochs 30] [--statuses shortlisted,hired] [--version ...] [--dry-run] [--no-activate]
+      python train_classifier.py --activate <version>   (đổi/rollback model, 'none' = chỉ dùng keyword)
+"""
+
+import sys
+import os
+import json
+import time
+import logging
+import argparse
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import case
+from sqlalchemy.orm import selectinload
+
+from app import create_app
+from app.extensions import db
+from app.models import CV, JobApplication, JobPosting, JobCategory, MLModel
+from app.utils.ml_classifier import (
+    MODEL_TYPE,
+    HAS_NUMPY,
+    train_model,
+    evaluate,
+    stratified_split,
+    NO_MODEL,
+    save_model,
+    model_path,
+    new_version,
+    read_pointer,
+    write_pointer
+)
+
+logger = logging.getLogger('train_classifier')
+
+TEXT_BATCH_SIZE = 200
+MIN_SAMPLES_PER_CLASS = 2
+
+
+def load_confirmed_labels(statuses):
+    """
+    {cv_id: category name} from job applications a recruiter moved to one of statuses.
+    A CV confirmed for several jobs keeps the strongest (hired > shortlisted), then latest, decision.
+    """
+    status_rank = case((JobApplication.status == 'hired', 0), else_=1)
+    rows = db.session.query(JobApplication.cv_id, JobCategory.name).join(
+        JobPosting, JobApplication.job_posting_id == JobPosting.id
+    ).join(
+        JobCategory, JobPosting.category_id == JobCategory.id
+    ).filter(
+        JobApplication.status.in_(statuses)
+    ).order_by(
+        JobApplication.cv_id, status_rank, JobApplication.reviewed_at.desc(), JobApplication.id.desc()
+    )
+
+    labels = {}
+    for cv_id, category_name in rows:
+        labels.setdefault(cv_id, category_name)
+    return labels
+
+
+def load_texts(cv_ids):
+    """Yield (cv_id, text) for CVs with extracted text, loading them in batches."""
+    cv_ids = sorted(cv_ids)
+    for start in range(0, len(cv_ids), TEXT_BATCH_SIZE):
+        batch = cv_ids[start:start + TEXT_BATCH_SIZE]
+        cvs = CV.query.options(selectinload(CV.text_store)).filter(CV.id.in_(batch)).all()
+        for cv in cvs:
+            text = cv.file_content
+            if text and text.strip():
+                yield cv.id, text
+        # Text đã giải nén nằm trong identity map - bỏ đi sau mỗi batch
+        db.session.expunge_all()
+
+
+def activate(model_dir, version):
+    """Point CURRENT at an existing registered version (or NO_MODEL)."""
+    if version != NO_MODEL:
+        if MLModel.query.filter_by(version=version, type=MODEL_TYPE).first() is None:
+            print(f"Model version {version} is not registered")
+            return 1
+        if not os.path.isdir(model_path(model_dir, version)):
+            print(f"Artifacts of {version} not found in {model_dir}")
+            return 1
+    previous = read_pointer(model_dir)
+    write_pointer(model_dir, version)
+    print(f"Active model: {previous or '(newest registered)'} -> {version}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train the CV classifier from recruiter-confirmed categories')
+    parser.add_argument('--statuses', default='shortlisted,hired', help='Application statuses that confirm a category')
+    parser.add_argument('--test-fraction', type=float, default=0.2, help='Share of each category held out for metrics')
+    parser.add_argument('--min-samples', type=int, default=20, help='Minimum labeled CVs required to train')
+    parser.add_argument('--min-df', type=int, default=2, help='Minimum documents a term must occur in')
+    parser.add_argument('--max-features', type=int, default=20000, help='Vocabulary size cap')
+    parser.add_argument('--epochs', type=int, default=30, help='Training epochs')
+    parser.add_argument('--learning-rate', type=float, default=0.05, help='Adam learning rate')
+    parser.add_argument('--l2', type=float, default=1e-4, help='L2 regularization')
+    parser.add_argument('--version', help='Version name (default: tfidf-logreg-<UTC timestamp>)')
+    parser.add_argument('--dry-run', action='store_true', help='Train and evaluate only, do not save or register')
+    parser.add_argument('--no-activate', action='store_true', help='Register the new model without serving it')
+    parser.add_argument('--activate', metavar='VERSION', help=f"Only switch the served model to VERSION ('{NO_MODEL}' for keywords only)")
+    args = parser.parse_args()
+
+    if not HAS_NUMPY:
+        print("NumPy is required to train the classifier")
+        return 1
+
+    app = create_app()
+    with app.app_context():
+        model_dir = app.config.get('ML_MODEL_DIR')
+        if args.activate:
+            return activate(model_dir, args.activate)
+
+        statuses = [status.strip() for status in args.statuses.split(',') if status.strip()]
+        labels_by_cv = load_confirmed_labels(statuses)
+        texts, labels = [], []
+        for cv_id, text in load_texts(labels_by_cv):
+            texts.append(text)
+            labels.append(labels_by_cv[cv_id])
+
+        counts = {}
+        for label in labels:
+            counts[label] = counts.get(label, 0) + 1
+        # Category chỉ có 1 CV thì không học được gì có ý nghĩa
+        keep = {label for label, count in counts.items() if count >= MIN_SAMPLES_PER_CLASS}
+        texts = [text for text, label in zip(texts, labels) if label in keep]
+        labels = [label for label in labels if label in keep]
+
+        print(f"Labeled CVs with text: {len(labels)} in {len(keep)} categories")
+        for label in sorted(keep):
+            print(f"  {label:30s} {counts[label]:5d}")
+        if len(labels) < args.min_samples or len(keep) < 2:
+            print(f"Not enough confirmed data to train (need >= {args.min_samples} CVs in >= 2 categories)")
+            return 1
+
+        params = dict(min_df=args.min_df, max_features=args.max_features, epochs=args.epochs,
+                      learning_rate=args.learning_rate, l2=args.l2)
+
+        start = time.perf_counter()
+        train_idx, test_idx = stratified_split(labels, args.test_fraction)
+        if test_idx:
+            holdout_model = train_model([texts[i] for i in train_idx], [labels[i] for i in train_idx], **params)
+            metrics = evaluate(holdout_model, [texts[i] for i in test_idx], [labels[i] for i in test_idx])
+            metrics['evaluated_on'] = 'holdout'
+        else:
+            metrics = None
+
+        # Model cuối cùng dùng toàn bộ dữ liệu
+        model = train_model(texts, labels, **params)
+        if metrics is None:
+            metrics = evaluate(model, texts, labels)
+            metrics['evaluated_on'] = 'training set'
+        elapsed = time.perf_counter() - start
+
+        print(f"\nTrained in {elapsed:.1f}s: {model.meta['n_features']} terms, {len(model.classes)} classes")
+        print(f"Metrics ({metrics['evaluated_on']}, {metrics['support']} CVs): accuracy {metrics['accuracy']:.3f}, "
+              f"precision {metrics['precision']:.3f}, recall {metrics['recall']:.3f}, f1 {metrics['f1']:.3f}")
+
+        if args.dry_run:
+            return 0
+
+        version = args.version or new_version()
+        if MLModel.query.filter_by(version=version).first() is not None:
+            print(f"Model version {version} already exists")
+            return 1
+        model.meta.update(version=version, metrics=metrics, statuses=statuses,
+                          trained_at=datetime.utcnow().isoformat())
+
+        directory = model_path(model_dir, version)
+        save_model(model, directory)
+
+        row = MLModel(
+            version=version,
+            type=MODEL_TYPE,
+            training_date=datetime.utcnow(),
+            metrics=json.dumps(metrics, ensure_ascii=False),
+            precision=metrics['precision'],
+            recall=metrics['recall'],
+            f1_score=metrics['f1']
+        )
+        db.session.add(row)
+        db.session.commit()
+
+        size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+        print(f"\nRegistered model {version} (ml_models.id={row.id}), artifacts {size / 1024:.0f}KB in {directory}")
+        if args.no_activate:
+            print(f"Not activated; serve it with: python train_classifier.py --activate {version}")
+            return 0
+        # Sau commit: process đọc CURRENT phải tìm thấy dòng ml_models của version này
+        write_pointer(model_dir, version)
+        poll_seconds = app.config.get('ML_MODEL_POLL_SECONDS')
+        print(f"Activated {version}; running web and worker processes switch within {poll_seconds:g}s")
+        if app.config.get('ML_MODEL_VERSION'):
+            print(f"Note: ML_MODEL_VERSION={app.config['ML_MODEL_VERSION']} is set and takes precedence")
+        return 0
+
+
+if __name__ == '__main__':
+    # Set UTF-8 encoding for Windows
+    if sys.platform == 'win32':
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    sys.exit(main())
@@ -1,6 +1,9 @@
 from Flask_CVProject import create_app
+from app.utils.ml_classifier import register_keyword_model
 
 app = create_app()
+# Đăng ký version bộ keyword (dòng ml_models) một lần khi khởi động, ngoài transaction của request
+register_keyword_model(app)
 
 if __name__ == "__main__":
     app.run(debug=True)